@@ -1,15 +1,34 @@
 # -*- coding: utf-8 -*-
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import logging
 from flask import Flask
 from flask import jsonify
+from werkzeug.middleware.proxy_fix import ProxyFix
 from .config import load_settings
 from .logging_config import configure_logging
 from .routes.health import health_bp
 from .routes.tickets import tickets_bp
 from .routes.auth import auth_bp
+from .routes.admin import admin_bp
+from .routes.kb import kb_bp
+from .services.health_probe import GlpiHealthProber
+from .services.kb import IndiceKB
+from .services.user_directory import DiretorioUsuarios
+from .utils.profiling import instalar_profiling
+from .utils.memory import MemoryDiagnostics
+from .utils.http_cache import resposta_estatica
+from .utils.lifecycle import RequestTracker
+from .utils.concurrency import instalar_limitador, resposta_sobrecarga
+from .services.glpi_http import GlpiSobrecarregado
+
+# Custo de importar o pacote (Flask, requests, rotas, serviços): parte do cold start
+IMPORT_MS = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
 
 
 def create_app() -> Flask:
+    create_started = time.perf_counter()
     app = Flask(__name__)
 
     # Configurações básicas
@@ -22,10 +41,50 @@ def create_app() -> Flask:
     logger = logging.getLogger(__name__)
     logger.info("Aplicação iniciando com app factory")
 
+    # Atrás de túnel/proxy (ngrok): remote_addr passa a ser o cliente informado pelos
+    # TRUSTED_PROXY_HOPS proxies confiáveis, lido da direita de X-Forwarded-For
+    if settings.trusted_proxy_hops > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=settings.trusted_proxy_hops)
+
     # Blueprints
     app.register_blueprint(health_bp)
     app.register_blueprint(tickets_bp)
     app.register_blueprint(auth_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(kb_bp)
+
+    # Requisições em andamento, para o encerramento drenar em vez de cortar
+    RequestTracker().install(app)
+
+    # Limite adaptativo de concorrência (CONCURRENCY_LIMIT_ENABLED): 503 rápido quando o GLPI degrada
+    instalar_limitador(app, settings)
+
+    # Sem vaga na fila de saída do GLPI dentro de GLPI_OUTBOUND_MAX_WAIT: 503 + Retry-After, não 500
+    app.register_error_handler(GlpiSobrecarregado,
+                               lambda e: resposta_sobrecarga(str(e), settings.concurrency_retry_after))
+
+    # Profiling opt-in: sem PROFILING_ENABLED nenhum hook é registrado
+    instalar_profiling(app, settings)
+
+    # Diagnóstico de memória sob demanda (tracemalloc só liga via /api/admin/memory/tracing)
+    memory = MemoryDiagnostics(settings.memory_max_snapshots, settings.memory_rss_log_interval)
+    app.extensions["memory_diagnostics"] = memory
+    memory.start_rss_logger()
+
+    # Índice da base de conhecimento (KB_DOCS_DIR), reindexado em background quando os .md mudam
+    kb_index = IndiceKB.from_settings(settings)
+    app.extensions["kb_index"] = kb_index
+
+    # Diretório de usuários para /api/users/suggest (USER_SUGGEST_ENABLED), carregado em background
+    user_directory = DiretorioUsuarios.from_settings(settings)
+    app.extensions["user_directory"] = user_directory
+
+    # Prober de saúde em background: /api/health* servem apenas o cache
+    # Tempos de partida (import, create_app, warm-up, prontidão) expostos em /api/health*
+    startup = {"import_ms": IMPORT_MS, "create_app_ms": None, "warmup_ms": None, "time_to_ready_ms": None}
+    app.extensions["startup_metrics"] = startup
+    prober = GlpiHealthProber.from_settings(settings, startup=startup, started_at=_IMPORT_STARTED)
+    app.extensions["glpi_health_prober"] = prober
 
     # Log de rotas registradas
     for rule in app.url_map.iter_rules():
@@ -33,6 +92,7 @@ def create_app() -> Flask:
 
     # Rota raiz padronizada para ambos entrypoints (run_server.py e app.py)
     @app.route("/", methods=["GET"])
+    @resposta_estatica()
     def index():
         return jsonify({
             "service": "Agente Copilot Studio - GLPI",
@@ -40,13 +100,26 @@ def create_app() -> Flask:
             "version": "2.0",
             "endpoints": {
                 "health": "/api/health",
+                "health_live": "/api/health/live",
+                "health_ready": "/api/health/ready",
                 "routes": "/api/routes",
                 "create_ticket": "/api/create-ticket-complete",
+                "validate_ticket": "/api/validate-ticket",
+                "kb_search": "/api/kb/search",
                 "user_by_email": "/api/glpi-user-by-email",
+                "user_by_email_v2": "/api/v2/glpi-user-by-email",
+                "users_by_email": "/api/glpi-users-by-email",
+                "users_suggest": "/api/users/suggest",
                 "authenticate_user": "/api/authenticate-user"
             }
         })
 
+    startup["create_app_ms"] = round((time.perf_counter() - create_started) * 1000, 1)
+    logger.info(f"Startup: import {IMPORT_MS}ms, create_app {startup['create_app_ms']}ms")
+    prober.start()
+    user_directory.start()
+    if kb_index is not None:
+        kb_index.start()
     return app
 
 
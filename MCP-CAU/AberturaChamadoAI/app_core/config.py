@@ -1,22 +1,144 @@
 # -*- coding: utf-8 -*-
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from dotenv import load_dotenv
 
 
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "sim", "on")
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        return default
+
+
+def _env_list(name: str) -> list[str]:
+    raw = os.getenv(name) or ""
+    return [item.strip() for item in raw.split(",") if item.strip()]
+
+
+def _primary_node_url(specs: list[str]) -> str | None:
+    # GLPI_URL ausente com GLPI_NODES definido: o primeiro nó de escrita identifica a instância
+    for spec in specs:
+        url, _, role = spec.partition("|")
+        if (role or "both").strip().lower() in ("primary", "both"):
+            return url.strip().rstrip("/")
+    return None
+
+
+def _kb_docs_dir(project_root: Path) -> str | None:
+    # Ausente = MCP-CAU/docs/kb; vazio desativa; relativo = a partir de MCP-CAU
+    raw = os.getenv("KB_DOCS_DIR")
+    if raw is None:
+        return str(project_root / "docs" / "kb")
+    if not raw.strip():
+        return None
+    path = Path(raw.strip()).expanduser()
+    return str(path if path.is_absolute() else project_root / path)
+
+
 @dataclass
 class Settings:
     glpi_url: str | None
     glpi_app_token: str | None
     glpi_user_token: str | None
+    # Prober de saúde em background (/api/health, /api/health/ready)
+    health_probe_enabled: bool = True
+    health_probe_interval: float = 30.0
+    health_probe_timeout: float = 10.0
+    # Cache do schema de busca (listSearchOptions) por itemtype
+    glpi_search_options_ttl: float = 3600.0
+    # Pool de conexões HTTP com o GLPI e reuso da sessão de serviço (0 = uma sessão por operação)
+    glpi_pool_size: int = 10
+    # Vários front ends: "url|papel" (primary, read, both); vazio = apenas GLPI_URL
+    glpi_nodes: list[str] = field(default_factory=list)
+    glpi_read_balancing: str = "least_latency"
+    glpi_node_eject_after: int = 3
+    glpi_node_eject_seconds: float = 30.0
+    glpi_session_ttl: float = 600.0
+    # Chamadas simultâneas ao GLPI (fila por prioridade com envelhecimento); 0 desativa o limite
+    glpi_outbound_concurrency: int = 0
+    glpi_priority_aging: float = 1.0
+    # Espera máxima por uma vaga na fila acima (503 depois dela); 0 = sem limite
+    glpi_outbound_max_wait: float = 5.0
+    # Warm-up antes da prontidão: pool/TLS, sessão de serviço e caches de schema
+    warmup_enabled: bool = False
+    # Limite adaptativo de requisições simultâneas ligadas ao GLPI (503 + Retry-After acima dele)
+    concurrency_limit_enabled: bool = False
+    concurrency_limit_initial: int = 20
+    concurrency_limit_min: int = 4
+    concurrency_limit_max: int = 100
+    concurrency_latency_tolerance: float = 2.0
+    concurrency_retry_after: int = 1
+    # Fila justa ponderada por chamador (API key ou IP) diante do limite de concorrência;
+    # só vale com concurrency_limit_enabled (sem ele, a flag é ignorada com aviso no log)
+    fair_queue_enabled: bool = False
+    fair_queue_weights: list[str] = field(default_factory=list)
+    fair_queue_max_depth: int = 20
+    fair_queue_max_wait: float = 2.0
+    # Proxies/túneis confiáveis à frente da API (ProxyFix em X-Forwarded-For); 0 = conexão direta
+    trusted_proxy_hops: int = 0
+    # Prazo para drenar requisições em andamento no SIGTERM (scripts/run_server.py)
+    shutdown_drain_timeout: float = 20.0
+    # Tempo com /ready em 503 antes de parar de aceitar conexões (o balanceador tira a instância)
+    shutdown_grace_period: float = 5.0
+    # Paginação de /search (range) e teto de linhas lidas por busca
+    glpi_search_page_size: int = 50
+    glpi_search_max_rows: int = 200
+    # Cache dos usuários resolvidos por e-mail (e max-age do Cache-Control da rota); 0 desativa
+    user_cache_ttl: float = 300.0
+    # Identidade resolvida na autenticação, reaproveitada pela conversa (conversation_id); 0 desativa
+    conversation_context_ttl: float = 900.0
+    # Asserções assinadas (HMAC) devolvidas pela autenticação: "kid:segredo" (a primeira assina); vazio desativa
+    auth_assertion_keys: list[str] = field(default_factory=list)
+    auth_assertion_ttl: float = 900.0
+    # Backend da busca de usuários: "rest" (padrão) ou "sql" (banco do GLPI, somente leitura)
+    user_lookup_backend: str = "rest"
+    user_db_url: str | None = None
+    # Conexões do backend SQL (reaproveitadas entre consultas e threads)
+    user_db_pool_size: int = 4
+    # Reenvio do mesmo chamado (requerente + local): off, flag (apenas sinaliza) ou return (devolve o existente)
+    duplicate_mode: str = "off"
+    duplicate_window: float = 600.0
+    duplicate_threshold: float = 0.5
+    # Sugestão de usuários (/api/users/suggest): cópia em memória dos usuários do GLPI, recarregada em background
+    user_suggest_enabled: bool = False
+    user_suggest_refresh: float = 900.0
+    user_suggest_max_users: int = 20000
+    # Base de conhecimento (/api/kb/search): diretório de *.md indexado no startup; vazio desativa
+    kb_docs_dir: str | None = None
+    kb_refresh_interval: float = 30.0
+    # /api/glpi-users-by-email: e-mails por requisição e critérios OR por busca no GLPI
+    batch_lookup_max_emails: int = 500
+    batch_lookup_chunk_size: int = 50
+    # Token exigido (header X-Admin-Token) pelas rotas /api/admin/*; vazio desativa a superfície
+    admin_token: str | None = None
+    # Profiling sob demanda (cProfile); desligado não registra hooks
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_routes: list[str] = field(default_factory=list)
+    profiling_output_dir: str = "profiles"
+    # Diagnóstico de memória (/api/admin/memory*); intervalo 0 desativa o log de RSS
+    memory_rss_log_interval: float = 0.0
+    memory_max_snapshots: int = 5
 
 
 def load_settings() -> Settings:
-    # Resolve paths: agent root (AberturaChamadoAI) and project root (MCP-CAU)
+    # Resolve paths: agent root (AberturaChamadoAI) and project root (MCP-CAU).
+    # This file is MCP-CAU/AberturaChamadoAI/app_core/config.py
     current_file = Path(__file__).resolve()
-    agent_root = current_file.parents[2]  # .../MCP-CAU/AberturaChamadoAI
-    project_root = current_file.parents[3]  # .../MCP-CAU
+    agent_root = current_file.parents[1]  # .../MCP-CAU/AberturaChamadoAI
+    project_root = current_file.parents[2]  # .../MCP-CAU
 
     # Try loading .env from agent folder first, then fallback to project root
     env_candidates = [agent_root / ".env", project_root / ".env"]
@@ -27,10 +149,62 @@ def load_settings() -> Settings:
     else:
         # Fallback to default behavior (current working directory)
         load_dotenv()
+    glpi_nodes = _env_list("GLPI_NODES")
     return Settings(
-        glpi_url=os.getenv("GLPI_URL"),
+        glpi_url=os.getenv("GLPI_URL") or _primary_node_url(glpi_nodes),
         glpi_app_token=os.getenv("GLPI_APP_TOKEN"),
         glpi_user_token=os.getenv("GLPI_USER_TOKEN"),
+        health_probe_enabled=_env_bool("HEALTH_PROBE_ENABLED", True),
+        health_probe_interval=_env_float("HEALTH_PROBE_INTERVAL", 30.0),
+        health_probe_timeout=_env_float("HEALTH_PROBE_TIMEOUT", 10.0),
+        glpi_search_options_ttl=_env_float("GLPI_SEARCH_OPTIONS_TTL", 3600.0),
+        glpi_pool_size=int(_env_float("GLPI_POOL_SIZE", 10)),
+        glpi_nodes=glpi_nodes,
+        glpi_read_balancing=(os.getenv("GLPI_READ_BALANCING") or "least_latency").strip().lower(),
+        glpi_node_eject_after=int(_env_float("GLPI_NODE_EJECT_AFTER", 3)),
+        glpi_node_eject_seconds=_env_float("GLPI_NODE_EJECT_SECONDS", 30.0),
+        glpi_session_ttl=_env_float("GLPI_SESSION_TTL", 600.0),
+        glpi_outbound_concurrency=int(_env_float("GLPI_OUTBOUND_CONCURRENCY", 0)),
+        glpi_priority_aging=_env_float("GLPI_PRIORITY_AGING", 1.0),
+        glpi_outbound_max_wait=_env_float("GLPI_OUTBOUND_MAX_WAIT", 5.0),
+        warmup_enabled=_env_bool("WARMUP_ENABLED", False),
+        concurrency_limit_enabled=_env_bool("CONCURRENCY_LIMIT_ENABLED", False),
+        concurrency_limit_initial=int(_env_float("CONCURRENCY_LIMIT_INITIAL", 20)),
+        concurrency_limit_min=int(_env_float("CONCURRENCY_LIMIT_MIN", 4)),
+        concurrency_limit_max=int(_env_float("CONCURRENCY_LIMIT_MAX", 100)),
+        concurrency_latency_tolerance=_env_float("CONCURRENCY_LATENCY_TOLERANCE", 2.0),
+        concurrency_retry_after=int(_env_float("CONCURRENCY_RETRY_AFTER", 1)),
+        fair_queue_enabled=_env_bool("FAIR_QUEUE_ENABLED", False),
+        fair_queue_weights=_env_list("FAIR_QUEUE_WEIGHTS"),
+        fair_queue_max_depth=int(_env_float("FAIR_QUEUE_MAX_DEPTH", 20)),
+        fair_queue_max_wait=_env_float("FAIR_QUEUE_MAX_WAIT", 2.0),
+        trusted_proxy_hops=int(_env_float("TRUSTED_PROXY_HOPS", 0)),
+        shutdown_drain_timeout=_env_float("SHUTDOWN_DRAIN_TIMEOUT", 20.0),
+        shutdown_grace_period=_env_float("SHUTDOWN_GRACE_PERIOD", 5.0),
+        glpi_search_page_size=int(_env_float("GLPI_SEARCH_PAGE_SIZE", 50)),
+        glpi_search_max_rows=int(_env_float("GLPI_SEARCH_MAX_ROWS", 200)),
+        user_cache_ttl=_env_float("USER_CACHE_TTL", 300.0),
+        conversation_context_ttl=_env_float("CONVERSATION_CONTEXT_TTL", 900.0),
+        auth_assertion_keys=_env_list("AUTH_ASSERTION_KEYS"),
+        auth_assertion_ttl=_env_float("AUTH_ASSERTION_TTL", 900.0),
+        user_lookup_backend=(os.getenv("USER_LOOKUP_BACKEND") or "rest").strip().lower(),
+        user_db_url=os.getenv("USER_DB_URL") or None,
+        user_db_pool_size=int(_env_float("USER_DB_POOL_SIZE", 4)),
+        duplicate_mode=(os.getenv("DUPLICATE_MODE") or "off").strip().lower(),
+        duplicate_window=_env_float("DUPLICATE_WINDOW", 600.0),
+        duplicate_threshold=_env_float("DUPLICATE_THRESHOLD", 0.5),
+        user_suggest_enabled=_env_bool("USER_SUGGEST_ENABLED", False),
+        user_suggest_refresh=_env_float("USER_SUGGEST_REFRESH", 900.0),
+        user_suggest_max_users=int(_env_float("USER_SUGGEST_MAX_USERS", 20000)),
+        kb_docs_dir=_kb_docs_dir(project_root),
+        kb_refresh_interval=_env_float("KB_REFRESH_INTERVAL", 30.0),
+        batch_lookup_max_emails=int(_env_float("BATCH_LOOKUP_MAX_EMAILS", 500)),
+        batch_lookup_chunk_size=int(_env_float("BATCH_LOOKUP_CHUNK_SIZE", 50)),
+        admin_token=os.getenv("ADMIN_TOKEN") or None,
+        profiling_enabled=_env_bool("PROFILING_ENABLED", False),
+        profiling_sample_rate=_env_float("PROFILING_SAMPLE_RATE", 0.0),
+        profiling_routes=_env_list("PROFILING_ROUTES"),
+        profiling_output_dir=os.getenv("PROFILING_OUTPUT_DIR") or "profiles",
+        memory_rss_log_interval=_env_float("MEMORY_RSS_LOG_INTERVAL", 0.0),
+        memory_max_snapshots=int(_env_float("MEMORY_MAX_SNAPSHOTS", 5)),
     )
-
-
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+import logging
+from flask import Blueprint, current_app, jsonify, request
+from ..services.glpi_http import obter_pool
+from ..utils.admin_auth import exigir_admin
+from ..utils.memory import MemoryDiagnostics
+
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
+logger = logging.getLogger(__name__)
+
+
+def _profiler_indisponivel():
+    return jsonify({
+        "sucesso": False,
+        "success": False,
+        "erro": "profiling_disabled",
+        "mensagem": "Profiling desabilitado na configuração (PROFILING_ENABLED)",
+    }), 409
+
+
+@admin_bp.route("/profiling", methods=["GET"])
+@exigir_admin
+def profiling_status():
+    profiler = current_app.extensions.get("request_profiler")
+    if profiler is None:
+        return _profiler_indisponivel()
+    return jsonify({"sucesso": True, "success": True, "profiling": profiler.status()}), 200
+
+
+@admin_bp.route("/profiling", methods=["POST"])
+@exigir_admin
+def profiling_configure():
+    """Ajusta em tempo de execução: active, sample_rate, routes; reset=true descarta o agregado."""
+    profiler = current_app.extensions.get("request_profiler")
+    if profiler is None:
+        return _profiler_indisponivel()
+    data = request.get_json(silent=True) or {}
+    if "active" in data:
+        profiler.active = bool(data["active"])
+    if "sample_rate" in data:
+        try:
+            profiler.sample_rate = max(0.0, min(1.0, float(data["sample_rate"])))
+        except (TypeError, ValueError):
+            return jsonify({"sucesso": False, "success": False, "erro": "sample_rate inválido"}), 400
+    if isinstance(data.get("routes"), list):
+        profiler.routes = {str(r) for r in data["routes"]}
+    if data.get("reset"):
+        profiler.reset()
+    logger.info(f"Profiling reconfigurado: {profiler.status()}")
+    return jsonify({"sucesso": True, "success": True, "profiling": profiler.status()}), 200
+
+
+@admin_bp.route("/profiling/flush", methods=["POST"])
+@exigir_admin
+def profiling_flush():
+    profiler = current_app.extensions.get("request_profiler")
+    if profiler is None:
+        return _profiler_indisponivel()
+    return jsonify({"sucesso": True, "success": True, "files": profiler.flush()}), 200
+
+
+def _memory():
+    memory = current_app.extensions.get("memory_diagnostics")
+    if memory is None:
+        memory = MemoryDiagnostics()
+        current_app.extensions["memory_diagnostics"] = memory
+    return memory
+
+
+def _limit(default: int = 20) -> int:
+    try:
+        return max(1, min(200, int(request.args.get("limit", default))))
+    except (TypeError, ValueError):
+        return default
+
+
+@admin_bp.route("/memory", methods=["GET"])
+@exigir_admin
+def memory_status():
+    return jsonify({"sucesso": True, "success": True, "memory": _memory().status()}), 200
+
+
+@admin_bp.route("/memory/tracing", methods=["POST"])
+@exigir_admin
+def memory_tracing():
+    """Liga/desliga tracemalloc: {"active": true, "frames": 10}."""
+    data = request.get_json(silent=True) or {}
+    memory = _memory()
+    if data.get("active", True):
+        try:
+            frames = int(data.get("frames", 10))
+        except (TypeError, ValueError):
+            frames = 10
+        memory.start_tracing(frames)
+    else:
+        memory.stop_tracing()
+    return jsonify({"sucesso": True, "success": True, "memory": memory.status()}), 200
+
+
+@admin_bp.route("/memory/snapshots", methods=["POST"])
+@exigir_admin
+def memory_snapshot():
+    data = request.get_json(silent=True) or {}
+    try:
+        meta = _memory().take_snapshot(data.get("label"))
+    except RuntimeError as e:
+        return jsonify({"sucesso": False, "success": False, "erro": "tracing_inactive", "mensagem": str(e)}), 409
+    return jsonify({"sucesso": True, "success": True, "snapshot": meta}), 201
+
+
+@admin_bp.route("/memory/snapshots/<label>/top", methods=["GET"])
+@exigir_admin
+def memory_top(label):
+    group_by = request.args.get("group_by", "lineno")
+    if group_by not in ("lineno", "filename", "traceback"):
+        return jsonify({"sucesso": False, "success": False, "erro": "group_by inválido"}), 400
+    try:
+        top = _memory().top(label, limit=_limit(), group_by=group_by)
+    except KeyError:
+        return jsonify({"sucesso": False, "success": False, "erro": "not_found", "label": label}), 404
+    return jsonify({"sucesso": True, "success": True, "label": label, "top": top}), 200
+
+
+@admin_bp.route("/memory/diff", methods=["GET"])
+@exigir_admin
+def memory_diff():
+    """Diff entre snapshots `base` e `target` (sem target: snapshot novo agora)."""
+    base = request.args.get("base")
+    if not base:
+        return jsonify({"sucesso": False, "success": False, "erro": "Parâmetro 'base' é obrigatório"}), 400
+    try:
+        diff = _memory().diff(base, request.args.get("target"), limit=_limit())
+    except KeyError as e:
+        return jsonify({"sucesso": False, "success": False, "erro": "not_found", "label": str(e)}), 404
+    except RuntimeError as e:
+        return jsonify({"sucesso": False, "success": False, "erro": "tracing_inactive", "mensagem": str(e)}), 409
+    return jsonify({"sucesso": True, "success": True, "base": base, "diff": diff}), 200
+
+
+@admin_bp.route("/memory/objects", methods=["GET"])
+@exigir_admin
+def memory_objects():
+    return jsonify({"sucesso": True, "success": True, "objects": MemoryDiagnostics.object_counts(_limit(30))}), 200
+
+
+@admin_bp.route("/glpi-nodes", methods=["GET"])
+@exigir_admin
+def glpi_nodes():
+    """Nós do GLPI: papel, requisições, erros, latência (EWMA) e estado de ejeção."""
+    try:
+        return jsonify({"sucesso": True, "success": True, "glpi": obter_pool().status()}), 200
+    except Exception as e:
+        return jsonify({"sucesso": False, "success": False, "erro": str(e)}), 500
+
+
+@admin_bp.route("/concurrency", methods=["GET"])
+@exigir_admin
+def concurrency_status():
+    """Limite adaptativo: limite atual, em andamento por classe, latência do GLPI e descartes."""
+    limiter = current_app.extensions.get("concurrency_limiter")
+    if limiter is None:
+        return jsonify({
+            "sucesso": False,
+            "success": False,
+            "erro": "concurrency_limit_disabled",
+            "mensagem": "Limite de concorrência desabilitado na configuração (CONCURRENCY_LIMIT_ENABLED)",
+        }), 409
+    return jsonify({"sucesso": True, "success": True, "concurrency": limiter.status()}), 200
+
+
+@admin_bp.route("/kb", methods=["GET", "POST"])
+@exigir_admin
+def kb_status():
+    """Índice da base de conhecimento; POST sincroniza agora (reindexa só os arquivos alterados)."""
+    indice = current_app.extensions.get("kb_index")
+    if indice is None:
+        return jsonify({
+            "sucesso": False,
+            "success": False,
+            "erro": "kb_disabled",
+            "mensagem": "Base de conhecimento desabilitada na configuração (KB_DOCS_DIR)",
+        }), 409
+    sync = indice.sincronizar() if request.method == "POST" else None
+    return jsonify({"sucesso": True, "success": True, "kb": indice.status(), "sync": sync}), 200
+
+
+@admin_bp.route("/user-directory", methods=["GET", "POST"])
+@exigir_admin
+def user_directory_status():
+    """Diretório de /api/users/suggest; POST recarrega os usuários do GLPI agora."""
+    diretorio = current_app.extensions.get("user_directory")
+    if diretorio is None or not diretorio.enabled:
+        return jsonify({
+            "sucesso": False,
+            "success": False,
+            "erro": "user_suggest_disabled",
+            "mensagem": "Sugestão de usuários desabilitada na configuração (USER_SUGGEST_ENABLED)",
+        }), 409
+    refresh = diretorio.atualizar() if request.method == "POST" else None
+    return jsonify({"sucesso": True, "success": True, "user_directory": diretorio.status(),
+                    "refresh": refresh}), 200
@@ -5,6 +5,9 @@ import json as _json
 from flask import Blueprint, request, jsonify, current_app
 from ..utils.validators import is_powerfx_expression
 from ..services.glpi import buscar_usuario_por_email, autenticar_usuario_por_credenciais
+from ..services.conversation import salvar_contexto
+from ..services.glpi_http import GlpiSobrecarregado
+from ..utils.assertions import assercao_da_requisicao, claims_da_requisicao, emitir_assercao
 
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api")
@@ -24,6 +27,38 @@ def ensure_json_headers():
                 logger.warning(f"[{trace_id}] Content-Type não é JSON: {content_type}")
 
 
+def _assercao_do_usuario(claims, login: str, email: str) -> bool:
+    """A asserção só dispensa o login se for do mesmo usuário informado (quando informado)."""
+    if login and login.lower() != str(claims.get("login") or "").lower():
+        return False
+    if email and email.lower() != str(claims.get("email") or "").lower():
+        return False
+    return True
+
+
+def _resposta_autenticado(usuario, auth, trace_id, email=None, name=None, assercao=None):
+    # Identidade guardada para a conversa: create-ticket-complete com este conversation_id
+    # usa o requerente já resolvido em vez de buscar de novo no GLPI
+    conversation_id = salvar_contexto({**usuario, "email": email or usuario.get("email"),
+                                       "name": name or usuario.get("name")})
+    # Montar resposta sem expor a senha
+    response_data = {
+        "sucesso": True,
+        "success": True,
+        "trace_id": trace_id,
+        "usuario": usuario,
+        "auth": auth,
+        "conversation_id": conversation_id,
+    }
+    # Login pela própria asserção devolve a mesma (mesmo exp): só senha/TOTP emitem uma nova,
+    # senão uma asserção vazada poderia ser renovada indefinidamente
+    emitida = assercao or emitir_assercao(usuario.get("user_id"), usuario.get("login"),
+                                          email or usuario.get("email"))
+    if emitida:
+        response_data["assertion"], response_data["assertion_expires_at"] = emitida
+    return jsonify(response_data), 200
+
+
 @auth_bp.route("/authenticate-user", methods=["POST"])
 def authenticate_user():
     trace_id = str(uuid.uuid4())[:8]
@@ -115,6 +150,17 @@ def authenticate_user():
         password = (data.get("password") or data.get("senha") or "").strip()
         totp_code = (data.get("totp_code") or data.get("totp") or "").strip() or None
 
+        # Asserção válida do mesmo usuário: verificada localmente, sem novo login no GLPI
+        claims = claims_da_requisicao(data)
+        if claims and _assercao_do_usuario(claims, login, email):
+            return _resposta_autenticado({
+                "login": claims.get("login"),
+                "user_id": claims.get("sub"),
+                "email": claims.get("email"),
+                "name": None,
+            }, {"status": "ok", "method": "assertion", "expires_at": claims["exp"]}, trace_id,
+                assercao=(assercao_da_requisicao(data), claims["exp"]))
+
         if not password:
             return jsonify({
                 "sucesso": False,
@@ -138,7 +184,7 @@ def authenticate_user():
                     "mensagem": "Informe 'login' ou 'email' válido",
                     "trace_id": trace_id,
                 }), 422
-            lookup = buscar_usuario_por_email(email)
+            lookup = buscar_usuario_por_email(email, incluir_raw=False)
             if not lookup.get("found"):
                 return jsonify({
                     "sucesso": False,
@@ -178,23 +224,19 @@ def authenticate_user():
                     "trace_id": trace_id,
                 }), 401
 
-        # Montar resposta sem expor a senha
-        response_data = {
-            "sucesso": True,
-            "success": True,
-            "trace_id": trace_id,
-            "usuario": {
-                "login": resolved_login,
-                "user_id": auth_result.get("user_id") or resolved_user_id,
-                "email": resolved_email,
-                "name": resolved_name,
-            },
-            "auth": {
-                "status": auth_result.get("status"),
-                "logout_verified": auth_result.get("logout_verified", False),
-            },
+        usuario = {
+            "login": resolved_login,
+            "user_id": auth_result.get("user_id") or resolved_user_id,
+            "email": resolved_email,
+            "name": resolved_name,
         }
-        return jsonify(response_data), 200
+        return _resposta_autenticado(usuario, {
+            "status": auth_result.get("status"),
+            "logout_verified": auth_result.get("logout_verified", False),
+        }, trace_id, email=resolved_email or auth_result.get("email"),
+            name=resolved_name or auth_result.get("name"))
+    except GlpiSobrecarregado:
+        raise  # 503 pelo handler da app
     except Exception as e:
         # Não logar senha; retornar erro genérico
         return jsonify({
@@ -2,37 +2,66 @@
 import uuid
 from flask import Blueprint, jsonify
 from flask import current_app
-from ..config import load_settings
-from ..services.glpi import autenticar_glpi
+from ..services.health_probe import GlpiHealthProber
+from ..utils.http_cache import resposta_estatica
 
 
 health_bp = Blueprint("health", __name__, url_prefix="/api")
 
 
+def _prober() -> GlpiHealthProber:
+    prober = current_app.extensions.get("glpi_health_prober")
+    if prober is None:
+        # App criada sem create_app (ex.: testes); prober inerte, sem thread
+        prober = GlpiHealthProber(enabled=False)
+        current_app.extensions["glpi_health_prober"] = prober
+    return prober
+
+
 @health_bp.route("/health", methods=["GET"])
 def health_check():
+    """Estado agregado servido do cache do prober (não abre sessão no GLPI)."""
     try:
-        settings = load_settings()
-        config_ok = all([settings.glpi_url, settings.glpi_app_token, settings.glpi_user_token])
+        snapshot = _prober().snapshot()
+        config_ok = bool(snapshot.get("glpi_configured"))
         status = {
             "status": "ok" if config_ok else "error",
             "glpi_configured": config_ok,
             "timestamp": str(uuid.uuid4()),
+            "checked_at": snapshot.get("checked_at"),
+            "latency_ms": snapshot.get("latency_ms"),
+            "age_s": snapshot.get("age_s"),
+            "startup": current_app.extensions.get("startup_metrics"),
         }
         if config_ok:
-            try:
-                autenticar_glpi()
-                status["glpi_connection"] = "ok"
-            except Exception as e:
-                status["glpi_connection"] = "error"
-                status["glpi_error"] = str(e)
+            status["glpi_connection"] = snapshot.get("glpi_connection")
+            if snapshot.get("glpi_connection") != "ok" or snapshot.get("stale"):
                 status["status"] = "warning"
+            if snapshot.get("glpi_error"):
+                status["glpi_error"] = snapshot.get("glpi_error")
         return jsonify(status), 200
     except Exception as e:
         return jsonify({"status": "error", "error": str(e)}), 500
 
 
+@health_bp.route("/health/live", methods=["GET"])
+def health_live():
+    """Liveness: o processo responde; nenhuma dependência é consultada."""
+    return jsonify({"status": "ok"}), 200
+
+
+@health_bp.route("/health/ready", methods=["GET"])
+def health_ready():
+    """Readiness: último resultado do prober; 503 enquanto o GLPI não estiver ok."""
+    prober = _prober()
+    snapshot = prober.snapshot()
+    ready = prober.is_ready()
+    startup = current_app.extensions.get("startup_metrics")
+    return jsonify({"ready": ready, **snapshot, "startup": startup}), (200 if ready else 503)
+
+
 @health_bp.route("/routes", methods=["GET"])
+@resposta_estatica()
 def list_routes():
     try:
         rules = []
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import time
+import uuid
+from flask import Blueprint, current_app, jsonify, request
+from ..utils.responses import modo_compacto, resposta_compacta
+
+
+kb_bp = Blueprint("kb", __name__, url_prefix="/api")
+
+# Resultados por consulta: padrão e teto de `limit`
+_LIMIT_PADRAO = 5
+_LIMIT_MAX = 20
+
+
+@kb_bp.route("/kb/search", methods=["GET"])
+@kb_bp.route("/v2/kb/search", methods=["GET"])
+def kb_search():
+    """
+    Busca na base de conhecimento (BM25 em memória, sem GLPI): o tópico pode sugerir uma
+    resposta antes de abrir chamado. `q` obrigatório; `limit` até 20.
+    """
+    trace_id = str(uuid.uuid4())[:8]
+    compacto = modo_compacto()
+
+    def falha(status, mensagem, codigo="bad_request"):
+        if compacto:
+            return resposta_compacta(status=status, error=codigo, message=mensagem, trace_id=trace_id)
+        return jsonify({"sucesso": False, "success": False, "error": mensagem, "erro": mensagem,
+                        "trace_id": trace_id}), status
+
+    indice = current_app.extensions.get("kb_index")
+    if indice is None:
+        return falha(503, "Base de conhecimento desabilitada (KB_DOCS_DIR)", "kb_disabled")
+    consulta = (request.args.get("q") or "").strip()
+    if not consulta:
+        return falha(400, "Parâmetro 'q' é obrigatório")
+    try:
+        limit = min(_LIMIT_MAX, max(1, int(request.args.get("limit", _LIMIT_PADRAO))))
+    except ValueError:
+        return falha(400, "Parâmetro 'limit' deve ser um inteiro")
+
+    started = time.perf_counter()
+    results = indice.buscar(consulta, limit)
+    resultado = {"query": consulta, "total": len(results), "results": results,
+                 "took_ms": round((time.perf_counter() - started) * 1000, 3)}
+    if compacto:
+        return resposta_compacta(resultado, trace_id=trace_id)
+    return jsonify({"sucesso": True, "success": True, **resultado, "trace_id": trace_id}), 200
@@ -1,10 +1,24 @@
 # -*- coding: utf-8 -*-
+import time
 import uuid
 import logging
-from flask import Blueprint, request, jsonify
-from ..services.glpi import criar_ticket_glpi, buscar_usuario_por_email, mapear_categoria
+from flask import Blueprint, current_app, request, jsonify, make_response
+from ..services.glpi import (
+    criar_ticket_glpi,
+    buscar_usuario_por_email,
+    buscar_usuario_por_email_cacheado,
+    buscar_usuarios_por_emails,
+    mapear_categoria,
+    normalizar_emails,
+)
+from ..services.glpi_http import PRIORIDADE_BACKGROUND, GlpiSobrecarregado, prioridade_glpi
+from ..services.conversation import conversation_id_da_requisicao, obter_contexto
+from ..utils.assertions import claims_da_requisicao
+from ..services.duplicates import obter_indice, requerente_do_chamado, texto_do_chamado
 from ..config import load_settings
-from ..utils.validators import is_powerfx_expression
+from ..utils.validators import is_powerfx_expression, listar_violacoes, validar_chamado
+from ..utils.responses import campos_solicitados, modo_compacto, projetar_campos, resposta_compacta
+from ..utils.http_cache import cache_control_usuario, condicional
 
 
 tickets_bp = Blueprint("tickets", __name__, url_prefix="/api")
@@ -25,7 +39,10 @@ def ensure_json_headers():
 
 
 @tickets_bp.route("/glpi-user-by-email", methods=["GET"])
+@tickets_bp.route("/v2/glpi-user-by-email", methods=["GET"])
 def glpi_user_by_email():
+    if modo_compacto():
+        return _glpi_user_by_email_compacto()
     try:
         email = request.args.get("email") or request.args.get("e") or request.args.get("mail")
         if not email or "@" not in email:
@@ -35,17 +52,219 @@ def glpi_user_by_email():
                 "error": "Parâmetro 'email' é obrigatório",
                 "erro": "Parâmetro 'email' é obrigatório",
             }), 400
-        result = buscar_usuario_por_email(email)
-        return jsonify({
+        result = buscar_usuario_por_email_cacheado(email)
+        ttl = load_settings().user_cache_ttl if result.get("found") else 0
+        resp = make_response(jsonify({
             "sucesso": True,
             "success": True,
             "query_email": email,
             "resultado": result,
-        }), 200
+        }), 200)
+        return condicional(resp, cache_control_usuario(ttl))
+    except GlpiSobrecarregado:
+        raise  # 503 pelo handler da app
     except Exception as e:
         return jsonify({"sucesso": False, "success": False, "error": str(e), "erro": str(e)}), 500
 
 
+def _glpi_user_by_email_compacto():
+    """Contrato compacto: envelope único, `fields=` e `raw` apenas quando pedido."""
+    try:
+        email = request.args.get("email") or request.args.get("e") or request.args.get("mail")
+        if not email or "@" not in email:
+            return resposta_compacta(status=400, error="bad_request", message="Parâmetro 'email' é obrigatório")
+        campos = campos_solicitados()
+        incluir_raw = request.args.get("raw") == "1" or bool(campos and "raw" in campos)
+        result = buscar_usuario_por_email_cacheado(email)
+        ttl = load_settings().user_cache_ttl if result.get("found") else 0
+        if not incluir_raw:
+            result.pop("raw", None)
+            result.pop("search", None)
+        result["query_email"] = email
+        resp = resposta_compacta(projetar_campos(result, campos))
+        return condicional(resp, cache_control_usuario(ttl))
+    except GlpiSobrecarregado:
+        raise  # 503 pelo handler da app
+    except Exception as e:
+        return resposta_compacta(status=500, error="internal_error", message=str(e))
+
+
+# Sugestões por consulta: padrão e teto de `limit`; consultas menores que o mínimo não são respondidas
+_SUGGEST_LIMIT_PADRAO = 10
+_SUGGEST_LIMIT_MAX = 50
+_SUGGEST_MIN_CHARS = 2
+
+
+@tickets_bp.route("/users/suggest", methods=["GET"])
+@tickets_bp.route("/v2/users/suggest", methods=["GET"])
+def users_suggest():
+    """
+    Sugestões ranqueadas de usuários (login, e-mail, nome) para `q`, servidas do diretório
+    em memória (USER_SUGGEST_ENABLED): nenhuma busca no GLPI por consulta. Útil quando o
+    usuário digitou o e-mail/login errado e a busca exata não encontrou ninguém.
+    """
+    trace_id = str(uuid.uuid4())[:8]
+    compacto = modo_compacto()
+
+    def falha(status, mensagem, codigo="bad_request"):
+        if compacto:
+            return resposta_compacta(status=status, error=codigo, message=mensagem, trace_id=trace_id)
+        return jsonify({"sucesso": False, "success": False, "error": mensagem, "erro": mensagem,
+                        "trace_id": trace_id}), status
+
+    diretorio = current_app.extensions.get("user_directory")
+    if diretorio is None or not diretorio.enabled:
+        return falha(503, "Sugestão de usuários desabilitada (USER_SUGGEST_ENABLED)", "suggest_disabled")
+    if not diretorio.pronto:
+        return falha(503, "Diretório de usuários ainda não carregado do GLPI", "suggest_not_ready")
+    consulta = (request.args.get("q") or "").strip()
+    if len(consulta) < _SUGGEST_MIN_CHARS:
+        return falha(400, f"Parâmetro 'q' deve ter ao menos {_SUGGEST_MIN_CHARS} caracteres")
+    try:
+        limit = min(_SUGGEST_LIMIT_MAX, max(1, int(request.args.get("limit", _SUGGEST_LIMIT_PADRAO))))
+    except ValueError:
+        return falha(400, "Parâmetro 'limit' deve ser um inteiro")
+
+    started = time.perf_counter()
+    sugestoes = diretorio.sugerir(consulta, limit)
+    resultado = {"query": consulta, "total": len(sugestoes), "suggestions": sugestoes,
+                 "loaded_at": diretorio.loaded_at, "took_ms": round((time.perf_counter() - started) * 1000, 3)}
+    if compacto:
+        return resposta_compacta(resultado, trace_id=trace_id)
+    return jsonify({"sucesso": True, "success": True, **resultado, "trace_id": trace_id}), 200
+
+
+@tickets_bp.route("/glpi-users-by-email", methods=["POST"])
+@tickets_bp.route("/v2/glpi-users-by-email", methods=["POST"])
+def glpi_users_by_email():
+    """Lote: {"emails": [...]} -> mapa e-mail normalizado -> resultado (found/not found)."""
+    trace_id = str(uuid.uuid4())[:8]
+    compacto = modo_compacto()
+
+    def falha(status, mensagem, codigo="bad_request"):
+        if compacto:
+            return resposta_compacta(status=status, error=codigo, message=mensagem, trace_id=trace_id)
+        return jsonify({"sucesso": False, "success": False, "error": mensagem, "erro": mensagem,
+                        "trace_id": trace_id}), status
+
+    try:
+        data = request.get_json(force=True, silent=True)
+        emails = data.get("emails") if isinstance(data, dict) else data
+        if isinstance(emails, str):
+            emails = emails.split(",")
+        if not isinstance(emails, list) or not emails:
+            return falha(400, "Informe 'emails' como lista não vazia")
+
+        settings = load_settings()
+        validos, invalidos = normalizar_emails(emails)
+        if len(validos) > settings.batch_lookup_max_emails:
+            return falha(413, f"Máximo de {settings.batch_lookup_max_emails} e-mails por requisição",
+                         "payload_too_large")
+
+        # Lote é trabalho de integração: cede a vez às conversas na fila de chamadas ao GLPI
+        with prioridade_glpi(PRIORIDADE_BACKGROUND):
+            resultados = buscar_usuarios_por_emails(validos) if validos else {}
+        encontrados = sum(1 for r in resultados.values() if r["found"])
+        resumo = {"total": len(validos), "found": encontrados, "not_found": len(validos) - encontrados}
+        if compacto:
+            return resposta_compacta({**resumo, "results": resultados, "invalid": invalidos}, trace_id=trace_id)
+        return jsonify({
+            "sucesso": True,
+            "success": True,
+            **resumo,
+            "resultados": resultados,
+            "invalidos": invalidos,
+            "trace_id": trace_id,
+        }), 200
+    except GlpiSobrecarregado:
+        raise  # 503 pelo handler da app
+    except Exception as e:
+        return falha(500, str(e), "internal_error")
+
+
+def _mesmo_requerente(contexto, requester_email) -> bool:
+    """Contexto da conversa vale para este chamado: usuário resolvido e mesmo e-mail (se informado)."""
+    if not contexto or not contexto.get("user_id"):
+        return False
+    if not requester_email:
+        return True
+    return str(requester_email).strip().lower() == str(contexto.get("email") or "").strip().lower()
+
+
+# Campo canônico -> nomes aceitos no corpo (inglês primeiro, depois os apelidos em português)
+_ALIASES_CHAMADO = {
+    "description": ("description", "descricao"),
+    "title": ("title", "titulo"),
+    "category": ("category", "categoria"),
+    "impact": ("impact", "impacto"),
+    "location": ("location", "localizacao"),
+    "contact_phone": ("contact_phone", "telefone_contato", "telefone"),
+}
+_CAMPO_POR_ALIAS = {alias: campo for campo, aliases in _ALIASES_CHAMADO.items() for alias in aliases}
+
+
+def _campos_do_chamado(data) -> dict:
+    """Campos do chamado pelos nomes canônicos, aceitando os apelidos de _ALIASES_CHAMADO."""
+    campos = {}
+    for campo, aliases in _ALIASES_CHAMADO.items():
+        valor = None
+        for alias in aliases:
+            valor = data.get(alias)
+            if valor:
+                break
+        campos[campo] = valor
+    return campos
+
+
+@tickets_bp.route("/validate-ticket", methods=["POST"])
+@tickets_bp.route("/v2/validate-ticket", methods=["POST"])
+def validate_ticket():
+    """
+    Validação do rascunho sem criar o chamado: mesmas regras de /api/create-ticket-complete,
+    sem GLPI nem settings. `field` (corpo ou query) restringe a um campo; todas as violações
+    encontradas são devolvidas, para o bot conferir cada slot ao preenchê-lo.
+    """
+    trace_id = str(uuid.uuid4())[:8]
+    compacto = modo_compacto()
+
+    def falha(mensagem, status=400, codigo="bad_request", **details):
+        if compacto:
+            return resposta_compacta(status=status, error=codigo, message=mensagem, trace_id=trace_id)
+        corpo = {"sucesso": False, "success": False, "error": mensagem, "erro": mensagem, "trace_id": trace_id}
+        if details:
+            corpo["details"] = details
+        return jsonify(corpo), status
+
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return falha("JSON deve ser um objeto")
+
+        campo = data.get("field") or data.get("campo") or request.args.get("field")
+        campos = None
+        if campo:
+            canonico = _CAMPO_POR_ALIAS.get(str(campo).strip())
+            if canonico is None:
+                return falha(f"Campo desconhecido: {campo}", accepted_fields=sorted(_CAMPO_POR_ALIAS))
+            campos = [canonico]
+
+        powerfx_fields = [f"{k}: {v}" for k, v in data.items() if is_powerfx_expression(v)]
+        violacoes = listar_violacoes(_campos_do_chamado(data), campos)
+        resultado = {"valid": not violacoes and not powerfx_fields, "violations": violacoes}
+        if campos:
+            resultado["field"] = campos[0]
+        if powerfx_fields:
+            resultado["unprocessed_fields"] = powerfx_fields
+        if compacto:
+            resultado["violations"] = [{k: v for k, v in item.items() if k != "erro"} for item in violacoes]
+            return resposta_compacta(resultado, trace_id=trace_id)
+        return jsonify({"sucesso": True, "success": True, "valido": resultado["valid"], **resultado,
+                        "trace_id": trace_id}), 200
+    except Exception as e:
+        logger.error(f"[{trace_id}] Erro ao validar chamado: {str(e)}")
+        return falha(str(e), 500, "internal_error")
+
+
 @tickets_bp.route("/create-ticket-complete", methods=["POST"])
 def create_ticket_complete():
     trace_id = str(uuid.uuid4())[:8]
@@ -110,59 +329,34 @@ def create_ticket_complete():
                 "trace_id": trace_id,
             }), 400
 
-        description = data.get('description') or data.get('descricao')
-        title = data.get('title') or data.get('titulo')
-        category = data.get('category') or data.get('categoria')
-        impact = data.get('impact') or data.get('impacto')
-        location = data.get('location') or data.get('localizacao')
-        contact_phone = data.get('contact_phone') or data.get('telefone_contato') or data.get('telefone')
+        rascunho = _campos_do_chamado(data)
+        description = rascunho['description']
+        title = rascunho['title']
+        category = rascunho['category']
+        impact = rascunho['impact']
+        location = rascunho['location']
+        contact_phone = rascunho['contact_phone']
         requester_email = data.get('requester_email') or data.get('email') or data.get('usuario_email')
+        contexto = obter_contexto(conversation_id_da_requisicao(data))
+        contexto_origem = "conversation"
+        if contexto is None:
+            claims = claims_da_requisicao(data)
+            if claims:
+                contexto = {"user_id": claims.get("sub"), "login": claims.get("login"),
+                            "email": claims.get("email"), "name": None}
+                contexto_origem = "assertion"
+        if contexto and not requester_email:
+            requester_email = contexto.get("email")
 
         glpi_category = mapear_categoria(category)
 
-        if not description:
-            return jsonify({"sucesso": False, "success": False, "error": "Campo 'description/descricao' é obrigatório", "erro": "Campo 'description/descricao' é obrigatório", "trace_id": trace_id}), 400
-
-        content_parts_validate = [description or ""]
-        if location:
-            content_parts_validate.append(f"Local: {location}")
-        if contact_phone:
-            content_parts_validate.append(f"Telefone: {contact_phone}")
-        if category:
-            content_parts_validate.append(f"Categoria: {category}")
-        full_content_validate = "\n\n".join(filter(None, content_parts_validate))
-        if len(full_content_validate.strip()) < 50:
-            return jsonify({
-                "sucesso": False,
-                "success": False,
-                "error": "Descrição muito curta",
-                "erro": "O conteúdo total do chamado está curto. Inclua mais detalhes.",
-                "details": {"current_length": len(full_content_validate.strip()), "required_length": 50},
-                "trace_id": trace_id,
-            }), 400
-
-        vague_words = ['problema', 'erro', 'não funciona', 'quebrado', 'ruim', 'lento', 'travando', 'bug']
-        description_lower = description.lower()
-        found_vague_words = [word for word in vague_words if word in description_lower]
-        if found_vague_words and len(full_content_validate.strip()) < 100:
-            return jsonify({
-                "sucesso": False,
-                "success": False,
-                "error": "Descrição muito vaga",
-                "erro": "Por favor, seja mais específico.",
-                "trace_id": trace_id,
-            }), 400
-
-        if not contact_phone or len(contact_phone.strip()) < 8:
-            return jsonify({"sucesso": False, "success": False, "error": "Telefone inválido", "erro": "Telefone inválido", "trace_id": trace_id}), 400
-        if not title:
-            return jsonify({"sucesso": False, "success": False, "error": "Campo 'title/titulo' é obrigatório", "erro": "Campo 'title/titulo' é obrigatório", "trace_id": trace_id}), 400
-        if not category:
-            return jsonify({"sucesso": False, "success": False, "error": "Campo 'category/categoria' é obrigatório", "erro": "Campo 'category/categoria' é obrigatório", "trace_id": trace_id}), 400
-        if not impact:
-            return jsonify({"sucesso": False, "success": False, "error": "Campo 'impact/impacto' é obrigatório", "erro": "Campo 'impact/impacto' é obrigatório", "trace_id": trace_id}), 400
-        if not location or len(location.strip()) < 3:
-            return jsonify({"sucesso": False, "success": False, "error": "Localização inválida", "erro": "Localização inválida", "trace_id": trace_id}), 400
+        violacao = validar_chamado(description, title, category, impact, location, contact_phone)
+        if violacao:
+            return jsonify({"sucesso": False, "success": False, **violacao, "trace_id": trace_id}), 400
+        # Validado: só texto ou número; números (telefone, por exemplo) seguem como texto
+        description, title, location, contact_phone = (
+            v if v is None or isinstance(v, str) else str(v) for v in (description, title, location, contact_phone)
+        )
 
         settings = load_settings()
         if not all([settings.glpi_url, settings.glpi_app_token, settings.glpi_user_token]):
@@ -186,16 +380,45 @@ def create_ticket_complete():
         }
 
         requester_lookup = None
-        if requester_email:
+        requester_source = None
+        if _mesmo_requerente(contexto, requester_email):
+            # Identidade resolvida na autenticação desta conversa: sem nova busca no GLPI
+            requester_lookup = {"found": True, **contexto}
+            requester_source = contexto_origem
+            normalized_data["users_id_recipient"] = contexto["user_id"]
+            normalized_data["users_id_requester"] = contexto["user_id"]
+        elif requester_email:
+            requester_source = "lookup"
             try:
-                requester_lookup = buscar_usuario_por_email(requester_email)
+                requester_lookup = buscar_usuario_por_email(requester_email, incluir_raw=False)
                 if requester_lookup.get("found") and requester_lookup.get("user_id"):
                     normalized_data["users_id_recipient"] = requester_lookup["user_id"]
                     normalized_data["users_id_requester"] = requester_lookup["user_id"]
             except Exception:
                 pass
 
+        # Mesma reclamação do mesmo requerente e local há pouco: sinalizar ou devolver o chamado existente
+        indice = obter_indice(settings)
+        duplicata = None
+        requerente = requerente_do_chamado(normalized_data)
+        texto = texto_do_chamado(title, description)
+        if indice is not None and not data.get("allow_duplicate"):
+            duplicata = indice.procurar(requerente, location, texto)
+        if duplicata and settings.duplicate_mode == "return":
+            return jsonify({
+                "sucesso": True,
+                "success": True,
+                "message": f"Já existe o chamado #{duplicata['ticket_id']} com o mesmo problema, aberto há pouco.",
+                "ticket_id": duplicata["ticket_id"],
+                "duplicate": True,
+                "duplicate_of": duplicata,
+                "trace_id": trace_id,
+                "categoria": category,
+            }), 200
+
         ticket_id = criar_ticket_glpi(normalized_data)
+        if indice is not None:
+            indice.registrar(requerente, location, texto, ticket_id, title)
 
         response_data = {
             "sucesso": True,
@@ -215,10 +438,15 @@ def create_ticket_complete():
                     "user_id": requester_lookup.get("user_id") if requester_lookup else None,
                     "name": requester_lookup.get("name") if requester_lookup else None,
                     "login": requester_lookup.get("login") if requester_lookup else None,
+                    "source": requester_source,
                 } if requester_email else None,
             },
         }
+        if duplicata:
+            response_data["possible_duplicate_of"] = duplicata
         return jsonify(response_data), 201
+    except GlpiSobrecarregado:
+        raise  # 503 pelo handler da app
     except Exception as e:
         return jsonify({"sucesso": False, "success": False, "error": str(e), "erro": str(e), "trace_id": trace_id}), 500
 
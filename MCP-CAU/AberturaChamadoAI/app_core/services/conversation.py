@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import secrets
+from typing import Any, Dict
+from flask import request
+from ..config import load_settings
+from ..utils.cache import TTLCache
+
+
+# conversation_id -> identidade resolvida na autenticação (LRU limitado; TTL de CONVERSATION_CONTEXT_TTL)
+_contextos = TTLCache(maxsize=5000, ttl=900.0)
+
+_CAMPOS_IDENTIDADE = ("login", "user_id", "email", "name")
+
+
+def salvar_contexto(identidade: Dict[str, Any]) -> str | None:
+    """
+    Guarda a identidade resolvida (login, user_id, email, name) e devolve um conversation_id
+    aleatório (não adivinhável) para as chamadas seguintes da mesma conversa.
+    None quando o contexto está desativado (CONVERSATION_CONTEXT_TTL=0).
+    """
+    ttl = load_settings().conversation_context_ttl
+    if ttl <= 0:
+        return None
+    conversation_id = secrets.token_urlsafe(16)
+    _contextos.set(conversation_id, {k: identidade.get(k) for k in _CAMPOS_IDENTIDADE}, ttl)
+    return conversation_id
+
+
+def obter_contexto(conversation_id: str | None) -> Dict[str, Any] | None:
+    if not conversation_id or load_settings().conversation_context_ttl <= 0:
+        return None
+    contexto = _contextos.get(str(conversation_id).strip())
+    return dict(contexto) if contexto else None
+
+
+def conversation_id_da_requisicao(data: Dict[str, Any] | None = None) -> str | None:
+    """conversation_id do corpo JSON ou do header X-Conversation-Id."""
+    if isinstance(data, dict):
+        valor = data.get("conversation_id") or data.get("id_conversa")
+        if valor and isinstance(valor, str):
+            return valor.strip() or None
+    return (request.headers.get("X-Conversation-Id") or "").strip() or None
+
+
+def limpar_contextos() -> None:
+    _contextos.clear()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+import heapq
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Tuple
+from ..config import Settings, load_settings
+from ..utils.text import normalizar_texto
+
+
+# Shingles de caracteres: robustos a flexões ("imprime"/"imprimindo") em textos curtos
+SHINGLE_SIZE = 4
+# Tamanho do esboço bottom-k (MinHash com uma única função de hash)
+SKETCH_SIZE = 64
+# Pares (requerente, local) mantidos; os menos recentes saem primeiro
+_MAX_BUCKETS = 10000
+
+Sketch = frozenset
+
+
+def esboco(texto: str) -> Sketch:
+    """Menores `SKETCH_SIZE` hashes dos shingles do texto normalizado."""
+    normalizado = normalizar_texto(texto)
+    if len(normalizado) <= SHINGLE_SIZE:
+        shingles = {normalizado} if normalizado else set()
+    else:
+        shingles = {normalizado[i:i + SHINGLE_SIZE] for i in range(len(normalizado) - SHINGLE_SIZE + 1)}
+    return frozenset(heapq.nsmallest(SKETCH_SIZE, {hash(s) for s in shingles}))
+
+
+def similaridade(a: Sketch, b: Sketch) -> float:
+    """Estimativa de Jaccard entre dois esboços bottom-k (exata quando os textos são curtos)."""
+    comuns = a & b
+    if not comuns:
+        return 0.0
+    uniao = a | b
+    if len(uniao) <= SKETCH_SIZE:
+        return len(comuns) / len(uniao)
+    # Entre os k menores hashes da união, a fração presente nos dois esboços
+    limite = sorted(uniao)[SKETCH_SIZE - 1]
+    return sum(1 for h in comuns if h <= limite) / SKETCH_SIZE
+
+
+class _Entrada:
+    __slots__ = ("created_at", "ticket_id", "sketch", "title")
+
+    def __init__(self, created_at: float, ticket_id: int, sketch: Sketch, title: str | None):
+        self.created_at = created_at
+        self.ticket_id = ticket_id
+        self.sketch = sketch
+        self.title = title
+
+
+class IndiceDuplicatas:
+    """
+    Chamados recentes por (requerente, local), para detectar reenvios da mesma reclamação.
+
+    - Conteúdo (título + descrição) vira um esboço MinHash bottom-k de shingles de caracteres.
+    - Entradas mais velhas que `window` segundos saem na próxima consulta do mesmo par;
+      o número de pares é limitado (LRU).
+    - Consulta compara só com o punhado de chamados do par: bem abaixo de 1ms.
+    """
+
+    def __init__(self, window: float = 600.0, threshold: float = 0.5):
+        self.window = window
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[Tuple[str, str], Deque[_Entrada]]" = OrderedDict()
+        self.checks = 0
+        self.hits = 0
+
+    @staticmethod
+    def chave(requester: Any, location: str | None) -> Tuple[str, str] | None:
+        if requester is None or requester == "":
+            return None
+        return str(requester).strip().lower(), normalizar_texto(location)
+
+    def _bucket(self, key: Tuple[str, str], now: float) -> Deque[_Entrada] | None:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return None
+        while bucket and now - bucket[0].created_at > self.window:
+            bucket.popleft()
+        if not bucket:
+            del self._buckets[key]
+            return None
+        self._buckets.move_to_end(key)
+        return bucket
+
+    def procurar(self, requester: Any, location: str | None, texto: str) -> Dict[str, Any] | None:
+        """Chamado recente mais parecido acima do limiar: {"ticket_id", "similarity", "age_s", "title"}."""
+        key = self.chave(requester, location)
+        if key is None:
+            return None
+        sketch = esboco(texto)
+        now = time.monotonic()
+        with self._lock:
+            self.checks += 1
+            bucket = self._bucket(key, now)
+            if bucket is None:
+                return None
+            melhor, melhor_sim = None, 0.0
+            for entrada in bucket:
+                sim = similaridade(sketch, entrada.sketch)
+                if sim >= self.threshold and sim > melhor_sim:
+                    melhor, melhor_sim = entrada, sim
+            if melhor is None:
+                return None
+            self.hits += 1
+            return {"ticket_id": melhor.ticket_id, "similarity": round(melhor_sim, 3),
+                    "age_s": round(now - melhor.created_at, 1), "title": melhor.title}
+
+    def registrar(self, requester: Any, location: str | None, texto: str, ticket_id: int,
+                  title: str | None = None) -> None:
+        key = self.chave(requester, location)
+        if key is None:
+            return
+        entrada = _Entrada(time.monotonic(), ticket_id, esboco(texto), title)
+        with self._lock:
+            bucket = self._bucket(key, entrada.created_at)
+            if bucket is None:
+                bucket = self._buckets[key] = deque()
+            bucket.append(entrada)
+            while len(self._buckets) > _MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"window_s": self.window, "threshold": self.threshold, "buckets": len(self._buckets),
+                    "tickets": sum(len(b) for b in self._buckets.values()),
+                    "checks": self.checks, "hits": self.hits}
+
+
+_indice: IndiceDuplicatas | None = None
+_indice_lock = threading.Lock()
+
+
+def obter_indice(settings: Settings | None = None) -> IndiceDuplicatas | None:
+    """Índice do processo; None com DUPLICATE_MODE=off."""
+    global _indice
+    settings = settings or load_settings()
+    if settings.duplicate_mode not in ("flag", "return"):
+        return None
+    with _indice_lock:
+        if _indice is None:
+            _indice = IndiceDuplicatas(settings.duplicate_window, settings.duplicate_threshold)
+        _indice.window = settings.duplicate_window
+        _indice.threshold = settings.duplicate_threshold
+        return _indice
+
+
+def texto_do_chamado(title: str | None, description: str | None) -> str:
+    return " ".join(p for p in (title, description) if p)
+
+
+def requerente_do_chamado(dados: Dict[str, Any]) -> Any:
+    """Identifica o requerente pelo id do GLPI ou, sem ele, pelo e-mail informado."""
+    return dados.get("users_id_requester") or (dados.get("requester_email") or "").strip().lower() or None
+
+
+def limpar_indice() -> None:
+    global _indice
+    with _indice_lock:
+        _indice = None
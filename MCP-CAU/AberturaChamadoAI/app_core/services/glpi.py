@@ -1,14 +1,44 @@
 # -*- coding: utf-8 -*-
 import logging
 import json as _json
-from typing import Any, Dict
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, TypeVar
 import requests
 from ..config import load_settings
 from ..domain.mappings import IMPACT_MAP, URGENCY_MAP, CATEGORY_MAP
+from ..utils.cache import TTLCache
+from .glpi_db import obter_backend_sql
+from .glpi_http import (
+    PRIORIDADE_BACKGROUND, PRIORIDADE_INTERATIVA, PRIORIDADE_URGENTE, glpi_request, prioridade_glpi,
+)
+from .glpi_schema import MULTIVALUE_SEPARATOR, ColumnProjector, UsuarioGLPI, obter_projetor
 
 
 logger = logging.getLogger(__name__)
 
+# Registros de usuário (lookup por e-mail) já resolvidos; TTL vem de USER_CACHE_TTL
+_user_cache = TTLCache(maxsize=2048, ttl=300.0)
+
+
+
+def _encerrar_sessao_descartada(_url: Any, headers: Dict[str, str]) -> None:
+    # killSession em background: a requisição que encontrou a sessão expirada não espera por ele
+    def encerrar():
+        with prioridade_glpi(PRIORIDADE_BACKGROUND):
+            encerrar_sessao_glpi(headers, timeout=5)
+    threading.Thread(target=encerrar, name="glpi-kill-session", daemon=True).start()
+
+
+# Sessão de serviço (user_token) reaproveitada entre requisições; TTL vem de GLPI_SESSION_TTL.
+# Sessões que expiram ou são descartadas do cache recebem killSession em vez de vazar no GLPI
+_service_sessions = TTLCache(maxsize=4, ttl=600.0, on_evict=_encerrar_sessao_descartada)
+
+T = TypeVar("T")
+
+
+class SessaoExpiradaGLPI(RuntimeError):
+    """O GLPI recusou o Session-Token (401): sessão expirada ou encerrada do lado do servidor."""
+
 
 def mapear_categoria(category_user_friendly):
     if not category_user_friendly:
@@ -22,7 +52,19 @@ def mapear_categoria(category_user_friendly):
     return CATEGORY_MAP["OUTROS"]["glpi_category_id"]
 
 
-def autenticar_glpi() -> Dict[str, str]:
+def calcular_prioridade(impact_input: Any, urgency_input: Any = None) -> Tuple[int, int, int]:
+    """Converte impacto/urgência amigáveis em (impact, urgency, priority) do GLPI."""
+    impact_raw = (impact_input or "MEDIO").upper()
+    # Se urgência não for fornecida, usar o mesmo nível do impacto
+    urgency_raw = (urgency_input or impact_raw or "MEDIA").upper()
+    # Defaults alinhados com GLPI (Média)
+    impact = IMPACT_MAP.get(impact_raw, 3)
+    urgency = URGENCY_MAP.get(urgency_raw, 3)
+    # Prioridade como o maior entre impacto e urgência
+    return impact, urgency, max(impact, urgency)
+
+
+def autenticar_glpi(timeout: float = 10) -> Dict[str, str]:
     settings = load_settings()
     headers = {
         "App-Token": settings.glpi_app_token or "",
@@ -30,10 +72,10 @@ def autenticar_glpi() -> Dict[str, str]:
         "Content-Type": "application/json",
     }
     try:
-        response = requests.post(
-            f"{settings.glpi_url}/initSession",
+        response = glpi_request(
+            "POST", "/initSession", "write",
             headers=headers,
-            timeout=10,
+            timeout=timeout,
         )
         response.raise_for_status()
         data = response.json()
@@ -50,6 +92,75 @@ def autenticar_glpi() -> Dict[str, str]:
         raise
 
 
+def encerrar_sessao_glpi(headers: Dict[str, str], timeout: float = 10) -> bool:
+    """
+    Encerra (killSession) uma sessão aberta por autenticar_glpi.
+
+    Retorna True se o GLPI confirmou o encerramento; falhas são apenas logadas,
+    pois o encerramento é uma limpeza e não deve interromper o fluxo chamador.
+    """
+    try:
+        response = glpi_request("POST", "/killSession", "write", headers=headers, timeout=timeout)
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        logger.warning(f"Falha ao encerrar sessão GLPI: {str(e)}")
+        return False
+
+
+def sessao_servico() -> Dict[str, str]:
+    """
+    Headers da sessão de serviço em cache (abre uma nova via initSession quando expirada).
+
+    Requisições concorrentes sem sessão em cache esperam um único initSession.
+    """
+    settings = load_settings()
+    return _service_sessions.get_or_load(settings.glpi_url, autenticar_glpi, settings.glpi_session_ttl)
+
+
+def invalidar_sessao_servico() -> None:
+    _service_sessions.pop(load_settings().glpi_url)
+
+
+def encerrar_sessao_servico() -> bool:
+    """killSession da sessão de serviço em cache (encerramento do processo); False se não havia."""
+    headers = _service_sessions.pop(load_settings().glpi_url)
+    if headers is None:
+        return False
+    return encerrar_sessao_glpi(headers, timeout=5)
+
+
+def _sessao_recusada(e: Exception) -> bool:
+    if isinstance(e, SessaoExpiradaGLPI):
+        return True
+    response = getattr(e, "response", None)
+    return isinstance(e, requests.HTTPError) and response is not None and response.status_code == 401
+
+
+def com_sessao_servico(operacao: Callable[[Dict[str, str]], T]) -> T:
+    """
+    Executa `operacao(headers)` com a sessão de serviço.
+
+    - Com GLPI_SESSION_TTL > 0 a sessão é compartilhada; um 401 a invalida e a operação
+      é repetida uma vez com sessão nova.
+    - Com GLPI_SESSION_TTL = 0 abre uma sessão só para esta operação e a encerra ao final.
+    """
+    if load_settings().glpi_session_ttl <= 0:
+        headers = autenticar_glpi()
+        try:
+            return operacao(headers)
+        finally:
+            encerrar_sessao_glpi(headers)
+    try:
+        return operacao(sessao_servico())
+    except Exception as e:
+        if not _sessao_recusada(e):
+            raise
+        logger.info("Sessão de serviço GLPI recusada (401); renovando")
+        invalidar_sessao_servico()
+        return operacao(sessao_servico())
+
+
 def autenticar_usuario_por_credenciais(login: str, password: str, totp_code: str | None = None) -> Dict[str, Any]:
     """
     Inicia uma sessão no GLPI usando login/senha do usuário, obtém o glpiID ativo,
@@ -74,7 +185,7 @@ def autenticar_usuario_por_credenciais(login: str, password: str, totp_code: str
         payload["code"] = totp_code
 
     # 1) initSession
-    resp = requests.post(f"{settings.glpi_url}/initSession", json=payload, headers=headers, timeout=15)
+    resp = glpi_request("POST", "/initSession", "write", json=payload, headers=headers, timeout=15)
     # Tratar explicitamente falhas de autenticação como estado estruturado
     if resp.status_code == 401:
         reason = None
@@ -106,7 +217,7 @@ def autenticar_usuario_por_credenciais(login: str, password: str, totp_code: str
     # 2) getFullSession -> glpiID
     uid: Any = None
     try:
-        s = requests.get(f"{settings.glpi_url}/getFullSession", headers=session_headers, timeout=10)
+        s = glpi_request("GET", "/getFullSession", "read", headers=session_headers, timeout=10)
         if s.ok:
             sdata = s.json()
             uid = sdata.get("glpiID")
@@ -117,7 +228,15 @@ def autenticar_usuario_por_credenciais(login: str, password: str, totp_code: str
     user_name = None
     user_email = None
     try:
-        res_busca = buscar_usuario_glpi(login=login, headers=session_headers)
+        res_busca = None
+        backend = _backend_sql()
+        if backend is not None:
+            try:
+                res_busca = backend.buscar(login=login)
+            except Exception as e:
+                logger.warning(f"Busca de usuário no banco falhou ({str(e)}); usando REST")
+        if res_busca is None:
+            res_busca = buscar_usuario_glpi(login=login, headers=session_headers)
         if res_busca.get("found") and isinstance(res_busca.get("user"), dict):
             info = res_busca["user"]
             user_name = info.get("name")
@@ -131,10 +250,10 @@ def autenticar_usuario_por_credenciais(login: str, password: str, totp_code: str
     # 4) Encerrar sessão
     logout_verified = False
     try:
-        k = requests.post(f"{settings.glpi_url}/killSession", headers=session_headers, timeout=10)
+        k = glpi_request("POST", "/killSession", "write", headers=session_headers, timeout=10)
         k.raise_for_status()
         # Verificar se token foi invalidado
-        chk = requests.get(f"{settings.glpi_url}/getFullSession", headers=session_headers, timeout=8)
+        chk = glpi_request("GET", "/getFullSession", "read", headers=session_headers, timeout=8)
         logout_verified = (chk.status_code == 401) or (not chk.ok)
     except Exception:
         logout_verified = False
@@ -149,43 +268,178 @@ def autenticar_usuario_por_credenciais(login: str, password: str, totp_code: str
     }
 
 
-def buscar_usuario_por_email(email: str) -> Dict[str, Any]:
+def _backend_sql():
+    try:
+        return obter_backend_sql(load_settings())
+    except Exception as e:
+        logger.warning(f"Backend SQL de usuários indisponível ({str(e)}); usando REST")
+        return None
+
+
+def buscar_usuario(login: str | None = None, email: str | None = None) -> Dict[str, Any]:
+    """
+    Busca de usuário pelo backend configurado (USER_LOOKUP_BACKEND), com a mesma saída de
+    buscar_usuario_glpi. O backend SQL faz só match exato; erro no banco cai para o REST.
+    """
+    backend = _backend_sql()
+    if backend is not None:
+        try:
+            return backend.buscar(login=login, email=email)
+        except Exception as e:
+            logger.warning(f"Busca de usuário no banco falhou ({str(e)}); usando REST")
+    return com_sessao_servico(lambda headers: buscar_usuario_glpi(login=login, email=email, headers=headers))
+
+
+def buscar_usuario_por_email(email: str, incluir_raw: bool = True) -> Dict[str, Any]:
     if not email or not isinstance(email, str):
         raise ValueError("E-mail inválido para busca no GLPI")
 
     try:
-        headers = autenticar_glpi()
         email_normalizado = email.strip()
-        res = buscar_usuario_glpi(email=email_normalizado, headers=headers)
+        res = buscar_usuario(email=email_normalizado)
         user_info = res.get("user") if isinstance(res.get("user"), dict) else None
         found = bool(user_info and user_info.get("id"))
-        return {
+        result = {
             "found": found,
             "user_id": user_info.get("id") if user_info else None,
             "name": user_info.get("name") if user_info else None,
+            "display_name": user_info.get("display_name") if user_info else None,
             "login": user_info.get("login") if user_info else None,
             "email": user_info.get("email") if user_info else email_normalizado,
-            "raw": res.get("raw"),
         }
+        if incluir_raw:
+            result["raw"] = res.get("raw")
+            result["search"] = res.get("search")
+        return result
     except Exception as e:
         logger.error(f"Erro ao buscar usuário por e-mail no GLPI: {str(e)}")
         raise
 
 
+def buscar_usuario_por_email_cacheado(email: str) -> Dict[str, Any]:
+    """
+    buscar_usuario_por_email com cache dos usuários encontrados (USER_CACHE_TTL; 0 desativa).
+    Não encontrados não são guardados, para que um usuário recém-criado apareça na hora.
+    """
+    settings = load_settings()
+    if settings.user_cache_ttl <= 0 or not isinstance(email, str):
+        return buscar_usuario_por_email(email)
+    key = (settings.glpi_url, email.strip().lower())
+    cached = _user_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    result = buscar_usuario_por_email(email)
+    if result.get("found"):
+        _user_cache.set(key, result, settings.user_cache_ttl)
+    return dict(result)
+
+
+def limpar_cache_usuarios() -> None:
+    _user_cache.clear()
+
+
+def normalizar_emails(emails: Iterable[Any]) -> Tuple[List[str], List[Any]]:
+    """Normaliza (trim + minúsculas) e deduplica preservando a ordem; devolve (válidos, inválidos)."""
+    validos: List[str] = []
+    vistos = set()
+    invalidos: List[Any] = []
+    for item in emails:
+        email = item.strip().lower() if isinstance(item, str) else ""
+        if not email or "@" not in email or " " in email:
+            invalidos.append(item)
+            continue
+        if email not in vistos:
+            vistos.add(email)
+            validos.append(email)
+    return validos, invalidos
+
+
+def _resultado_email(usuario: UsuarioGLPI | None, email: str) -> Dict[str, Any]:
+    # Mesmo formato de buscar_usuario_por_email (sem raw/search)
+    return {
+        "found": bool(usuario and usuario.id),
+        "user_id": usuario.id if usuario else None,
+        "name": usuario.name if usuario else None,
+        "display_name": usuario.display_name if usuario else None,
+        "login": usuario.login if usuario else None,
+        "email": (usuario.email if usuario else None) or email,
+    }
+
+
+def buscar_usuarios_por_emails(emails: List[str], headers: Dict[str, str] | None = None,
+                               chunk_size: int | None = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolve vários e-mails (já normalizados) numa única sessão do GLPI.
+
+    - Usuários em cache (USER_CACHE_TTL) não vão ao GLPI.
+    - Os demais são buscados em lotes de `chunk_size` critérios `equals` ligados por OR;
+      cada linha devolvida é distribuída entre os e-mails do lote que ela contém.
+    - Sem `headers`, usa o backend SQL (se configurado) ou a sessão de serviço para o lote inteiro.
+    Retorna {email: resultado} na ordem de entrada, com found=False para os não encontrados.
+    """
+    settings = load_settings()
+    chunk_size = max(1, chunk_size or settings.batch_lookup_chunk_size)
+    resultados: Dict[str, Dict[str, Any]] = {}
+    pendentes: List[str] = []
+    for email in emails:
+        cached = _user_cache.get((settings.glpi_url, email)) if settings.user_cache_ttl > 0 else None
+        if cached is not None:
+            resultados[email] = {k: v for k, v in cached.items() if k not in ("raw", "search")}
+        else:
+            pendentes.append(email)
+
+    if pendentes:
+        encontrados = None
+        backend = _backend_sql() if headers is None else None
+        if backend is not None:
+            try:
+                usuarios = backend.buscar_por_emails(pendentes, chunk_size)
+                encontrados = {email: _resultado_email(u, email) for email, u in usuarios.items()}
+            except Exception as e:
+                logger.warning(f"Busca em lote no banco falhou ({str(e)}); usando REST")
+        if encontrados is None and headers is None:
+            encontrados = com_sessao_servico(lambda h: _buscar_lotes_emails(pendentes, h, chunk_size))
+        elif encontrados is None:
+            encontrados = _buscar_lotes_emails(pendentes, headers, chunk_size)
+        resultados.update(encontrados)
+
+        for email in pendentes:
+            resultado = resultados.get(email)
+            if resultado is None:
+                resultados[email] = _resultado_email(None, email)
+            elif resultado["found"] and settings.user_cache_ttl > 0:
+                _user_cache.set((settings.glpi_url, email), resultado, settings.user_cache_ttl)
+
+    return {email: resultados[email] for email in emails}
+
+
+def _buscar_lotes_emails(emails: List[str], headers: Dict[str, str], chunk_size: int) -> Dict[str, Dict[str, Any]]:
+    projetor = obter_projetor("User", headers)
+    campo = projetor.field_id("email")
+    resultados: Dict[str, Dict[str, Any]] = {}
+    for i in range(0, len(emails), chunk_size):
+        lote = emails[i:i + chunk_size]
+        alvos = set(lote)
+        criteria = [{"field": campo, "searchtype": "equals", "value": email} for email in lote]
+        for crit in criteria[1:]:
+            crit["link"] = "OR"
+        # Um usuário por e-mail no caso normal; folga para e-mails repetidos entre usuários
+        linhas = iterar_busca_glpi("User", criteria, headers, projetor.forcedisplay,
+                                   page_size=len(lote), max_rows=2 * len(lote))
+        for row in linhas:
+            if not isinstance(row, dict):
+                continue
+            for valor in projetor.values(row, "email"):
+                email = valor.strip().lower()
+                if email in alvos and email not in resultados:
+                    resultados[email] = _resultado_email(projetor.project(row, email=email), email)
+    return resultados
+
+
 def criar_ticket_glpi(dados: Dict[str, Any]) -> int:
     logger.info("=== INICIANDO CRIAÇÃO DE TICKET NO GLPI ===")
-    settings = load_settings()
-    headers = autenticar_glpi()
 
-    impact_raw = (dados.get("impact", "MEDIO") or "MEDIO").upper()
-    # Se urgência não for fornecida, usar o mesmo nível do impacto
-    urgency_input = dados.get("urgency")
-    urgency_raw = (urgency_input or impact_raw or "MEDIA").upper()
-    # Defaults alinhados com GLPI (Média)
-    impact = IMPACT_MAP.get(impact_raw, 3)
-    urgency = URGENCY_MAP.get(urgency_raw, 3)
-    # Prioridade como o maior entre impacto e urgência
-    priority = max(impact, urgency)
+    impact, urgency, priority = calcular_prioridade(dados.get("impact", "MEDIO"), dados.get("urgency"))
 
     category_raw = dados.get("category")
     category_id = mapear_categoria(category_raw)
@@ -220,16 +474,25 @@ def criar_ticket_glpi(dados: Dict[str, Any]) -> int:
     if requester_actor_id:
         payload["input"]["_users_id_requester"] = requester_actor_id
 
-    payload_json = _json.dumps(payload, ensure_ascii=False)
-    headers_with_charset = headers.copy()
-    headers_with_charset["Content-Type"] = "application/json; charset=utf-8"
+    payload_json = _json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+    def enviar(headers: Dict[str, str]):
+        headers_with_charset = headers.copy()
+        headers_with_charset["Content-Type"] = "application/json; charset=utf-8"
+        response = glpi_request(
+            "POST", "/Ticket", "write",
+            headers=headers_with_charset,
+            data=payload_json,
+            timeout=10,
+        )
+        if response.status_code == 401:
+            # Nada foi criado: seguro repetir com sessão nova
+            raise SessaoExpiradaGLPI(f"GLPI retornou status 401: {response.text}")
+        return response
 
-    response = requests.post(
-        f"{settings.glpi_url}/Ticket",
-        headers=headers_with_charset,
-        data=payload_json.encode('utf-8'),
-        timeout=10,
-    )
+    # CRITICO/MUITO_ALTO (prioridade 5 do GLPI) passam à frente na fila de chamadas ao GLPI
+    with prioridade_glpi(PRIORIDADE_URGENTE if priority >= 5 else PRIORIDADE_INTERATIVA):
+        response = com_sessao_servico(enviar)
 
     if response.status_code != 201:
         raise RuntimeError(f"GLPI retornou status {response.status_code}: {response.text}")
@@ -240,112 +503,180 @@ def criar_ticket_glpi(dados: Dict[str, Any]) -> int:
         raise RuntimeError("ID do ticket não retornado pelo GLPI")
     return ticket_id
 
+def selecionar_usuario(rows: Iterable[Any], projetor: ColumnProjector, campo: str, valor: str) -> UsuarioGLPI | None:
+    """
+    Escolhe a linha da busca /search/User que corresponde ao critério e a projeta
+    num UsuarioGLPI. Prefere match exato no campo lógico buscado (login/email);
+    senão, a primeira linha. Apenas a linha escolhida é projetada.
+
+    Aceita um gerador (ex.: iterar_busca_glpi): a iteração para no primeiro match exato,
+    então páginas seguintes nem chegam a ser pedidas ao GLPI.
+
+    Linhas posicionais (listas, sem ids de coluna) só são usadas se não houver nenhuma
+    linha em dicionário: a primeira vira (id, name, email, login), como antes.
+    """
+    alvo = valor.strip().lower()
+    key = projetor.key(campo)
+    selected = None
+    first = None
+    posicional = None
+    for row in rows:
+        if not isinstance(row, dict):
+            if posicional is None and isinstance(row, list):
+                posicional = row
+            continue
+        if first is None:
+            first = row
+        raw = row.get(key)
+        if raw is None:
+            continue
+        text = raw if isinstance(raw, str) else str(raw)
+        if MULTIVALUE_SEPARATOR in text:
+            if any(v.strip().lower() == alvo for v in text.split(MULTIVALUE_SEPARATOR)):
+                selected = row
+                break
+        elif text.strip().lower() == alvo:
+            selected = row
+            break
+    item = selected or first
+    if item is None:
+        return _usuario_posicional(posicional) if posicional is not None else None
+    return projetor.project(item, email=valor if campo == "email" else None)
+
+
+def _usuario_posicional(item: List[Any]) -> UsuarioGLPI:
+    def _pos(i):
+        return item[i] if len(item) > i else None
+
+    return UsuarioGLPI(id=_pos(0), name=_pos(1), email=_pos(2), login=_pos(3))
+
+
+def _criteria_params(criteria: List[Dict[str, Any]]) -> Dict[str, Any]:
+    params: Dict[str, Any] = {}
+    for i, crit in enumerate(criteria):
+        for k, v in crit.items():
+            params[f"criteria[{i}][{k}]"] = v
+    return params
+
+
+def iterar_busca_glpi(
+    itemtype: str,
+    criteria: List[Dict[str, Any]],
+    headers: Dict[str, str],
+    forcedisplay: Dict[str, Any],
+    page_size: int | None = None,
+    max_rows: int | None = None,
+    meta: Dict[str, Any] | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Gera as linhas de /search/<itemtype> página a página (parâmetro `range`).
+
+    - Cada página é pedida só com as colunas de `forcedisplay` e descartada após consumida,
+      então a memória fica limitada a uma página, por mais ampla que seja a busca.
+    - Para ao atingir `max_rows`, o totalcount do GLPI ou uma página incompleta; se o
+      consumidor interromper a iteração, nenhuma página adicional é pedida.
+    - `meta` (opcional) recebe totalcount, pages, rows consumidas e `page`, o JSON da última
+      página lida (só uma fica retida).
+    """
+    settings = load_settings()
+    page_size = max(1, page_size or settings.glpi_search_page_size)
+    max_rows = max(1, max_rows or settings.glpi_search_max_rows)
+    path = f"/search/{itemtype}"
+    base_params = {**forcedisplay, **_criteria_params(criteria)}
+    info = meta if meta is not None else {}
+    info.update({"totalcount": None, "pages": 0, "rows": 0})
+
+    start = 0
+    while start < max_rows:
+        end = min(start + page_size, max_rows) - 1
+        resp = glpi_request("GET", path, "read", headers=headers, params={**base_params, "range": f"{start}-{end}"},
+                            timeout=10)
+        resp.raise_for_status()
+        page = resp.json()
+        info["pages"] += 1
+        rows = []
+        if isinstance(page, dict):
+            info["totalcount"] = page.get("totalcount", info["totalcount"])
+            rows = page.get("data") or page.get("rows") or []
+        info["page"] = page
+        for row in rows:
+            info["rows"] += 1
+            yield row
+        total = info["totalcount"]
+        if len(rows) < end - start + 1 or (isinstance(total, int) and end + 1 >= total):
+            return
+        start = end + 1
+
+
+def iterar_usuarios_glpi(
+    criteria: List[Dict[str, Any]],
+    headers: Dict[str, str],
+    projetor: ColumnProjector | None = None,
+    page_size: int | None = None,
+    max_rows: int | None = None,
+) -> Iterator[UsuarioGLPI]:
+    """Versão tipada de iterar_busca_glpi para User (um UsuarioGLPI por linha)."""
+    projetor = projetor or obter_projetor("User", headers)
+    for row in iterar_busca_glpi("User", criteria, headers, projetor.forcedisplay, page_size, max_rows):
+        if isinstance(row, dict):
+            yield projetor.project(row)
+
+
 def buscar_usuario_glpi(login: str | None = None, email: str | None = None, headers: Dict[str, str] | None = None) -> Dict[str, Any]:
     """
     Busca usuário no GLPI por login ou e-mail usando o endpoint /search/User.
 
     - Tenta match exato (equals) e, se necessário, match parcial (contains).
-    - Retorna estrutura padronizada com id, name, login, email e o JSON bruto.
-    - Pode reutilizar um cabeçalho de sessão já autenticado (headers) ou autenticará automaticamente.
+    - Colunas resolvidas via listSearchOptions/User (cache com TTL), não por ids fixos.
+    - Resultados lidos em páginas (GLPI_SEARCH_PAGE_SIZE) até GLPI_SEARCH_MAX_ROWS,
+      parando no primeiro match exato.
+    - Retorna estrutura padronizada com id, name, login, email; `raw` é o JSON do GLPI da
+      página em que o usuário foi encontrado (como a resposta de /search/User) e `search`
+      resume a busca (searchtype, totalcount, rows_read, pages).
+    - Pode reutilizar um cabeçalho de sessão já autenticado (headers); sem ele, usa a sessão de serviço.
     """
     if not login and not email:
         raise ValueError("Informe ao menos 'login' ou 'email' para busca no GLPI")
 
-    settings = load_settings()
     if headers is None:
-        headers = autenticar_glpi()
+        return com_sessao_servico(lambda h: buscar_usuario_glpi(login=login, email=email, headers=h))
 
-    url_search = f"{settings.glpi_url}/search/User"
+    projetor = obter_projetor("User", headers)
 
-    def _extract_rows(data_obj: Any) -> list:
-        if isinstance(data_obj, dict):
-            if isinstance(data_obj.get("data"), list):
-                return data_obj.get("data")
-            if isinstance(data_obj.get("rows"), list):
-                return data_obj.get("rows")
-        return []
-
-    # Define campo e valor de busca
+    # Define campo e valor de busca (ids vindos do schema do GLPI)
     if email:
-        campo = 5  # email
+        campo = "email"
         valor = email.strip()
     else:
-        campo = 1  # login
+        campo = "login"
         valor = str(login).strip()
 
-    base_forcedisplay = {
-        "forcedisplay[0]": 1,
-        "forcedisplay[1]": 2,
-        "forcedisplay[2]": 5,
-        "forcedisplay[3]": 9,
-    }
-
-    params_equals = {
-        **base_forcedisplay,
-        "criteria[0][field]": campo,
-        "criteria[0][searchtype]": "equals",
-        "criteria[0][value]": valor,
-    }
-    params_contains = {
-        **base_forcedisplay,
-        "criteria[0][field]": campo,
-        "criteria[0][searchtype]": "contains",
-        "criteria[0][value]": valor,
-    }
-
     try:
-        resp = requests.get(url_search, headers=headers, params=params_equals, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        rows = _extract_rows(data)
-
-        # Se não encontrou nada, tenta contains
-        if not rows:
-            resp2 = requests.get(url_search, headers=headers, params=params_contains, timeout=10)
-            resp2.raise_for_status()
-            data2 = resp2.json()
-            rows = _extract_rows(data2)
-            if rows:
-                data = data2
-
-        selected = None
-        user_info = None
-        if rows:
-            # Preferir match exato por campo
-            if isinstance(rows[0], dict):
-                for row in rows:
-                    if not isinstance(row, dict):
-                        continue
-                    # chave 1 (login) ou 5 (email) conforme critério de busca
-                    chave = str(row.get(str(campo), "")).strip().lower()
-                    if chave == valor.strip().lower():
-                        selected = row
-                        break
-                if not selected:
-                    selected = rows[0]
-                item = selected
-                # Extrai campos padronizados
-                uid = item.get("id") or item.get("users_id") or item.get("2")
-                uname = item.get("name") or item.get("realname") or item.get("1") or item.get("9")
-                ulogin = item.get("login") or item.get("user_name") or item.get("9") or item.get("1")
-                uemail = item.get("email") or item.get("user_email") or item.get("5")
-                try:
-                    if isinstance(uid, str) and uid.isdigit():
-                        uid = int(uid)
-                except Exception:
-                    pass
-                user_info = {"id": uid, "name": uname, "login": ulogin, "email": uemail}
-            elif isinstance(rows[0], list):
-                item = rows[0]
-                user_info = {
-                    "id": item[0] if len(item) > 0 else None,
-                    "name": item[1] if len(item) > 1 else None,
-                    "email": item[2] if len(item) > 2 else None,
-                    "login": item[3] if len(item) > 3 else None,
-                }
-
+        usuario = None
+        raw = None
+        meta: Dict[str, Any] = {}
+        searchtype = "equals"
+        for searchtype in ("equals", "contains"):
+            criteria = [{"field": projetor.field_id(campo), "searchtype": searchtype, "value": valor}]
+            linhas = iterar_busca_glpi("User", criteria, headers, projetor.forcedisplay, meta=meta)
+            usuario = selecionar_usuario(linhas, projetor, campo, valor)
+            linhas.close()
+            # raw: página do equals, a menos que o contains tenha trazido linhas
+            if raw is None or meta.get("rows"):
+                raw = meta.get("page")
+            # Se não encontrou nada, tenta contains
+            if usuario is not None:
+                break
+
+        user_info = usuario.to_dict() if usuario else None
         found = bool(user_info and user_info.get("id"))
-        return {"found": found, "user": user_info, "raw": data}
+        search = {
+            "searchtype": searchtype,
+            "totalcount": meta.get("totalcount"),
+            "rows_read": meta.get("rows"),
+            "pages": meta.get("pages"),
+        }
+        return {"found": found, "user": user_info, "raw": raw, "search": search}
     except Exception as e:
         logger.error(f"Erro ao buscar usuário no GLPI: {str(e)}")
         raise
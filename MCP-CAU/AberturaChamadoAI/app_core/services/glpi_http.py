@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from ..config import Settings, load_settings
+
+
+logger = logging.getLogger(__name__)
+
+ROLES = ("primary", "read", "both")
+# Finalidade da chamada -> papéis de nó que a atendem
+_ROLES_FOR = {"write": ("primary", "both"), "read": ("read", "both")}
+
+# Peso da última medição na média móvel (EWMA) de latência por nó
+_EWMA_ALPHA = 0.3
+# Falhas rápidas (conexão recusada) não podem parecer o nó mais rápido
+_FAILURE_PENALTY_MS = 1000.0
+
+# Prioridade das chamadas ao GLPI (menor = antes): chamados CRITICO/MUITO_ALTO, depois o
+# trabalho interativo das requisições (auth, chamados, buscas) e por fim o de background
+# (prober, warm-up, atualizações de cache, sincronizações)
+PRIORIDADE_URGENTE = 0
+PRIORIDADE_INTERATIVA = 1
+PRIORIDADE_BACKGROUND = 2
+_NOMES_PRIORIDADE = {PRIORIDADE_URGENTE: "urgente", PRIORIDADE_INTERATIVA: "interativa",
+                     PRIORIDADE_BACKGROUND: "background"}
+_prioridade: contextvars.ContextVar[int] = contextvars.ContextVar("glpi_prioridade", default=PRIORIDADE_INTERATIVA)
+
+# Configuração do pool relida (load_settings lê o .env) no máximo a cada N segundos
+_POOL_RECHECK_S = 5.0
+
+
+class GlpiSobrecarregado(RuntimeError):
+    """Sem vaga para chamar o GLPI dentro de GLPI_OUTBOUND_MAX_WAIT; as rotas respondem 503."""
+
+
+@contextmanager
+def prioridade_glpi(nivel: int) -> Iterator[None]:
+    """Chamadas ao GLPI dentro do bloco (nesta thread/contexto) usam a prioridade `nivel`."""
+    token = _prioridade.set(nivel)
+    try:
+        yield
+    finally:
+        _prioridade.reset(token)
+
+
+def prioridade_atual() -> int:
+    """Prioridade das chamadas ao GLPI feitas agora, nesta thread/contexto."""
+    return _prioridade.get()
+
+
+class _GateWaiter:
+    __slots__ = ("priority", "enqueued_at", "event")
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.event = threading.Event()
+
+
+class PriorityGate:
+    """
+    Limita as chamadas simultâneas ao GLPI e, quando cheio, libera as vagas por prioridade.
+
+    - Prioridade efetiva = nível - segundos de espera x `aging_per_s`: trabalho de background
+      esperando há tempo suficiente empata com o interativo e não fica parado para sempre.
+    - Empate: quem chegou antes. A vaga é passada diretamente ao escolhido.
+    - Espera limitada a `max_wait` segundos (0 = sem limite): depois disso GlpiSobrecarregado,
+      em vez de segurar a thread da requisição indefinidamente.
+    """
+
+    def __init__(self, capacity: int, aging_per_s: float = 1.0, max_wait: float = 5.0):
+        self.capacity = max(1, int(capacity))
+        self.aging_per_s = max(0.0, float(aging_per_s))
+        self.max_wait = max(0.0, float(max_wait))
+        self._lock = threading.Lock()
+        self._waiters: List[_GateWaiter] = []
+        self.in_use = 0
+        self._stats = {nome: {"granted": 0, "waited": 0, "wait_total_ms": 0.0, "wait_max_ms": 0.0, "aged": 0,
+                              "timeouts": 0}
+                       for nome in _NOMES_PRIORIDADE.values()}
+
+    def acquire(self, priority: int) -> None:
+        with self._lock:
+            if self.in_use < self.capacity and not self._waiters:
+                self.in_use += 1
+                self._stats[_NOMES_PRIORIDADE[priority]]["granted"] += 1
+                return
+            waiter = _GateWaiter(priority)
+            self._waiters.append(waiter)
+        if waiter.event.wait(self.max_wait or None):
+            return
+        with self._lock:
+            # A vaga pode ter sido passada junto com o fim do prazo: então é nossa
+            if waiter.event.is_set():
+                return
+            self._waiters.remove(waiter)
+            self._stats[_NOMES_PRIORIDADE[priority]]["timeouts"] += 1
+        raise GlpiSobrecarregado(f"Sem vaga para chamar o GLPI em {self.max_wait:.1f}s "
+                                 f"({self.capacity} chamadas em andamento)")
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self.in_use -= 1
+                return
+            now = time.monotonic()
+            chosen = min(self._waiters,
+                         key=lambda w: (w.priority - (now - w.enqueued_at) * self.aging_per_s, w.enqueued_at))
+            self._waiters.remove(chosen)
+            stats = self._stats[_NOMES_PRIORIDADE[chosen.priority]]
+            wait_ms = (now - chosen.enqueued_at) * 1000
+            stats["granted"] += 1
+            stats["waited"] += 1
+            stats["wait_total_ms"] += wait_ms
+            stats["wait_max_ms"] = max(stats["wait_max_ms"], wait_ms)
+            if any(w.priority < chosen.priority for w in self._waiters):
+                stats["aged"] += 1  # passou à frente de nível mais urgente por envelhecimento
+            # Sinalizado sob o lock: quem desiste por prazo decide sob o mesmo lock
+            chosen.event.set()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            queued = {nome: 0 for nome in _NOMES_PRIORIDADE.values()}
+            for w in self._waiters:
+                queued[_NOMES_PRIORIDADE[w.priority]] += 1
+            by_priority = {}
+            for nome, s in self._stats.items():
+                by_priority[nome] = {
+                    "granted": s["granted"],
+                    "waited": s["waited"],
+                    "wait_avg_ms": round(s["wait_total_ms"] / s["waited"], 1) if s["waited"] else 0.0,
+                    "wait_max_ms": round(s["wait_max_ms"], 1),
+                    "aged": s["aged"],
+                    "timeouts": s["timeouts"],
+                    "queued": queued[nome],
+                }
+            return {"capacity": self.capacity, "in_use": self.in_use, "aging_per_s": self.aging_per_s,
+                    "max_wait_s": self.max_wait, "by_priority": by_priority}
+
+
+def parse_nodes(specs: List[str], default_url: str | None) -> List[Tuple[str, str]]:
+    """
+    GLPI_NODES="https://glpi1/apirest.php|primary,https://glpi-ro/apirest.php|read".
+
+    Papel ausente vale "both". Sem GLPI_NODES, o único nó é GLPI_URL (primary + leitura).
+    """
+    nodes = []
+    for spec in specs:
+        url, _, role = spec.partition("|")
+        role = (role or "both").strip().lower()
+        if role not in ROLES:
+            raise ValueError(f"Papel de nó GLPI inválido em GLPI_NODES: {spec}")
+        nodes.append((url.strip().rstrip("/"), role))
+    if not nodes and default_url:
+        nodes.append((default_url.rstrip("/"), "both"))
+    return nodes
+
+
+class GlpiNode:
+    """Um front end do GLPI: pool de conexões próprio e métricas de uso e saúde."""
+
+    def __init__(self, url: str, role: str, pool_size: int):
+        self.url = url
+        self.role = role
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.ewma_latency_ms: float | None = None
+        self.last_latency_ms: float | None = None
+        self.last_error: str | None = None
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def record(self, ok: bool, latency_ms: float, error: str | None, eject_after: int, eject_seconds: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.last_latency_ms = latency_ms
+            sample = latency_ms if ok else max(latency_ms, _FAILURE_PENALTY_MS)
+            if self.ewma_latency_ms is None:
+                self.ewma_latency_ms = sample
+            else:
+                self.ewma_latency_ms += _EWMA_ALPHA * (sample - self.ewma_latency_ms)
+            if ok:
+                self.consecutive_failures = 0
+                return
+            self.errors += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self.consecutive_failures >= eject_after:
+                # Ejetado por um período; ao voltar, sem medição, recebe a próxima leitura como teste
+                self.ejected_until = time.monotonic() + eject_seconds
+                self.ejections += 1
+                self.consecutive_failures = 0
+                self.ewma_latency_ms = None
+                logger.warning(f"Nó GLPI {self.url} ejetado por {eject_seconds:.0f}s: {error}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "url": self.url,
+                "role": self.role,
+                "pool_size": self.pool_size,
+                "requests": self.requests,
+                "errors": self.errors,
+                "consecutive_failures": self.consecutive_failures,
+                "ewma_latency_ms": None if self.ewma_latency_ms is None else round(self.ewma_latency_ms, 1),
+                "last_latency_ms": None if self.last_latency_ms is None else round(self.last_latency_ms, 1),
+                "ejected": not self.available(now),
+                "ejected_for_s": round(max(0.0, self.ejected_until - now), 1),
+                "ejections": self.ejections,
+                "last_error": self.last_error,
+            }
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class GlpiNodePool:
+    """
+    Roteamento das chamadas REST entre os nós do GLPI.
+
+    - Escritas (initSession/killSession, POST /Ticket) vão aos nós primary.
+    - Leituras (search, listSearchOptions, getFullSession) vão ao pool de leitura, por
+      menor latência (EWMA) ou round-robin; sem nós de leitura, usam os primary.
+    - Falhas de conexão/timeout e respostas 5xx contam contra o nó; após `eject_after`
+      falhas seguidas ele sai do balanceamento por `eject_seconds`. Leituras com falha
+      de conexão são repetidas uma vez em outro nó.
+    - Com `gate`, as chamadas simultâneas são limitadas e a fila respeita a prioridade do
+      contexto (prioridade_glpi).
+    - As sessões do GLPI precisam ser compartilhadas entre os nós (storage de sessão comum).
+    """
+
+    def __init__(self, nodes: List[Tuple[str, str]], pool_size: int = 10, balancing: str = "least_latency",
+                 eject_after: int = 3, eject_seconds: float = 30.0, gate: PriorityGate | None = None):
+        if not nodes:
+            raise ValueError("Nenhum nó GLPI configurado (GLPI_URL ou GLPI_NODES)")
+        self.nodes = [GlpiNode(url, role, pool_size) for url, role in nodes]
+        self.balancing = balancing if balancing in ("least_latency", "round_robin") else "least_latency"
+        self.eject_after = max(1, eject_after)
+        self.eject_seconds = max(0.0, eject_seconds)
+        self._rr = itertools.count()
+        self.gate = gate
+        self._uso = threading.Lock()
+        self._em_andamento = 0
+        self._aposentado = False
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "GlpiNodePool":
+        return cls(
+            parse_nodes(settings.glpi_nodes, settings.glpi_url),
+            pool_size=settings.glpi_pool_size,
+            balancing=settings.glpi_read_balancing,
+            eject_after=settings.glpi_node_eject_after,
+            eject_seconds=settings.glpi_node_eject_seconds,
+            gate=PriorityGate(settings.glpi_outbound_concurrency, settings.glpi_priority_aging,
+                              settings.glpi_outbound_max_wait)
+            if settings.glpi_outbound_concurrency > 0 else None,
+        )
+
+    def _candidates(self, purpose: str) -> List[GlpiNode]:
+        roles = _ROLES_FOR[purpose]
+        nodes = [n for n in self.nodes if n.role in roles]
+        if not nodes and purpose == "read":
+            nodes = [n for n in self.nodes if n.role in _ROLES_FOR["write"]]
+        if not nodes:
+            raise RuntimeError(f"Nenhum nó GLPI com papel para '{purpose}'")
+        return nodes
+
+    def choose(self, purpose: str, exclude: GlpiNode | None = None) -> GlpiNode:
+        nodes = [n for n in self._candidates(purpose) if n is not exclude] or self._candidates(purpose)
+        now = time.monotonic()
+        available = [n for n in nodes if n.available(now)]
+        if not available:
+            # Todos ejetados: melhor tentar o que volta primeiro do que falhar sem tentar
+            return min(nodes, key=lambda n: n.ejected_until)
+        if len(available) == 1:
+            return available[0]
+        if self.balancing == "round_robin" or purpose == "write":
+            return available[next(self._rr) % len(available)]
+        # Nós ainda sem medição entram primeiro, para ganharem uma latência
+        return min(available, key=lambda n: -1.0 if n.ewma_latency_ms is None else n.ewma_latency_ms)
+
+    def request(self, method: str, path: str, purpose: str = "read", **kwargs: Any) -> requests.Response:
+        with self._uso:
+            self._em_andamento += 1
+        try:
+            if self.gate is None:
+                return self._request(method, path, purpose, **kwargs)
+            self.gate.acquire(_prioridade.get())
+            try:
+                return self._request(method, path, purpose, **kwargs)
+            finally:
+                self.gate.release()
+        finally:
+            with self._uso:
+                self._em_andamento -= 1
+                fechar = self._aposentado and self._em_andamento == 0
+            if fechar:
+                self.close()
+
+    def aposentar(self) -> None:
+        """Substituído por outro pool: fecha agora se ocioso, senão ao fim da última chamada em andamento."""
+        with self._uso:
+            self._aposentado = True
+            fechar = self._em_andamento == 0
+        if fechar:
+            self.close()
+
+    def _request(self, method: str, path: str, purpose: str, **kwargs: Any) -> requests.Response:
+        node = self.choose(purpose)
+        try:
+            return self._send(node, method, path, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if purpose != "read" or len(self._candidates(purpose)) < 2:
+                raise
+            retry = self.choose(purpose, exclude=node)
+            logger.info(f"Leitura GLPI {path} repetida em {retry.url} após falha em {node.url}")
+            return self._send(retry, method, path, **kwargs)
+
+    def _send(self, node: GlpiNode, method: str, path: str, **kwargs: Any) -> requests.Response:
+        started = time.perf_counter()
+        try:
+            resp = node.session.request(method, f"{node.url}{path}", **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            latency_ms = (time.perf_counter() - started) * 1000
+            node.record(False, latency_ms, str(e), self.eject_after, self.eject_seconds)
+            for observador in _observadores:
+                observador(_tipo_chamada(path), latency_ms, False)
+            raise
+        ok = resp.status_code < 500
+        latency_ms = (time.perf_counter() - started) * 1000
+        node.record(ok, latency_ms, None if ok else f"HTTP {resp.status_code}", self.eject_after, self.eject_seconds)
+        for observador in _observadores:
+            observador(_tipo_chamada(path), latency_ms, ok)
+        return resp
+
+    def conectar(self, timeout: float = 10.0) -> Dict[str, Dict[str, Any]]:
+        """
+        Abre uma conexão (DNS + TCP + TLS) em cada nó com um GET na raiz da API, sem sessão.
+
+        Qualquer resposta HTTP conta como conectado: a conexão fica no pool do nó para a
+        primeira chamada real. Falhas de conexão/timeout contam contra o nó, como em `_send`.
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        for node in self.nodes:
+            started = time.perf_counter()
+            try:
+                resp = node.session.get(f"{node.url}/", timeout=timeout)
+                resp.close()
+                result[node.url] = {"ok": True, "status": resp.status_code,
+                                    "ms": round((time.perf_counter() - started) * 1000, 1)}
+            except (requests.ConnectionError, requests.Timeout) as e:
+                latency_ms = (time.perf_counter() - started) * 1000
+                node.record(False, latency_ms, str(e), self.eject_after, self.eject_seconds)
+                result[node.url] = {"ok": False, "ms": round(latency_ms, 1), "error": str(e)}
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        return {"balancing": self.balancing, "eject_after": self.eject_after,
+                "eject_seconds": self.eject_seconds, "nodes": [n.snapshot() for n in self.nodes],
+                "gate": self.gate.status() if self.gate is not None else None}
+
+    def close(self) -> None:
+        for node in self.nodes:
+            node.close()
+
+
+_lock = threading.Lock()
+_pool: GlpiNodePool | None = None
+_pool_key: Tuple | None = None
+_pool_checked_at = 0.0
+# Recebem (tipo, latência em ms, ok) de cada chamada ao GLPI; tupla trocada inteira, lida sem lock
+_observadores: Tuple[Callable[[str, float, bool], None], ...] = ()
+
+
+def _tipo_chamada(path: str) -> str:
+    # "/search/User?..." -> "search", "/Ticket" -> "Ticket": latências comparáveis entre si
+    return path.lstrip("/").split("/", 1)[0].split("?", 1)[0]
+
+
+def registrar_observador(observador: Callable[[str, float, bool], None]) -> None:
+    """Inscreve `observador(tipo, latency_ms, ok)` nas chamadas REST ao GLPI (ex.: limitador de concorrência)."""
+    global _observadores
+    with _lock:
+        if observador not in _observadores:
+            _observadores = _observadores + (observador,)
+
+
+def remover_observador(observador: Callable[[str, float, bool], None]) -> None:
+    global _observadores
+    with _lock:
+        _observadores = tuple(o for o in _observadores if o != observador)
+
+
+def obter_pool() -> GlpiNodePool:
+    """
+    Pool de nós do GLPI do processo; recriado se a configuração de nós mudar (o antigo é
+    fechado quando suas chamadas em andamento terminam).
+
+    A configuração é relida no máximo a cada _POOL_RECHECK_S: no caminho de cada chamada
+    ao GLPI basta devolver o pool já criado, sem reler o .env.
+    """
+    global _pool, _pool_key, _pool_checked_at
+    pool = _pool
+    if pool is not None and time.monotonic() - _pool_checked_at < _POOL_RECHECK_S:
+        return pool
+    settings = load_settings()
+    key = (settings.glpi_url, tuple(settings.glpi_nodes), settings.glpi_pool_size, settings.glpi_read_balancing,
+           settings.glpi_node_eject_after, settings.glpi_node_eject_seconds,
+           settings.glpi_outbound_concurrency, settings.glpi_priority_aging, settings.glpi_outbound_max_wait)
+    with _lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None:
+                # Threads que já pegaram o pool antigo terminam suas chamadas antes do close
+                _pool.aposentar()
+            _pool = GlpiNodePool.from_settings(settings)
+            _pool_key = key
+        _pool_checked_at = time.monotonic()
+        return _pool
+
+
+def glpi_request(method: str, path: str, purpose: str = "read", **kwargs: Any) -> requests.Response:
+    """Chamada REST ao GLPI (`path` relativo a apirest.php), roteada pelo pool de nós."""
+    return obter_pool().request(method, path, purpose, **kwargs)
+
+
+def fechar_pool() -> None:
+    global _pool, _pool_key
+    with _lock:
+        pool, _pool, _pool_key = _pool, None, None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List
+from ..config import load_settings
+from ..utils.cache import TTLCache
+from .glpi_http import glpi_request
+
+
+logger = logging.getLogger(__name__)
+
+# Campo lógico -> (tabela, coluna) da search option correspondente no GLPI
+USER_COLUMNS = {
+    "id": ("glpi_users", "id"),
+    "login": ("glpi_users", "name"),
+    "firstname": ("glpi_users", "firstname"),
+    "realname": ("glpi_users", "realname"),
+    "email": ("glpi_useremails", "email"),
+}
+
+# Ids padrão do GLPI para User, usados quando listSearchOptions não está disponível
+DEFAULT_USER_OPTIONS = {"id": 2, "login": 1, "email": 5, "firstname": 9, "realname": 34}
+
+# Separador usado pelo GLPI quando uma coluna tem múltiplos valores (ex.: vários e-mails)
+MULTIVALUE_SEPARATOR = "$$##$$"
+
+# listSearchOptions não suportado/permitido: reusar o padrão por pouco tempo e tentar de novo depois
+_FALLBACK_TTL = 60.0
+# Status que indicam recurso não suportado ou sem permissão (não mudam com nova tentativa/sessão)
+_NAO_SUPORTADO = frozenset((400, 403, 404, 405, 501))
+
+_options_cache = TTLCache(maxsize=32, ttl=3600.0)
+
+
+@dataclass
+class UsuarioGLPI:
+    id: int | None
+    login: str | None
+    email: str | None
+    firstname: str | None = None
+    realname: str | None = None
+    # Campo `name` histórico da busca: o `name` do User no GLPI (o login), senão o primeiro nome
+    name: str | None = None
+
+    def __post_init__(self):
+        if self.name is None:
+            self.name = self.login or self.firstname
+
+    @property
+    def display_name(self) -> str | None:
+        """Nome para exibição: "primeiro nome sobrenome", senão o login."""
+        full = " ".join(p for p in (self.firstname, self.realname) if p)
+        return full or self.login
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "display_name": self.display_name,
+            "login": self.login,
+            "email": self.email,
+            "firstname": self.firstname,
+            "realname": self.realname,
+        }
+
+
+class ColumnProjector:
+    """
+    Projeção compilada de linhas de /search/<itemtype> para registros tipados.
+
+    As chaves das colunas (ids de search option, como string) são resolvidas uma vez;
+    projetar uma linha é só leitura de dicionário, sem cadeias de fallback.
+    """
+
+    def __init__(self, itemtype: str, columns: Dict[str, int], source: str):
+        self.itemtype = itemtype
+        self.columns = dict(columns)
+        self.source = source  # "listSearchOptions" ou "default"
+        self._keys = {logical: str(option) for logical, option in self.columns.items()}
+        self.forcedisplay = {
+            f"forcedisplay[{i}]": option for i, option in enumerate(sorted(set(self.columns.values())))
+        }
+
+    def field_id(self, logical: str) -> int:
+        return self.columns[logical]
+
+    def key(self, logical: str) -> str:
+        return self._keys[logical]
+
+    def values(self, row: Dict[str, Any], logical: str) -> List[str]:
+        raw = row.get(self._keys[logical])
+        if raw is None or raw == "":
+            return []
+        if isinstance(raw, list):
+            return [str(v) for v in raw if v not in (None, "")]
+        text = str(raw)
+        if MULTIVALUE_SEPARATOR in text:
+            return [v for v in text.split(MULTIVALUE_SEPARATOR) if v]
+        return [text]
+
+    def project(self, row: Dict[str, Any], email: str | None = None) -> UsuarioGLPI:
+        keys = self._keys
+        uid = row.get(keys["id"])
+        if isinstance(uid, str) and uid.isdigit():
+            uid = int(uid)
+        emails = self.values(row, "email")
+        if email:
+            # Usuário com vários e-mails: devolver o que casou com a busca
+            wanted = email.strip().lower()
+            chosen = next((e for e in emails if e.strip().lower() == wanted), None)
+        else:
+            chosen = None
+        return UsuarioGLPI(
+            id=uid if isinstance(uid, int) else None,
+            login=row.get(keys["login"]) or None,
+            email=chosen or (emails[0] if emails else None),
+            firstname=row.get(keys["firstname"]) or None,
+            realname=row.get(keys["realname"]) or None,
+        )
+
+
+def compilar_projetor(itemtype: str, options: Dict[str, Any]) -> ColumnProjector:
+    """Casa cada campo lógico com a search option pela (tabela, coluna), não pelo id."""
+    if itemtype != "User":
+        raise ValueError(f"Itemtype sem projeção definida: {itemtype}")
+    by_column: Dict[tuple, int] = {}
+    for key, opt in (options or {}).items():
+        if not isinstance(opt, dict) or not str(key).isdigit():
+            continue  # cabeçalhos de seção ("common") vêm como strings
+        column = (opt.get("table"), opt.get("field"))
+        if column not in by_column or int(key) < by_column[column]:
+            by_column[column] = int(key)
+
+    columns: Dict[str, int] = {}
+    for logical, column in USER_COLUMNS.items():
+        option = by_column.get(column)
+        default = DEFAULT_USER_OPTIONS[logical]
+        if option is None:
+            if by_column:
+                logger.warning(f"Search option de {itemtype}.{logical} ausente no GLPI; usando id padrão {default}")
+            option = default
+        elif option != default:
+            logger.warning(f"Search option de {itemtype}.{logical} mudou no GLPI: {default} -> {option}")
+        columns[logical] = option
+    return ColumnProjector(itemtype, columns, "listSearchOptions" if by_column else "default")
+
+
+def listar_search_options(itemtype: str, headers: Dict[str, str], timeout: float = 10) -> Dict[str, Any]:
+    resp = glpi_request("GET", f"/listSearchOptions/{itemtype}", "read", headers=headers, timeout=timeout)
+    resp.raise_for_status()
+    data = resp.json()
+    if not isinstance(data, dict):
+        raise RuntimeError(f"listSearchOptions/{itemtype} retornou formato inesperado")
+    return data
+
+
+def obter_projetor(itemtype: str, headers: Dict[str, str]) -> ColumnProjector:
+    """
+    Projetor do itemtype, compilado a partir de listSearchOptions e mantido em cache (TTL).
+
+    - 401 (sessão recusada) é repassado sem cache: com_sessao_servico renova a sessão e repete.
+    - Recurso não suportado/sem permissão ou resposta em formato inesperado: ids padrão em
+      cache por um período curto.
+    - Demais falhas (timeout, 5xx): ids padrão só nesta chamada; a próxima tenta de novo.
+    """
+    settings = load_settings()
+    cache_key = (settings.glpi_url, itemtype)
+    projector = _options_cache.get(cache_key)
+    if projector is not None:
+        return projector
+    try:
+        projector = compilar_projetor(itemtype, listar_search_options(itemtype, headers))
+        _options_cache.set(cache_key, projector, settings.glpi_search_options_ttl)
+    except Exception as e:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+        if status == 401:
+            raise
+        projector = compilar_projetor(itemtype, {})
+        if status in _NAO_SUPORTADO or (status is None and isinstance(e, RuntimeError)):
+            logger.warning(f"listSearchOptions/{itemtype} não suportado ({str(e)}); usando ids padrão")
+            _options_cache.set(cache_key, projector, _FALLBACK_TTL)
+        else:
+            logger.warning(f"listSearchOptions/{itemtype} indisponível ({str(e)}); usando ids padrão nesta chamada")
+    return projector
+
+
+def limpar_cache_projetores() -> None:
+    _options_cache.clear()
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+from ..config import Settings, load_settings
+from .glpi import autenticar_glpi, encerrar_sessao_glpi
+from .glpi_http import PRIORIDADE_BACKGROUND, prioridade_glpi
+from .warmup import aquecer_glpi
+
+
+logger = logging.getLogger(__name__)
+
+
+class GlpiHealthProber:
+    """
+    Verifica a conexão com o GLPI em uma thread própria e guarda o último resultado.
+
+    - As rotas de saúde leem apenas o snapshot em memória (sem I/O de rede).
+    - Cada verificação abre e encerra a sessão (initSession/killSession), sem vazar sessões.
+    - O resultado é considerado obsoleto após 3 intervalos sem nova verificação.
+    - Com `warmup`, a mesma thread executa o aquecimento antes do primeiro probe e a
+      prontidão só é sinalizada depois dele; tempos de partida ficam em `startup`.
+    """
+
+    def __init__(self, interval: float = 30.0, timeout: float = 10.0, enabled: bool = True,
+                 warmup: Callable[[], Dict[str, Any]] | None = None,
+                 startup: Dict[str, Any] | None = None, started_at: float | None = None):
+        self.interval = max(1.0, float(interval))
+        self.timeout = float(timeout)
+        self.enabled = enabled
+        self.warmup = warmup
+        self.startup = startup if startup is not None else {}
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self._warm = warmup is None
+        # Encerramento em andamento: prontidão false independentemente do GLPI
+        self.draining = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._snapshot: Dict[str, Any] = {
+            "glpi_configured": False,
+            "glpi_connection": "pending" if enabled else "unknown",
+            "checked_at": None,
+            "latency_ms": None,
+            "glpi_error": None,
+        }
+        self._checked_monotonic: float | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings, startup: Dict[str, Any] | None = None,
+                      started_at: float | None = None) -> "GlpiHealthProber":
+        return cls(
+            interval=settings.health_probe_interval,
+            timeout=settings.health_probe_timeout,
+            enabled=settings.health_probe_enabled,
+            warmup=aquecer_glpi if settings.warmup_enabled else None,
+            startup=startup,
+            started_at=started_at,
+        )
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        if not self.enabled and self._warm:
+            # Nada a fazer em background: pronto assim que a configuração estiver presente
+            self._marcar_pronto()
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="glpi-health-prober", daemon=True)
+        self._thread.start()
+        if self.enabled:
+            logger.info(f"Prober de saúde GLPI iniciado (intervalo {self.interval:.0f}s)")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        # Probe e warm-up cedem a vez às chamadas das requisições na fila do GLPI
+        with prioridade_glpi(PRIORIDADE_BACKGROUND):
+            self._loop()
+
+    def _loop(self) -> None:
+        if not self._warm:
+            self._aquecer()
+        while self.enabled and not self._stop.is_set():
+            try:
+                self.probe_once()
+            except Exception as e:
+                # Nunca deixar a thread morrer por erro inesperado
+                logger.error(f"Erro inesperado no prober de saúde: {str(e)}")
+            self._marcar_pronto()
+            self._stop.wait(self.interval)
+        self._marcar_pronto()
+
+    def _aquecer(self) -> None:
+        try:
+            result = self.warmup()
+        except Exception as e:
+            logger.error(f"Erro inesperado no warm-up: {str(e)}")
+            result = {"ok": False, "error": str(e)}
+        self.startup["warmup_ms"] = result.get("ms")
+        self.startup["warmup"] = result
+        self._warm = True
+
+    def _marcar_pronto(self) -> None:
+        # Primeira vez que a instância fica pronta: tempo desde o import do app_core
+        if self.startup.get("time_to_ready_ms") is None and self.is_ready():
+            self.startup["time_to_ready_ms"] = round((time.perf_counter() - self.started_at) * 1000, 1)
+            logger.info(f"Instância pronta em {self.startup['time_to_ready_ms']}ms desde o import")
+
+    @staticmethod
+    def _config_ok() -> bool:
+        settings = load_settings()
+        return all([settings.glpi_url, settings.glpi_app_token, settings.glpi_user_token])
+
+    def probe_once(self) -> Dict[str, Any]:
+        config_ok = self._config_ok()
+        result: Dict[str, Any] = {
+            "glpi_configured": config_ok,
+            "glpi_connection": "error",
+            "checked_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "latency_ms": None,
+            "glpi_error": None,
+        }
+        if not config_ok:
+            result["glpi_error"] = "Configurações do GLPI ausentes"
+        else:
+            started = time.perf_counter()
+            try:
+                headers = autenticar_glpi(timeout=self.timeout)
+                result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                result["glpi_connection"] = "ok"
+                encerrar_sessao_glpi(headers, timeout=self.timeout)
+            except Exception as e:
+                result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                result["glpi_error"] = str(e)
+
+        with self._lock:
+            self._snapshot = result
+            self._checked_monotonic = time.monotonic()
+        return dict(result)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._snapshot)
+            checked = self._checked_monotonic
+        age = None if checked is None else round(time.monotonic() - checked, 1)
+        data["age_s"] = age
+        data["warm"] = self._warm
+        data["draining"] = self.draining
+        data["stale"] = self.enabled and (age is None or age > self.interval * 3)
+        if not self.enabled:
+            # Sem prober, a prontidão se resume à configuração presente
+            data["glpi_configured"] = self._config_ok()
+        return data
+
+    def is_ready(self) -> bool:
+        if self.draining or not self._warm:
+            return False
+        data = self.snapshot()
+        if not self.enabled:
+            return bool(data["glpi_configured"])
+        return data["glpi_connection"] == "ok" and not data["stale"]
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from ..config import Settings
+from ..utils.text import tokenizar
+
+
+logger = logging.getLogger(__name__)
+
+# Parâmetros usuais do BM25 (saturação do tf e normalização pelo tamanho da seção)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Palavras funcionais do português (já sem acento) que não ajudam a ranquear
+STOPWORDS = frozenset(
+    "a o as os um uma uns umas de do da dos das em no na nos nas por pelo pela para pra com sem "
+    "e ou que se ao aos como mais mas nao sim ja ser esta este isso essa esse eu voce meu minha "
+    "seu sua ha tem ter foi sao era sobre entre quando onde qual quais porque".split()
+)
+_TITULO = re.compile(r"^(#{1,6})\s+(.*)$")
+_ESPACOS = re.compile(r"\s+")
+# Links não entram no índice: o texto da URL (learn.microsoft.com/...) só adiciona ruído
+_URL = re.compile(r"https?://\S+")
+_SNIPPET_MAX = 240
+
+
+def termos(texto: str | None) -> List[str]:
+    """Tokens sem acento e em minúsculas, sem stopwords nem tokens de 1 caractere."""
+    return [t for t in tokenizar(texto) if len(t) > 1 and t not in STOPWORDS]
+
+
+class _Secao:
+    __slots__ = ("path", "title", "section", "lines", "line_terms", "tf", "length")
+
+    def __init__(self, path: str, title: str, section: str | None, lines: List[str]):
+        self.path = path
+        self.title = title
+        self.section = section
+        self.lines = lines
+        self.line_terms = [frozenset(termos(_URL.sub(" ", line))) for line in lines]
+        self.tf = Counter(termos(_URL.sub(" ", " ".join(filter(None, (title, section, *lines))))))
+        self.length = sum(self.tf.values())
+
+    def snippet(self, consulta: List[str]) -> str:
+        """Linha da seção com mais termos da consulta (ou a primeira), sem marcação de lista."""
+        melhor, melhor_hits = "", -1
+        for line, line_terms in zip(self.lines, self.line_terms):
+            hits = len(line_terms.intersection(consulta))
+            if hits > melhor_hits:
+                melhor, melhor_hits = line, hits
+        texto = _ESPACOS.sub(" ", melhor.lstrip("-*> ").strip())
+        return texto if len(texto) <= _SNIPPET_MAX else texto[:_SNIPPET_MAX - 1].rstrip() + "…"
+
+
+def _secoes(path: Path, rel: str) -> List[_Secao]:
+    """Divide o Markdown por títulos `##`..: cada seção vira um documento do índice."""
+    titulo = path.stem
+    secoes: List[Tuple[str | None, List[str]]] = [(None, [])]
+    for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        m = _TITULO.match(line.strip())
+        if m and len(m.group(1)) == 1 and titulo == path.stem:
+            titulo = m.group(2).strip()
+        elif m:
+            secoes.append((m.group(2).strip(), []))
+        elif line.strip() and not line.strip().startswith("```"):
+            secoes[-1][1].append(line.strip())
+    return [_Secao(rel, titulo, nome, lines) for nome, lines in secoes if lines]
+
+
+class _Snapshot:
+    """Índice imutável (seções, postings, comprimento médio): trocado inteiro a cada sincronização."""
+
+    __slots__ = ("docs", "postings", "avgdl")
+
+    def __init__(self, secoes: List[_Secao]):
+        self.docs = secoes
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc_id, doc in enumerate(secoes):
+            for termo, tf in doc.tf.items():
+                self.postings.setdefault(termo, []).append((doc_id, tf))
+        self.avgdl = sum(doc.length for doc in secoes) / len(secoes) if secoes else 0.0
+
+
+class IndiceKB:
+    """
+    Índice invertido BM25 sobre os `*.md` de um diretório (docs/kb), uma entrada por seção.
+
+    - Tokens sem acento/maiúsculas (utils/text.py), sem stopwords.
+    - Construído no startup; `sincronizar()` compara mtime/tamanho dos arquivos e relê
+      só os alterados, novos ou removidos, publicando um novo snapshot imutável.
+    - Uma thread própria sincroniza a cada `refresh_interval` segundos (0 = só na
+      construção); as consultas apenas leem o snapshot atual, sem lock nem I/O.
+    """
+
+    def __init__(self, docs_dir: str | Path, refresh_interval: float = 30.0):
+        self.docs_dir = Path(docs_dir)
+        self.refresh_interval = max(0.0, float(refresh_interval))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._snapshot = _Snapshot([])
+        self._arquivos: Dict[str, Tuple[int, int, List[_Secao]]] = {}
+        self.builds = 0
+        self.searches = 0
+        self.last_sync_ms: float | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "IndiceKB | None":
+        """Índice já construído a partir de KB_DOCS_DIR; None se vazio (desativado)."""
+        if not settings.kb_docs_dir:
+            return None
+        indice = cls(settings.kb_docs_dir, settings.kb_refresh_interval)
+        result = indice.sincronizar()
+        logger.info(f"KB indexada de {indice.docs_dir}: {result['files']} arquivos, "
+                    f"{result['sections']} seções em {result['ms']}ms")
+        return indice
+
+    def sincronizar(self) -> Dict[str, Any]:
+        """Relê apenas os arquivos alterados desde a última sincronização."""
+        with self._lock:
+            started = time.perf_counter()
+            vistos: Dict[str, Tuple[Path, int, int]] = {}
+            if self.docs_dir.is_dir():
+                for path in sorted(self.docs_dir.rglob("*.md")):
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    vistos[path.relative_to(self.docs_dir).as_posix()] = (path, stat.st_mtime_ns, stat.st_size)
+            else:
+                logger.warning(f"Diretório da KB não encontrado: {self.docs_dir}")
+            changed = 0
+            for rel in [r for r in self._arquivos if r not in vistos]:
+                del self._arquivos[rel]
+                changed += 1
+            for rel, (path, mtime_ns, size) in vistos.items():
+                atual = self._arquivos.get(rel)
+                if atual is not None and atual[:2] == (mtime_ns, size):
+                    continue
+                try:
+                    self._arquivos[rel] = (mtime_ns, size, _secoes(path, rel))
+                except OSError as e:
+                    logger.warning(f"Falha ao indexar {path}: {str(e)}")
+                    continue
+                changed += 1
+            if changed:
+                # Postings remontados a partir das seções já tokenizadas: só os alterados foram relidos
+                self._snapshot = _Snapshot([doc for rel in sorted(self._arquivos) for doc in self._arquivos[rel][2]])
+                self.builds += 1
+            self.last_sync_ms = round((time.perf_counter() - started) * 1000, 2)
+            return {"files": len(self._arquivos), "sections": len(self._snapshot.docs), "changed": changed,
+                    "ms": self.last_sync_ms}
+
+    def start(self) -> None:
+        if not self.refresh_interval or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kb-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.sincronizar()
+            except Exception as e:
+                logger.error(f"Erro inesperado ao sincronizar a KB: {str(e)}")
+
+    def buscar(self, consulta: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Seções mais relevantes: {"path", "title", "section", "score", "snippet"}."""
+        tokens = list(dict.fromkeys(termos(consulta)))
+        snapshot = self._snapshot
+        n = len(snapshot.docs)
+        if not tokens or not n:
+            return []
+        self.searches += 1
+        scores: Dict[int, float] = {}
+        for termo in tokens:
+            postings = snapshot.postings.get(termo)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * snapshot.docs[doc_id].length / snapshot.avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        melhores = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:max(1, limit)]
+        results = []
+        for doc_id, score in melhores:
+            doc = snapshot.docs[doc_id]
+            results.append({"path": doc.path, "title": doc.title, "section": doc.section,
+                             "score": round(score, 3), "snippet": doc.snippet(tokens)})
+        return results
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {"docs_dir": str(self.docs_dir), "files": len(self._arquivos), "sections": len(snapshot.docs),
+                "terms": len(snapshot.postings), "builds": self.builds, "searches": self.searches,
+                "refresh_interval_s": self.refresh_interval, "last_sync_ms": self.last_sync_ms}
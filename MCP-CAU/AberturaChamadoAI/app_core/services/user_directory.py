@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from ..config import Settings, load_settings
+from ..utils.text import dobrar_acentos
+from .glpi import com_sessao_servico, iterar_usuarios_glpi
+from .glpi_http import PRIORIDADE_BACKGROUND, prioridade_glpi
+from .glpi_schema import UsuarioGLPI
+
+
+logger = logging.getLogger(__name__)
+
+# Entradas lidas por prefixo (limita o custo de prefixos muito comuns, ex. "a")
+_MAX_PREFIX_SCAN = 200
+# Usuários pontuados na busca por termos (o resto de um termo muito comum é descartado)
+_MAX_CANDIDATOS = 100
+# Palavras do vocabulário verificadas por distância de edição, por termo da consulta
+_FUZZY_CANDIDATOS = 20
+# Pesos: chave completa (login/e-mail/nome) > termos exatos ou por prefixo > termos corrigidos
+_PESO_PREFIXO = 0.6
+_PESO_TERMOS = 0.8
+_PESO_CORRIGIDO = 0.8
+# Nova tentativa após falha na carga, antes do intervalo normal
+_RETRY_FALHA = 60.0
+
+# Termos: letras e números separados ("lucas.santos5" -> lucas, santos, 5)
+_TERMO = re.compile(r"[a-z]+|[0-9]+")
+
+
+def _dobrar(texto: str | None) -> str:
+    return dobrar_acentos(texto).lower().strip() if texto else ""
+
+
+def _termos(texto: str) -> List[str]:
+    return _TERMO.findall(texto)
+
+
+def _trigramas(termo: str) -> Set[str]:
+    """Trigramas com marcadores de início/fim: o começo da palavra pesa na similaridade."""
+    marcado = f"${termo}$"
+    return {marcado[i:i + 3] for i in range(len(marcado) - 2)}
+
+
+def _distancia(a: str, b: str, maximo: int) -> int:
+    """Distância de edição com transposição de vizinhos (OSA); para cedo acima de `maximo`."""
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    anterior2: List[int] = []
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        atual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            custo = 0 if a[i - 1] == b[j - 1] else 1
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                atual[j] = min(atual[j], anterior2[j - 2] + 1)
+        if min(atual) > maximo:
+            return maximo + 1
+        anterior2, anterior = anterior, atual
+    return anterior[-1]
+
+
+class _Snapshot:
+    """
+    Índices imutáveis de uma carga do diretório; trocados por inteiro na atualização,
+    então as consultas leem sem lock.
+
+    - Prefixo: chaves (login, e-mail, nome completo) sem acento e ordenadas; busca binária
+      até o primeiro candidato e leitura sequencial do intervalo. Mesmo efeito de uma trie,
+      com uma fração da memória de um nó por caractere.
+    - Termos: vocabulário (palavras e números de logins, e-mails e nomes) -> usuários, com
+      índice de trigramas sobre o vocabulário para corrigir erros de digitação. Nomes se
+      repetem muito, então o vocabulário é pequeno mesmo com dezenas de milhares de usuários.
+    """
+
+    def __init__(self, usuarios: Iterable[UsuarioGLPI]):
+        self.users: List[Dict[str, Any]] = []
+        pares: List[Tuple[str, int]] = []
+        self.vocab: Dict[str, Set[int]] = {}
+        vistos = set()
+        for usuario in usuarios:
+            if usuario.id is None or usuario.id in vistos or not (usuario.login or usuario.email):
+                continue
+            vistos.add(usuario.id)
+            idx = len(self.users)
+            self.users.append({"id": usuario.id, "login": usuario.login, "email": usuario.email,
+                               "name": usuario.name, "display_name": usuario.display_name})
+            nome = _dobrar(" ".join(p for p in (usuario.firstname, usuario.realname) if p))
+            chaves = {_dobrar(usuario.login), _dobrar(usuario.email), nome}
+            chaves.discard("")
+            pares.extend((chave, idx) for chave in chaves)
+            # Domínio do e-mail fora do vocabulário: comum a quase todos, não distingue ninguém
+            email_local = _dobrar(usuario.email).partition("@")[0]
+            for termo in set(_termos(f"{_dobrar(usuario.login)} {email_local} {nome}")):
+                self.vocab.setdefault(termo, set()).add(idx)
+        pares.sort()
+        self.keys = [k for k, _ in pares]
+        self.key_users = [i for _, i in pares]
+        self.vocab_sorted = sorted(self.vocab)
+        self.trigrams: Dict[str, List[str]] = {}
+        for termo in self.vocab_sorted:
+            if termo.isalpha():
+                for gram in _trigramas(termo):
+                    self.trigrams.setdefault(gram, []).append(termo)
+
+    def prefixo(self, q: str) -> Dict[int, float]:
+        """Consulta inteira como prefixo de login, e-mail ou nome completo."""
+        scores: Dict[int, float] = {}
+        pos = bisect.bisect_left(self.keys, q)
+        fim = min(len(self.keys), pos + _MAX_PREFIX_SCAN)
+        while pos < fim and self.keys[pos].startswith(q):
+            chave, idx = self.keys[pos], self.key_users[pos]
+            score = 1.0 if chave == q else _PESO_PREFIXO + (1 - _PESO_PREFIXO) * len(q) / len(chave)
+            if score > scores.get(idx, 0.0):
+                scores[idx] = score
+            pos += 1
+        return scores
+
+    def _casar_termo(self, termo: str, ultimo: bool) -> Tuple[Dict[str, float], bool]:
+        """Palavras do vocabulário para um termo: exata, por prefixo (último termo) ou corrigida."""
+        casados: Dict[str, float] = {}
+        if termo in self.vocab:
+            casados[termo] = 1.0
+        if ultimo:
+            pos = bisect.bisect_left(self.vocab_sorted, termo)
+            fim = min(len(self.vocab_sorted), pos + _MAX_PREFIX_SCAN)
+            while pos < fim and self.vocab_sorted[pos].startswith(termo):
+                palavra = self.vocab_sorted[pos]
+                casados.setdefault(palavra, _PESO_PREFIXO + (1 - _PESO_PREFIXO) * len(termo) / len(palavra))
+                pos += 1
+        if casados or not termo.isalpha() or len(termo) < 3:
+            return casados, False
+        # Correção: candidatos que mais compartilham trigramas, confirmados pela distância de edição
+        comuns: Counter = Counter()
+        for gram in _trigramas(termo):
+            comuns.update(self.trigrams.get(gram, ()))
+        maximo = 1 if len(termo) <= 5 else 2
+        for palavra, _ in comuns.most_common(_FUZZY_CANDIDATOS):
+            dist = _distancia(termo, palavra, maximo)
+            if dist <= maximo:
+                casados[palavra] = _PESO_CORRIGIDO * (1 - dist / max(len(termo), len(palavra)))
+        return casados, True
+
+    def por_termos(self, q: str) -> Tuple[Dict[int, float], bool]:
+        """
+        Usuários que têm todos os termos da consulta (em qualquer ordem e campo; o domínio
+        de um e-mail é ignorado), com a média da similaridade de cada termo. Retorna também se algum termo foi corrigido.
+        """
+        termos = list(dict.fromkeys(_termos(q.partition("@")[0])))
+        if not termos:
+            return {}, False
+        por_termo: List[List[Tuple[str, float]]] = []
+        corrigido = False
+        for i, termo in enumerate(termos):
+            casados, fuzzy = self._casar_termo(termo, i == len(termos) - 1)
+            if not casados:
+                return {}, False
+            corrigido = corrigido or fuzzy
+            por_termo.append(sorted(casados.items(), key=lambda item: -item[1]))
+        # Interseção em conjuntos (C); muitos candidatos (ex. um sobrenome comum): fica com
+        # quem casa a melhor palavra de cada termo e corta pelos primeiros ids
+        candidatos = set.intersection(*(set().union(*(self.vocab[p] for p, _ in palavras)) for palavras in por_termo))
+        if len(candidatos) > _MAX_CANDIDATOS:
+            melhores = set.intersection(*(self.vocab[palavras[0][0]] for palavras in por_termo))
+            if len(melhores) >= _MAX_CANDIDATOS // 4:
+                candidatos = melhores
+            candidatos = sorted(candidatos)[:_MAX_CANDIDATOS]
+        scores: Dict[int, float] = {}
+        for idx in candidatos:
+            total = 0.0
+            for palavras in por_termo:
+                total += next(sim for palavra, sim in palavras if idx in self.vocab[palavra])
+            scores[idx] = _PESO_TERMOS * total / len(por_termo)
+        return scores, corrigido
+
+
+class DiretorioUsuarios:
+    """
+    Cópia em memória dos usuários do GLPI (id, login, e-mail, nome) para sugestões
+    ranqueadas sem busca no GLPI (o `contains` do GLPI é um LIKE '%x%' sem ranking).
+
+    - Carregada por uma thread própria via /search/User paginado, na prioridade de
+      background, e recarregada a cada `refresh_interval` segundos.
+    - `sugerir()` combina prefixo (login/e-mail/nome) e termos, corrigidos por trigramas
+      e distância de edição quando não existem no vocabulário (erros de digitação).
+    """
+
+    def __init__(self, refresh_interval: float = 900.0, max_users: int = 20000, enabled: bool = True):
+        self.refresh_interval = max(10.0, float(refresh_interval))
+        self.max_users = max(1, int(max_users))
+        self.enabled = enabled
+        self._snapshot: _Snapshot | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.loaded_at: str | None = None
+        self.last_refresh_ms: float | None = None
+        self.last_error: str | None = None
+        self.refreshes = 0
+        self.errors = 0
+        self.queries = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "DiretorioUsuarios":
+        return cls(settings.user_suggest_refresh, settings.user_suggest_max_users, settings.user_suggest_enabled)
+
+    @property
+    def pronto(self) -> bool:
+        return self._snapshot is not None
+
+    def carregar(self, usuarios: Iterable[UsuarioGLPI]) -> int:
+        """Substitui os índices pelos usuários informados; retorna quantos foram indexados."""
+        snapshot = _Snapshot(usuarios)
+        self._snapshot = snapshot
+        self.loaded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        return len(snapshot.users)
+
+    def atualizar(self) -> Dict[str, Any]:
+        """
+        Relê os usuários do GLPI (sessão de serviço, páginas de GLPI_SEARCH_PAGE_SIZE), na
+        prioridade de background: a carga completa cede a vez às requisições na fila do GLPI.
+        """
+        with self._lock, prioridade_glpi(PRIORIDADE_BACKGROUND):
+            started = time.perf_counter()
+            try:
+                usuarios = com_sessao_servico(lambda h: list(iterar_usuarios_glpi([], h, max_rows=self.max_users)))
+                total = self.carregar(usuarios)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                logger.warning(f"Falha ao carregar diretório de usuários do GLPI: {str(e)}")
+                return {"ok": False, "error": str(e)}
+            self.refreshes += 1
+            self.last_error = None
+            self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 1)
+            if total >= self.max_users:
+                logger.warning(f"Diretório de usuários truncado em {self.max_users} (USER_SUGGEST_MAX_USERS)")
+            logger.info(f"Diretório de usuários carregado: {total} usuários em {self.last_refresh_ms}ms")
+            return {"ok": True, "users": total, "ms": self.last_refresh_ms}
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="glpi-user-directory", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            settings = load_settings()
+            if all([settings.glpi_url, settings.glpi_app_token, settings.glpi_user_token]):
+                ok = self.atualizar()["ok"]
+            else:
+                ok = False
+            self._stop.wait(self.refresh_interval if ok else min(_RETRY_FALHA, self.refresh_interval))
+
+    def sugerir(self, q: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Usuários ranqueados para `q`: {"id", "login", "email", "name", "display_name", "score", "match"}.
+        `match`: exact/prefix (login, e-mail ou nome completo), terms (todos os termos, em
+        qualquer ordem) ou fuzzy (algum termo corrigido). Vazia enquanto não carregado.
+        """
+        snapshot = self._snapshot
+        consulta = _dobrar(q)
+        if snapshot is None or not consulta:
+            return []
+        self.queries += 1
+        scores = snapshot.prefixo(consulta)
+        match = {idx: ("exact" if s == 1.0 else "prefix") for idx, s in scores.items()}
+        if len(scores) < limit:
+            por_termos, corrigido = snapshot.por_termos(consulta)
+            for idx, score in por_termos.items():
+                if score > scores.get(idx, 0.0):
+                    scores[idx] = score
+                    match[idx] = "fuzzy" if corrigido else "terms"
+        melhores = heapq.nsmallest(max(1, limit), scores.items(),
+                                   key=lambda item: (-item[1], snapshot.users[item[0]]["login"] or ""))
+        return [{**snapshot.users[idx], "score": round(score, 3), "match": match[idx]}
+                for idx, score in melhores]
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "enabled": self.enabled,
+            "ready": snapshot is not None,
+            "users": len(snapshot.users) if snapshot else 0,
+            "keys": len(snapshot.keys) if snapshot else 0,
+            "terms": len(snapshot.vocab) if snapshot else 0,
+            "trigrams": len(snapshot.trigrams) if snapshot else 0,
+            "loaded_at": self.loaded_at,
+            "refresh_interval_s": self.refresh_interval,
+            "last_refresh_ms": self.last_refresh_ms,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "queries": self.queries,
+        }
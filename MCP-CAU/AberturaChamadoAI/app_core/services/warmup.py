@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+from typing import Any, Callable, Dict
+from ..config import load_settings
+from .glpi import com_sessao_servico, sessao_servico
+from .glpi_http import obter_pool
+from .glpi_schema import obter_projetor
+
+
+logger = logging.getLogger(__name__)
+
+
+def _etapa(etapas: Dict[str, Any], nome: str, acao: Callable[[], Any]) -> None:
+    started = time.perf_counter()
+    try:
+        acao()
+        etapas[nome] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 1)}
+    except Exception as e:
+        etapas[nome] = {"ok": False, "ms": round((time.perf_counter() - started) * 1000, 1), "error": str(e)}
+        logger.warning(f"Warm-up '{nome}' falhou: {str(e)}")
+
+
+def _conectar_nos(nos: Dict[str, Any]) -> None:
+    # Preenche `nos` mesmo quando algum nó falha: o detalhe por nó vai para a etapa
+    nos.update(obter_pool().conectar())
+    falhas = [url for url, no in nos.items() if not no["ok"]]
+    if falhas:
+        raise RuntimeError(f"Sem conexão com {', '.join(falhas)}")
+
+
+def aquecer_glpi() -> Dict[str, Any]:
+    """
+    Paga o caminho frio antes da primeira requisição real:
+
+    - pool de nós do GLPI e uma conexão (DNS + TCP + TLS) aberta em cada nó, com um GET
+      sem sessão na raiz da API (detalhe por nó em `steps.http_pool.nodes`);
+    - sessão de serviço em cache (quando GLPI_SESSION_TTL > 0), via initSession;
+    - schema de busca de User (listSearchOptions) no cache de projetores.
+
+    Falhas são registradas por etapa e não impedem a aplicação de subir.
+    """
+    started = time.perf_counter()
+    etapas: Dict[str, Any] = {}
+    nos: Dict[str, Any] = {}
+    _etapa(etapas, "http_pool", lambda: _conectar_nos(nos))
+    if nos:
+        etapas["http_pool"]["nodes"] = nos
+    if load_settings().glpi_session_ttl > 0:
+        _etapa(etapas, "service_session", sessao_servico)
+    _etapa(etapas, "search_options", lambda: com_sessao_servico(lambda h: obter_projetor("User", h)))
+    result = {
+        "ok": all(e["ok"] for e in etapas.values()),
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "steps": etapas,
+    }
+    logger.info(f"Warm-up GLPI concluído em {result['ms']}ms (ok={result['ok']})")
+    return result
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import hmac
+from functools import wraps
+from flask import jsonify, request
+from ..config import load_settings
+
+
+def token_valido(recebido: str | None, esperado: str | None) -> bool:
+    """Compara o token administrativo em tempo constante; sem token configurado, nega."""
+    if not esperado or not recebido:
+        return False
+    return hmac.compare_digest(recebido.encode("utf-8"), esperado.encode("utf-8"))
+
+
+def exigir_admin(view):
+    """
+    Protege rotas /api/admin/* com o header X-Admin-Token.
+
+    Sem ADMIN_TOKEN configurado a superfície administrativa responde 404 (não é exposta).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        esperado = load_settings().admin_token
+        if not esperado:
+            return jsonify({"sucesso": False, "success": False, "erro": "not_found"}), 404
+        if not token_valido(request.headers.get("X-Admin-Token"), esperado):
+            return jsonify({"sucesso": False, "success": False, "erro": "forbidden"}), 403
+        return view(*args, **kwargs)
+    return wrapper
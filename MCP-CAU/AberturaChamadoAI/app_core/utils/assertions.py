@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Dict, List, Tuple
+from flask import request
+from ..config import load_settings
+
+
+class AssercaoInvalida(ValueError):
+    """Asserção ausente, malformada, com assinatura inválida, chave desconhecida ou expirada."""
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def parse_chaves(specs: List[str]) -> List[Tuple[str, bytes]]:
+    """
+    AUTH_ASSERTION_KEYS="k2:segredo-novo,k1:segredo-antigo" -> [(kid, segredo)].
+
+    A primeira chave assina; todas são aceitas na verificação. Rotação: incluir a nova
+    na frente, manter a antiga até as asserções emitidas com ela expirarem, então removê-la.
+    """
+    chaves = []
+    for spec in specs:
+        kid, sep, secret = spec.partition(":")
+        if not sep or not kid.strip() or not secret:
+            raise ValueError("AUTH_ASSERTION_KEYS deve ter o formato kid:segredo")
+        chaves.append((kid.strip(), secret.encode("utf-8")))
+    return chaves
+
+
+_chaves_cache: Tuple[Tuple[str, ...], List[Tuple[str, bytes]]] = ((), [])
+
+
+def _chaves(specs_list: List[str] | None = None) -> List[Tuple[str, bytes]]:
+    global _chaves_cache
+    specs = tuple(load_settings().auth_assertion_keys if specs_list is None else specs_list)
+    if _chaves_cache[0] != specs:
+        _chaves_cache = (specs, parse_chaves(list(specs)))
+    return _chaves_cache[1]
+
+
+def _assinar(secret: bytes, signing_input: str) -> str:
+    return _b64(hmac.new(secret, signing_input.encode("ascii"), hashlib.sha256).digest())
+
+
+def emitir_assercao(user_id: int, login: str, email: str | None = None) -> Tuple[str, int] | None:
+    """
+    Asserção compacta `kid.payload.assinatura` (base64url, HMAC-SHA256) com usuário e expiração.
+    Retorna (asserção, exp em epoch) ou None sem chaves configuradas.
+    """
+    chaves = _chaves()
+    if not chaves or not user_id:
+        return None
+    kid, secret = chaves[0]
+    agora = int(time.time())
+    exp = agora + int(load_settings().auth_assertion_ttl)
+    claims = {"sub": user_id, "login": login, "email": email, "iat": agora, "exp": exp}
+    payload = _b64(json.dumps(claims, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+    signing_input = f"{kid}.{payload}"
+    return f"{signing_input}.{_assinar(secret, signing_input)}", exp
+
+
+def verificar_assercao(token: str, chaves: List[Tuple[str, bytes]] | None = None) -> Dict[str, Any]:
+    """Claims da asserção verificada localmente (sem GLPI); AssercaoInvalida caso contrário."""
+    try:
+        kid, payload, assinatura = token.strip().split(".")
+    except (AttributeError, ValueError):
+        raise AssercaoInvalida("formato inválido")
+    secret = dict(_chaves() if chaves is None else chaves).get(kid)
+    if secret is None:
+        raise AssercaoInvalida("chave desconhecida")
+    if not hmac.compare_digest(assinatura, _assinar(secret, f"{kid}.{payload}")):
+        raise AssercaoInvalida("assinatura inválida")
+    try:
+        claims = json.loads(_unb64(payload))
+    except ValueError:
+        raise AssercaoInvalida("payload inválido")
+    if not isinstance(claims, dict) or not isinstance(claims.get("exp"), int):
+        raise AssercaoInvalida("payload inválido")
+    if claims["exp"] <= time.time():
+        raise AssercaoInvalida("expirada")
+    return claims
+
+
+def assercao_da_requisicao(data: Dict[str, Any] | None = None) -> str | None:
+    """Asserção do header X-Auth-Assertion, de `Authorization: Bearer` ou do campo `assertion`."""
+    valor = request.headers.get("X-Auth-Assertion")
+    if not valor:
+        autorizacao = request.headers.get("Authorization", "")
+        if autorizacao.lower().startswith("bearer "):
+            valor = autorizacao[7:]
+    if not valor and isinstance(data, dict) and isinstance(data.get("assertion"), str):
+        valor = data["assertion"]
+    return (valor or "").strip() or None
+
+
+def claims_da_requisicao(data: Dict[str, Any] | None = None) -> Dict[str, Any] | None:
+    """Claims de uma asserção válida na requisição; None se ausente, inválida ou desabilitada."""
+    specs = load_settings().auth_assertion_keys
+    if not specs:
+        return None
+    token = assercao_da_requisicao(data)
+    if not token:
+        return None
+    try:
+        return verificar_assercao(token, _chaves(specs))
+    except AssercaoInvalida:
+        return None
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class _Carga:
+    """Carga em andamento de uma chave em get_or_load; os demais chamadores esperam por ela."""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class TTLCache:
+    """
+    Cache em memória thread-safe, limitado por tamanho (LRU) e por tempo (TTL por item).
+
+    Usado para dados pequenos e quentes (search options, registros de usuário, contextos).
+    `on_evict(key, value)` é chamado (fora do lock) para itens que expiraram, saíram pelo
+    limite de tamanho ou foram substituídos; não para `pop`/`clear`, em que o chamador decide.
+    Roda na thread de quem acessou o cache: trabalho lento (ex.: HTTP) deve ir para background.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0,
+                 on_evict: Callable[[Hashable, Any], None] | None = None):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._loading: Dict[Hashable, _Carga] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _descartar(self, evicted: List[Tuple[Hashable, Any]]) -> None:
+        if not evicted:
+            return
+        with self._lock:
+            self.evictions += len(evicted)
+        if self.on_evict is None:
+            return
+        for key, value in evicted:
+            try:
+                self.on_evict(key, value)
+            except Exception as e:
+                logger.warning(f"Falha no descarte do item {key!r} do cache: {str(e)}")
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires, value = entry
+            if expires > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+            self.misses += 1
+        self._descartar([(key, value)])
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        evicted = []
+        with self._lock:
+            previous = self._data.get(key)
+            if previous is not None and previous[1] is not value:
+                evicted.append((key, previous[1]))
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                evicted.append((old_key, old_value))
+        self._descartar(evicted)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: float | None = None) -> Any:
+        """
+        Retorna do cache ou chama `loader` (fora do lock) e armazena o resultado.
+
+        Single-flight: chamadas concorrentes para a mesma chave ausente esperam o `loader`
+        da primeira em vez de repetir a carga (ex.: um só initSession); se ele falhar, a
+        exceção é repassada a todas e nada é armazenado.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            carga = self._loading.get(key)
+            lider = carga is None
+            if lider:
+                # Outra carga pode ter terminado entre o get acima e este lock
+                entry = self._data.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    return entry[1]
+                carga = self._loading[key] = _Carga()
+        if not lider:
+            carga.done.wait()
+            if carga.error is not None:
+                raise carga.error
+            return carga.value
+        try:
+            carga.value = loader()
+            self.set(key, carga.value, ttl)
+            return carga.value
+        except BaseException as e:
+            carga.error = e
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            carga.done.set()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._data)
+        return {"size": size, "maxsize": self.maxsize, "ttl": self.ttl, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict
+from flask import Flask, Response, g, jsonify, request
+from ..config import Settings
+from ..services.glpi_http import PRIORIDADE_BACKGROUND, prioridade_atual, registrar_observador, remover_observador
+from .fair_queue import ROUTE_COST, WeightedFairQueue, identificar_chamador, parse_pesos
+from .responses import modo_compacto, resposta_compacta
+
+
+logger = logging.getLogger(__name__)
+
+# Fração do limite que cada classe pode ocupar: sob pressão, buscas são descartadas
+# primeiro, depois autenticação; abertura de chamado só quando o limite inteiro está ocupado.
+CLASS_SHARE = {"ticket": 1.0, "auth": 0.9, "lookup": 0.7}
+_ENDPOINT_CLASS = {
+    "tickets.create_ticket_complete": "ticket",
+    "auth.authenticate_user": "auth",
+}
+# Baratas ou necessárias para operar a instância (health, rotas, admin, índice, KB, validação e sugestões locais): nunca limitadas
+_EXEMPT_BLUEPRINTS = ("health", "admin", "kb")
+_EXEMPT_ENDPOINTS = ("index", "static", "tickets.validate_ticket", "tickets.users_suggest")
+
+# Peso da última medição na EWMA curta de latência do GLPI
+_EWMA_ALPHA = 0.2
+# Deriva da linha de base (latência "sem carga") para cima, para acompanhar mudanças reais do GLPI
+_BASELINE_DRIFT = 0.01
+# Redução multiplicativa do limite ao detectar congestionamento
+_BACKOFF = 0.75
+# Diferença absoluta mínima para contar como congestionamento (ruído de chamadas muito rápidas)
+_MIN_EXCESS_MS = 50.0
+
+
+def classificar_requisicao() -> str | None:
+    """Classe de carga da requisição atual (ticket, auth, lookup) ou None quando isenta."""
+    if request.method == "OPTIONS" or request.endpoint is None:
+        return None
+    if request.blueprint in _EXEMPT_BLUEPRINTS or request.endpoint in _EXEMPT_ENDPOINTS:
+        return None
+    return _ENDPOINT_CLASS.get(request.endpoint, "lookup")
+
+
+def resposta_sobrecarga(mensagem: str, retry_after: int) -> Response:
+    """503 + Retry-After (limitador ou fila de saída do GLPI cheia), no contrato da requisição."""
+    if modo_compacto():
+        resp = resposta_compacta(status=503, error="overloaded", message=mensagem)
+    else:
+        resp = jsonify({"sucesso": False, "success": False, "erro": mensagem, "error": mensagem,
+                        "codigo": "overloaded"})
+        resp.status_code = 503
+    resp.headers["Retry-After"] = str(retry_after)
+    return resp
+
+
+class _LatencyTrack:
+    """EWMA curta e linha de base (mínimo com deriva lenta) de um tipo de chamada ao GLPI."""
+
+    __slots__ = ("ewma_ms", "baseline_ms")
+
+    def __init__(self):
+        self.ewma_ms: float | None = None
+        self.baseline_ms: float | None = None
+
+    def update(self, latency_ms: float, ok: bool) -> None:
+        if self.ewma_ms is None:
+            self.ewma_ms = latency_ms
+        else:
+            self.ewma_ms += _EWMA_ALPHA * (latency_ms - self.ewma_ms)
+        if not ok:
+            return
+        if self.baseline_ms is None or latency_ms < self.baseline_ms:
+            self.baseline_ms = latency_ms
+        else:
+            self.baseline_ms += _BASELINE_DRIFT * (latency_ms - self.baseline_ms)
+
+    def congested(self, tolerance: float) -> bool:
+        if self.ewma_ms is None or self.baseline_ms is None:
+            return False
+        return self.ewma_ms > self.baseline_ms * tolerance and self.ewma_ms - self.baseline_ms > _MIN_EXCESS_MS
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limite de requisições simultâneas ligadas ao GLPI, ajustado por AIMD a partir da
+    latência observada nas chamadas REST (services.glpi_http), por tipo de chamada
+    (search, initSession, Ticket...), já que cada uma tem sua latência normal.
+
+    - Latência curta (EWMA) acima de `tolerance` x a linha de base do tipo, ou falha/timeout,
+      reduz o limite em 25% (no máximo uma vez por "RTT" do GLPI).
+    - Com o GLPI saudável e o limite em uso, cresce ~1 a cada `limit` respostas.
+    - Acima da fatia da sua classe, a requisição recebe 503 + Retry-After na hora,
+      sem ocupar thread esperando o GLPI.
+    - Com `fair_queue`, em vez do 503 imediato a requisição espera (até `max_wait`) numa
+      fila justa por chamador, e as vagas liberadas são distribuídas por WFQ.
+    """
+
+    def __init__(self, initial: int = 20, min_limit: int = 4, max_limit: int = 100,
+                 tolerance: float = 2.0, retry_after: int = 1, fair_queue: WeightedFairQueue | None = None):
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(min(self.max_limit, max(self.min_limit, int(initial))))
+        self.tolerance = max(1.0, float(tolerance))
+        self.retry_after = max(1, int(retry_after))
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self._in_flight_by_class = {c: 0 for c in CLASS_SHARE}
+        self._latency: Dict[str, _LatencyTrack] = {}
+        self._last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.admitted = {c: 0 for c in CLASS_SHARE}
+        self.rejected = {c: 0 for c in CLASS_SHARE}
+        self.fair_queue = fair_queue
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AdaptiveConcurrencyLimiter":
+        return cls(
+            initial=settings.concurrency_limit_initial,
+            min_limit=settings.concurrency_limit_min,
+            max_limit=settings.concurrency_limit_max,
+            tolerance=settings.concurrency_latency_tolerance,
+            retry_after=settings.concurrency_retry_after,
+            fair_queue=WeightedFairQueue(
+                parse_pesos(settings.fair_queue_weights),
+                max_depth=settings.fair_queue_max_depth,
+                max_wait=settings.fair_queue_max_wait,
+            ) if settings.fair_queue_enabled else None,
+        )
+
+    def _admissible(self, klass: str) -> bool:
+        return self.in_flight < max(1, int(self.limit * CLASS_SHARE[klass]))
+
+    def _admit(self, klass: str) -> None:
+        self.in_flight += 1
+        self._in_flight_by_class[klass] += 1
+        self.admitted[klass] += 1
+
+    def _dispatch(self) -> None:
+        # Sob o lock: entrega as vagas livres aos enfileirados, na ordem da fila justa
+        while True:
+            waiter = self.fair_queue.pop_admissible(self._admissible)
+            if waiter is None:
+                return
+            self._admit(waiter.klass)
+            self.fair_queue.granted(waiter)
+
+    def try_acquire(self, klass: str, caller: str | None = None, cost: float = 1.0) -> bool:
+        if self.fair_queue is None:
+            with self._lock:
+                if not self._admissible(klass):
+                    self.rejected[klass] += 1
+                    return False
+                self._admit(klass)
+                return True
+
+        with self._lock:
+            waiter = self.fair_queue.enqueue(caller or "anonimo", klass, cost)
+            if waiter is None:
+                self.rejected[klass] += 1
+                return False
+            self._dispatch()
+            if waiter.granted:
+                return True
+        waiter.event.wait(self.fair_queue.max_wait)
+        with self._lock:
+            if waiter.granted:
+                return True
+            self.fair_queue.cancel(waiter)
+            self.rejected[klass] += 1
+            return False
+
+    def release(self, klass: str, caller: str | None = None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._in_flight_by_class[klass] -= 1
+            if self.fair_queue is not None:
+                self.fair_queue.release(caller or "anonimo")
+                self._dispatch()
+
+    def observe(self, kind: str, latency_ms: float, ok: bool) -> None:
+        """Uma chamada ao GLPI terminou: ajusta o limite (AIMD)."""
+        # Prober, warm-up e sincronizações em background não medem o que as requisições veem
+        # (e esperam atrás delas na fila de saída): fora da EWMA e do ajuste do limite
+        if prioridade_atual() == PRIORIDADE_BACKGROUND:
+            return
+        now = time.monotonic()
+        with self._lock:
+            track = self._latency.get(kind)
+            if track is None:
+                track = self._latency[kind] = _LatencyTrack()
+            track.update(latency_ms, ok)
+            if not ok or track.congested(self.tolerance):
+                # Uma redução por janela: as respostas lentas da mesma rajada não contam de novo
+                if (now - self._last_decrease) * 1000 >= track.ewma_ms:
+                    self.limit = max(float(self.min_limit), math.floor(self.limit * _BACKOFF))
+                    self._last_decrease = now
+                    self.decreases += 1
+            elif self.in_flight * 2 >= self.limit and self.limit < self.max_limit:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+                self.increases += 1
+                if self.fair_queue is not None:
+                    self._dispatch()
+
+    def retry_after_seconds(self) -> int:
+        ewma = max((t.ewma_ms or 0.0 for t in list(self._latency.values())), default=0.0)
+        return max(self.retry_after, math.ceil(ewma / 1000))
+
+    def rejeitar(self) -> Response:
+        return resposta_sobrecarga("Servidor sobrecarregado; tente novamente em instantes",
+                                   self.retry_after_seconds())
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "in_flight": self.in_flight,
+                "in_flight_by_class": dict(self._in_flight_by_class),
+                "class_share": dict(CLASS_SHARE),
+                "glpi_latency": {
+                    kind: {"ewma_ms": None if t.ewma_ms is None else round(t.ewma_ms, 1),
+                           "baseline_ms": None if t.baseline_ms is None else round(t.baseline_ms, 1)}
+                    for kind, t in self._latency.items()
+                },
+                "tolerance": self.tolerance,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "admitted": dict(self.admitted),
+                "rejected": dict(self.rejected),
+                "fair_queue": self.fair_queue.status() if self.fair_queue is not None else None,
+            }
+
+    def install(self, app: Flask) -> None:
+        @app.before_request
+        def _concurrency_acquire():
+            klass = classificar_requisicao()
+            if klass is None:
+                return None
+            caller = identificar_chamador() if self.fair_queue is not None else None
+            if not self.try_acquire(klass, caller, ROUTE_COST.get(request.endpoint, 1.0)):
+                return self.rejeitar()
+            g._concurrency_class = klass
+            g._concurrency_caller = caller
+            return None
+
+        @app.teardown_request
+        def _concurrency_release(exc):
+            klass = g.pop("_concurrency_class", None)
+            if klass is not None:
+                self.release(klass, g.pop("_concurrency_caller", None))
+
+        registrar_observador(self.observe)
+        app.extensions["concurrency_limiter"] = self
+        logger.info(f"Limite adaptativo de concorrência habilitado (inicial {int(self.limit)}, "
+                    f"{self.min_limit}-{self.max_limit}, fila justa {'sim' if self.fair_queue else 'não'})")
+
+    def uninstall(self) -> None:
+        remover_observador(self.observe)
+
+
+def instalar_limitador(app: Flask, settings: Settings) -> AdaptiveConcurrencyLimiter | None:
+    if not settings.concurrency_limit_enabled:
+        if settings.fair_queue_enabled:
+            # A fila justa só existe dentro do limitador: sem ele a flag não teria efeito algum
+            logger.warning("FAIR_QUEUE_ENABLED=true ignorado: a fila justa requer CONCURRENCY_LIMIT_ENABLED=true")
+        return None
+    limiter = AdaptiveConcurrencyLimiter.from_settings(settings)
+    limiter.install(app)
+    return limiter
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from flask import request
+
+
+# Custo relativo por rota no escalonamento: o lote faz várias buscas no GLPI por requisição
+ROUTE_COST = {"tickets.glpi_users_by_email": 4.0}
+# Chamadores ociosos mantidos nas métricas antes da poda dos mais antigos
+_MAX_CALLERS = 1024
+
+
+def identificar_chamador() -> str:
+    """
+    Identidade do chamador para a fila justa: `X-API-Key` (hash, nunca a chave) ou o IP da
+    conexão (`remote_addr`). Atrás de túnel/proxy, `remote_addr` é o cliente só com
+    TRUSTED_PROXY_HOPS configurado (ProxyFix); X-Forwarded-For e outros headers livres do
+    cliente nunca são lidos aqui, senão bastaria inventá-los para ganhar uma fila nova.
+    """
+    api_key = request.headers.get("X-API-Key")
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+    return "ip:" + (request.remote_addr or "desconhecido")
+
+
+def parse_pesos(specs: List[str]) -> Dict[str, float]:
+    """FAIR_QUEUE_WEIGHTS="key:3f2a9c1b7d4e=4,ip:10.0.0.7=0.5" -> {"key:3f2a9c1b7d4e": 4.0, "ip:10.0.0.7": 0.5}."""
+    pesos = {}
+    for spec in specs:
+        caller, sep, weight = spec.rpartition("=")
+        if not sep or not caller.strip():
+            raise ValueError(f"Peso inválido em FAIR_QUEUE_WEIGHTS: {spec}")
+        pesos[caller.strip()] = max(0.01, float(weight))
+    return pesos
+
+
+class _Waiter:
+    __slots__ = ("caller", "klass", "finish", "enqueued_at", "event", "granted", "cancelled")
+
+    def __init__(self, caller: str, klass: str, finish: float):
+        self.caller = caller
+        self.klass = klass
+        self.finish = finish
+        self.enqueued_at = time.monotonic()
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class _CallerStats:
+    __slots__ = ("weight", "last_finish", "last_seen", "queued", "in_flight", "admitted", "rejected",
+                 "timeouts", "wait_count", "wait_total_ms", "wait_max_ms")
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.last_finish = 0.0
+        self.last_seen = time.monotonic()
+        self.queued = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+
+
+class WeightedFairQueue:
+    """
+    Fila justa ponderada (WFQ) por chamador diante do limite de concorrência.
+
+    - Cada requisição recebe uma marca de término virtual: max(tempo virtual, última marca
+      do chamador) + custo da rota / peso do chamador. As vagas liberadas vão para a menor
+      marca, então um chamador com muitas requisições enfileiradas não passa à frente de
+      quem chegou com uma só.
+    - Profundidade por chamador limitada (`max_depth`): além dela, 503 imediato.
+    - Não é thread-safe: usada sob o lock do AdaptiveConcurrencyLimiter.
+    """
+
+    def __init__(self, weights: Dict[str, float] | None = None, max_depth: int = 20, max_wait: float = 2.0):
+        self.weights = dict(weights or {})
+        self.max_depth = max(1, int(max_depth))
+        self.max_wait = max(0.0, float(max_wait))
+        self.vtime = 0.0
+        self._heap: List[Tuple[float, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._callers: Dict[str, _CallerStats] = {}
+
+    def _stats(self, caller: str) -> _CallerStats:
+        stats = self._callers.get(caller)
+        if stats is None:
+            if len(self._callers) >= _MAX_CALLERS:
+                self._prune()
+            stats = self._callers[caller] = _CallerStats(self.weights.get(caller, 1.0))
+        stats.last_seen = time.monotonic()
+        return stats
+
+    def _prune(self) -> None:
+        idle = sorted((s.last_seen, c) for c, s in self._callers.items() if not s.queued and not s.in_flight)
+        for _, caller in idle[:len(idle) // 2 or 1]:
+            del self._callers[caller]
+
+    def enqueue(self, caller: str, klass: str, cost: float = 1.0) -> _Waiter | None:
+        stats = self._stats(caller)
+        if stats.queued >= self.max_depth:
+            stats.rejected += 1
+            return None
+        start = max(self.vtime, stats.last_finish)
+        stats.last_finish = start + cost / stats.weight
+        stats.queued += 1
+        waiter = _Waiter(caller, klass, stats.last_finish)
+        heapq.heappush(self._heap, (waiter.finish, next(self._seq), waiter))
+        return waiter
+
+    def pop_admissible(self, admissible: Callable[[str], bool]) -> _Waiter | None:
+        """Menor marca cuja classe cabe no limite agora (classes sem vaga ficam na fila)."""
+        held = []
+        found = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            waiter = entry[2]
+            if waiter.cancelled:
+                continue
+            if admissible(waiter.klass):
+                found = waiter
+                break
+            held.append(entry)
+        for entry in held:
+            heapq.heappush(self._heap, entry)
+        if found is not None:
+            self.vtime = max(self.vtime, found.finish)
+        return found
+
+    def granted(self, waiter: _Waiter) -> None:
+        stats = self._stats(waiter.caller)
+        wait_ms = (time.monotonic() - waiter.enqueued_at) * 1000
+        stats.queued -= 1
+        stats.in_flight += 1
+        stats.admitted += 1
+        stats.wait_count += 1
+        stats.wait_total_ms += wait_ms
+        stats.wait_max_ms = max(stats.wait_max_ms, wait_ms)
+        waiter.granted = True
+        waiter.event.set()
+
+    def cancel(self, waiter: _Waiter) -> None:
+        """Prazo de espera esgotado: sai da fila (removida da heap sob demanda)."""
+        waiter.cancelled = True
+        stats = self._stats(waiter.caller)
+        stats.queued -= 1
+        stats.timeouts += 1
+        stats.rejected += 1
+
+    def release(self, caller: str) -> None:
+        stats = self._callers.get(caller)
+        if stats is not None:
+            stats.in_flight -= 1
+
+    def status(self) -> Dict[str, Any]:
+        callers = []
+        for caller, s in self._callers.items():
+            callers.append({
+                "caller": caller,
+                "weight": s.weight,
+                "queued": s.queued,
+                "in_flight": s.in_flight,
+                "admitted": s.admitted,
+                "rejected": s.rejected,
+                "timeouts": s.timeouts,
+                "wait_avg_ms": round(s.wait_total_ms / s.wait_count, 1) if s.wait_count else 0.0,
+                "wait_max_ms": round(s.wait_max_ms, 1),
+            })
+        callers.sort(key=lambda c: (c["queued"], c["admitted"]), reverse=True)
+        return {
+            "max_depth": self.max_depth,
+            "max_wait_s": self.max_wait,
+            "queued": sum(1 for _, _, w in self._heap if not w.cancelled),
+            "callers": callers,
+        }
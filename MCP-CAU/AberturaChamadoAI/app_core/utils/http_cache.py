@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from functools import wraps
+from typing import Callable
+from flask import Response, current_app, request
+
+
+# Respostas que só mudam com um novo deploy (índice, mapa de rotas)
+CACHE_ESTATICO = "public, max-age=300"
+
+
+def cache_control_usuario(ttl: float) -> str:
+    # Dados pessoais: apenas cache do cliente; sem TTL, revalidar sempre via ETag
+    return f"private, max-age={int(ttl)}" if ttl > 0 else "private, no-cache"
+
+
+def condicional(resp: Response, cache_control: str) -> Response:
+    """
+    ETag forte (hash do corpo) + Cache-Control numa resposta 200 e tratamento de
+    If-None-Match: corpo idêntico ao que o cliente já tem vira 304 sem corpo.
+    """
+    if resp.status_code != 200:
+        return resp
+    resp.headers["Cache-Control"] = cache_control
+    resp.add_etag()
+    return resp.make_conditional(request)
+
+
+def resposta_estatica(cache_control: str = CACHE_ESTATICO) -> Callable:
+    """
+    Memoiza por app o corpo renderizado da rota (e seu ETag) na primeira chamada;
+    as seguintes só copiam bytes ou respondem 304.
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.setdefault("http_static_cache", {})
+            entry = cache.get(request.endpoint)
+            if entry is None:
+                resp = current_app.make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+                resp.add_etag()
+                entry = (resp.get_data(), resp.mimetype, resp.get_etag()[0])
+                cache[request.endpoint] = entry
+            data, mimetype, etag = entry
+            resp = Response(data, mimetype=mimetype)
+            resp.set_etag(etag)
+            resp.headers["Cache-Control"] = cache_control
+            return resp.make_conditional(request)
+        return wrapper
+    return decorator
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+from flask import Flask, g
+from ..services.glpi import encerrar_sessao_servico
+from ..services.glpi_db import fechar_backend_sql
+from ..services.glpi_http import fechar_pool
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTracker:
+    """
+    Conta as requisições em andamento (before_request/teardown_request) para que o
+    encerramento espere por elas em vez de cortá-las no meio (ex.: POST /Ticket).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.started = 0
+        self.finished = 0
+
+    def install(self, app: Flask) -> None:
+        @app.before_request
+        def _track_start():
+            with self._cond:
+                self.in_flight += 1
+                self.started += 1
+            g._tracked = True
+
+        @app.teardown_request
+        def _track_end(exc):
+            # Um before_request anterior pode ter falhado antes da contagem
+            if not g.pop("_tracked", False):
+                return
+            with self._cond:
+                self.in_flight -= 1
+                self.finished += 1
+                if self.in_flight == 0:
+                    self._cond.notify_all()
+
+        app.extensions["request_tracker"] = self
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Espera até não haver requisições em andamento; False se o prazo acabar antes."""
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            while self.in_flight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+
+def encerrar_app(app: Flask, drain_timeout: float, parar_servidor: Callable[[], None] | None = None,
+                 grace_period: float = 0.0) -> Dict[str, Any]:
+    """
+    Sequência de encerramento ordenado:
+
+    1. prontidão passa a false (/api/health/ready -> 503);
+    2. espera `grace_period` para o balanceador/monitor tirar a instância de rotação;
+    3. `parar_servidor()` (ex.: `server.shutdown`): para de aceitar conexões novas;
+    4. espera as requisições em andamento até `drain_timeout`;
+    5. para threads de background, grava o profiling pendente e encerra a sessão de
+       serviço do GLPI e os pools de conexão (REST e banco).
+
+    O socket do servidor só deve ser fechado (`server_close`) depois do retorno.
+    Retorna o relatório (tempo de drenagem e requisições abandonadas no prazo).
+    """
+    started = time.monotonic()
+    prober = app.extensions.get("glpi_health_prober")
+    if prober is not None:
+        prober.draining = True
+    if grace_period > 0:
+        time.sleep(grace_period)
+    grace_ms = round((time.monotonic() - started) * 1000, 1)
+    if parar_servidor is not None:
+        parar_servidor()
+
+    drain_started = time.monotonic()
+    tracker: RequestTracker | None = app.extensions.get("request_tracker")
+    in_flight_at_start = tracker.in_flight if tracker else 0
+    finished_before = tracker.finished if tracker else 0
+    drained = tracker.wait_idle(drain_timeout) if tracker else True
+    drain_ms = round((time.monotonic() - drain_started) * 1000, 1)
+    report = {
+        "drained": drained,
+        "grace_ms": grace_ms,
+        "drain_ms": drain_ms,
+        "in_flight_at_start": in_flight_at_start,
+        "completed_during_drain": (tracker.finished - finished_before) if tracker else 0,
+        "dropped": tracker.in_flight if tracker else 0,
+    }
+
+    if prober is not None:
+        prober.stop()
+    user_directory = app.extensions.get("user_directory")
+    if user_directory is not None:
+        user_directory.stop()
+    kb_index = app.extensions.get("kb_index")
+    if kb_index is not None:
+        kb_index.stop()
+    limiter = app.extensions.get("concurrency_limiter")
+    if limiter is not None:
+        limiter.uninstall()
+    memory = app.extensions.get("memory_diagnostics")
+    if memory is not None:
+        memory.stop_rss_logger()
+    profiler = app.extensions.get("request_profiler")
+    if profiler is not None:
+        try:
+            profiler.flush()
+        except Exception as e:
+            logger.warning(f"Falha ao gravar profiling no encerramento: {str(e)}")
+    report["service_session_killed"] = encerrar_sessao_servico()
+    fechar_pool()
+    fechar_backend_sql()
+    report["shutdown_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+    if drained:
+        logger.info(f"Encerramento: {in_flight_at_start} requisição(ões) drenada(s) em {drain_ms}ms")
+    else:
+        logger.warning(f"Encerramento: prazo de {drain_timeout:.0f}s esgotado com {report['dropped']} "
+                       f"requisição(ões) em andamento")
+    return report
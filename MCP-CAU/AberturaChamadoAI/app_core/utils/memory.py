@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+import gc
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List
+
+
+logger = logging.getLogger(__name__)
+
+# Frames do próprio tracemalloc/importlib poluem o top de alocações
+_TRACE_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def rss_bytes() -> int | None:
+    """RSS atual do processo (Linux via /proc; demais sistemas: pico via resource)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    try:
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS reporta bytes; Linux/BSD, kilobytes
+        return maxrss if os.uname().sysname == "Darwin" else maxrss * 1024
+    except Exception:
+        return None
+
+
+def _mb(value: int | None) -> float | None:
+    return None if value is None else round(value / (1024 * 1024), 2)
+
+
+def _stat_to_dict(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {
+        "site": f"{frame.filename}:{frame.lineno}",
+        "size_kb": round(stat.size / 1024, 1),
+        "count": stat.count,
+    }
+
+
+def _diff_to_dict(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {
+        "site": f"{frame.filename}:{frame.lineno}",
+        "size_diff_kb": round(stat.size_diff / 1024, 1),
+        "size_kb": round(stat.size / 1024, 1),
+        "count_diff": stat.count_diff,
+        "count": stat.count,
+    }
+
+
+class MemoryDiagnostics:
+    """
+    Diagnóstico de memória sob demanda, sem reiniciar o processo com flags especiais.
+
+    - tracemalloc é ligado/desligado em tempo de execução; snapshots nomeados (limitados)
+      permitem top de alocações e diff entre dois momentos.
+    - Contagem de objetos por tipo via gc.
+    - Log periódico do RSS numa thread própria (intervalo 0 desativa).
+    """
+
+    def __init__(self, max_snapshots: int = 5, rss_log_interval: float = 0.0):
+        self.max_snapshots = max(1, max_snapshots)
+        self.rss_log_interval = rss_log_interval
+        self._snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # tracemalloc
+    def start_tracing(self, frames: int = 10) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, frames))
+            logger.info(f"tracemalloc iniciado ({frames} frames)")
+
+    def stop_tracing(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("tracemalloc parado")
+        with self._lock:
+            # Snapshots antigos não são comparáveis com uma nova sessão de tracing
+            self._snapshots.clear()
+
+    def take_snapshot(self, label: str | None = None) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc não está ativo; inicie o tracing antes do snapshot")
+        label = label or time.strftime("snap-%H%M%S")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+        current, peak = tracemalloc.get_traced_memory()
+        meta = {
+            "label": label,
+            "taken_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "traced_mb": _mb(current),
+            "traced_peak_mb": _mb(peak),
+            "rss_mb": _mb(rss_bytes()),
+        }
+        with self._lock:
+            self._snapshots.pop(label, None)
+            self._snapshots[label] = {"snapshot": snapshot, "meta": meta}
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return meta
+
+    def _get(self, label: str):
+        with self._lock:
+            entry = self._snapshots.get(label)
+        if entry is None:
+            raise KeyError(label)
+        return entry["snapshot"]
+
+    def top(self, label: str, limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+        stats = self._get(label).statistics(group_by)
+        return [_stat_to_dict(s) for s in stats[:limit]]
+
+    def diff(self, base: str, target: str | None = None, limit: int = 20,
+             group_by: str = "lineno") -> List[Dict[str, Any]]:
+        base_snap = self._get(base)
+        if target:
+            target_snap = self._get(target)
+        else:
+            target_snap = self._get(self.take_snapshot()["label"])
+        stats = target_snap.compare_to(base_snap, group_by)
+        return [_diff_to_dict(s) for s in stats[:limit]]
+
+    # gc
+    @staticmethod
+    def object_counts(limit: int = 30) -> List[Dict[str, Any]]:
+        counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+        return [{"type": name, "count": count} for name, count in counts.most_common(limit)]
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (None, None)
+        with self._lock:
+            snapshots = [entry["meta"] for entry in self._snapshots.values()]
+        return {
+            "rss_mb": _mb(rss_bytes()),
+            "tracing": tracing,
+            "traced_mb": _mb(current),
+            "traced_peak_mb": _mb(peak),
+            "snapshots": snapshots,
+            "max_snapshots": self.max_snapshots,
+            "rss_log_interval": self.rss_log_interval,
+            "gc_counts": gc.get_count(),
+        }
+
+    # RSS periódico
+    def start_rss_logger(self) -> None:
+        if self.rss_log_interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._log_rss, name="rss-logger", daemon=True)
+        self._thread.start()
+
+    def stop_rss_logger(self) -> None:
+        self._stop.set()
+
+    def _log_rss(self) -> None:
+        baseline = rss_bytes()
+        while not self._stop.wait(self.rss_log_interval):
+            current = rss_bytes()
+            growth = None if current is None or baseline is None else _mb(current - baseline)
+            logger.info(f"RSS={_mb(current)}MB (crescimento desde o início: {growth}MB)")
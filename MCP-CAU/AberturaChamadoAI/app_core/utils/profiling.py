@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+import cProfile
+import io
+import json
+import logging
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List
+from flask import Flask, Response, g, request
+from ..config import Settings
+from .admin_auth import token_valido
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfiler:
+    """
+    Profiling por requisição com cProfile, agregado por rota.
+
+    - Perfila uma fração amostrada das requisições, rotas escolhidas ou requisições
+      marcadas com `X-Profile: 1` + `X-Admin-Token` válido.
+    - Estatísticas acumulam em memória e são gravadas em `<dir>/<rota>.pstats` (+ resumo .txt)
+      a cada `flush_every` amostras ou sob demanda; `index.jsonl` liga trace_id à rota e duração.
+    - Só é instalado quando PROFILING_ENABLED=true: desligado, nenhum hook é registrado.
+    """
+
+    def __init__(self, output_dir: str, sample_rate: float = 0.0, routes: List[str] | None = None,
+                 admin_token: str | None = None, flush_every: int = 50):
+        self.output_dir = Path(output_dir)
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        self.routes = set(routes or [])
+        self.admin_token = admin_token
+        self.flush_every = max(1, flush_every)
+        self.active = True
+        self._lock = threading.Lock()
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._pending: Dict[str, int] = {}
+        self._samples: Dict[str, int] = {}
+
+    def should_profile(self) -> bool:
+        if not self.active:
+            return False
+        if request.headers.get("X-Profile") == "1" and self._admin_ok():
+            return True
+        if request.path in self.routes:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _admin_ok(self) -> bool:
+        return token_valido(request.headers.get("X-Admin-Token"), self.admin_token)
+
+    def record(self, profile: cProfile.Profile, route: str, trace_id: str, duration_ms: float) -> None:
+        with self._lock:
+            stats = self._stats.get(route)
+            if stats is None:
+                self._stats[route] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+            self._pending[route] = self._pending.get(route, 0) + 1
+            self._samples[route] = self._samples.get(route, 0) + 1
+            should_flush = self._pending[route] >= self.flush_every
+        self._append_index({"trace_id": trace_id, "route": route, "method": request.method,
+                            "duration_ms": round(duration_ms, 2), "ts": time.strftime("%Y-%m-%dT%H:%M:%S")})
+        if should_flush:
+            self.flush([route])
+
+    def _append_index(self, entry: Dict[str, Any]) -> None:
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.output_dir / "index.jsonl", "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.warning(f"Falha ao gravar índice de profiling: {str(e)}")
+
+    @staticmethod
+    def _slug(route: str) -> str:
+        return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+
+    def flush(self, routes: List[str] | None = None) -> List[str]:
+        written = []
+        with self._lock:
+            targets = {r: s for r, s in self._stats.items() if routes is None or r in routes}
+            for route in targets:
+                self._pending[route] = 0
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            for route, stats in targets.items():
+                base = self.output_dir / self._slug(route)
+                stats.dump_stats(str(base.with_suffix(".pstats")))
+                summary = io.StringIO()
+                pstats.Stats(str(base.with_suffix(".pstats")), stream=summary).sort_stats("cumulative").print_stats(40)
+                base.with_suffix(".txt").write_text(summary.getvalue(), encoding="utf-8")
+                written.append(str(base.with_suffix(".pstats")))
+        return written
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._pending.clear()
+            self._samples.clear()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = dict(self._samples)
+        return {
+            "active": self.active,
+            "sample_rate": self.sample_rate,
+            "routes": sorted(self.routes),
+            "output_dir": str(self.output_dir),
+            "flush_every": self.flush_every,
+            "samples": samples,
+        }
+
+    def install(self, app: Flask) -> None:
+        @app.before_request
+        def _profiling_start():
+            if not self.should_profile():
+                return None
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+: apenas um profiler ativo por vez no processo
+                return None
+            g._profile = profile
+            g._profile_started = time.perf_counter()
+            g._profile_trace_id = str(uuid.uuid4())[:8]
+            return None
+
+        @app.after_request
+        def _profiling_stop(response: Response) -> Response:
+            profile = g.pop("_profile", None)
+            if profile is None:
+                return response
+            profile.disable()
+            duration_ms = (time.perf_counter() - g.pop("_profile_started")) * 1000
+            trace_id = g.pop("_profile_trace_id")
+            route = request.url_rule.rule if request.url_rule else request.path
+            try:
+                self.record(profile, route, trace_id, duration_ms)
+                response.headers["X-Profile-Trace-Id"] = trace_id
+            except Exception as e:
+                logger.warning(f"Falha ao registrar profiling: {str(e)}")
+            return response
+
+        @app.teardown_request
+        def _profiling_cleanup(exc):
+            # Exceção não tratada: after_request não roda, mas o profiler precisa ser desligado
+            profile = g.pop("_profile", None)
+            if profile is not None:
+                profile.disable()
+
+        app.extensions["request_profiler"] = self
+        logger.info(f"Profiling habilitado (amostragem {self.sample_rate:.2%}, rotas {sorted(self.routes)})")
+
+
+def instalar_profiling(app: Flask, settings: Settings) -> RequestProfiler | None:
+    if not settings.profiling_enabled:
+        return None
+    profiler = RequestProfiler(
+        output_dir=settings.profiling_output_dir,
+        sample_rate=settings.profiling_sample_rate,
+        routes=settings.profiling_routes,
+        admin_token=settings.admin_token,
+    )
+    profiler.install(app)
+    return profiler
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import json as _json
+from typing import Any, Dict, List
+from flask import Response, request
+
+
+# Prefixo das rotas que respondem sempre no contrato compacto
+V2_PREFIX = "/api/v2/"
+
+_TRUE = ("1", "true", "yes", "on")
+
+
+def modo_compacto() -> bool:
+    """
+    Contrato compacto solicitado pela requisição atual: prefixo /api/v2, `?compact=1`
+    ou header `X-Response-Mode: compact`. Sem nenhum deles, vale o contrato legado.
+    """
+    if request.path.startswith(V2_PREFIX):
+        return True
+    if str(request.args.get("compact", "")).strip().lower() in _TRUE:
+        return True
+    return request.headers.get("X-Response-Mode", "").strip().lower() == "compact"
+
+
+def campos_solicitados() -> List[str] | None:
+    """Lista de `fields=a,b,c` (None quando ausente: devolver todos os campos)."""
+    raw = request.args.get("fields")
+    if raw is None:
+        return None
+    campos = [c.strip() for c in raw.split(",") if c.strip()]
+    return campos or None
+
+
+def projetar_campos(data: Dict[str, Any], campos: List[str] | None) -> Dict[str, Any]:
+    if not campos:
+        return data
+    return {k: data[k] for k in campos if k in data}
+
+
+def resposta_compacta(data: Any = None, status: int = 200, error: str | None = None,
+                      message: str | None = None, **extra: Any) -> Response:
+    """
+    Envelope de idioma único e JSON sem indentação:
+    `{"success": true, "data": {...}}` ou `{"success": false, "error": {"code", "message"}}`.
+    """
+    body: Dict[str, Any] = {"success": error is None}
+    if error is None:
+        body["data"] = data
+    else:
+        body["error"] = {"code": error, "message": message}
+    body.update(extra)
+    payload = _json.dumps(body, ensure_ascii=False, separators=(",", ":"))
+    return Response(payload, status=status, mimetype="application/json")
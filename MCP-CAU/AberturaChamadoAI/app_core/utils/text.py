@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import re
+import unicodedata
+from typing import List
+
+
+_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+
+def dobrar_acentos(texto: str) -> str:
+    """'Não imprime' -> 'Nao imprime' (remove diacríticos; ç -> c)."""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def normalizar_texto(texto: str | None) -> str:
+    """Minúsculas, sem acentos, só letras/dígitos separados por um espaço."""
+    if not texto:
+        return ""
+    return _NAO_ALFANUMERICO.sub(" ", dobrar_acentos(texto).lower()).strip()
+
+
+def tokenizar(texto: str | None) -> List[str]:
+    """Palavras normalizadas de `texto` (ver normalizar_texto)."""
+    normalizado = normalizar_texto(texto)
+    return normalizado.split() if normalizado else []
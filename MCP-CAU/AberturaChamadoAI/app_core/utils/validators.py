@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from typing import Any, Dict, List, Tuple
 
 def is_powerfx_expression(value) -> bool:
     if isinstance(value, str):
@@ -12,3 +13,148 @@ def is_powerfx_expression(value) -> bool:
     return False
 
 
+
+
+VAGUE_WORDS = ['problema', 'erro', 'não funciona', 'quebrado', 'ruim', 'lento', 'travando', 'bug']
+
+# Violações fixas (somente leitura), compartilhadas por validar_chamado e listar_violacoes
+_DESCRICAO_OBRIGATORIA = {"error": "Campo 'description/descricao' é obrigatório", "erro": "Campo 'description/descricao' é obrigatório"}
+_DESCRICAO_VAGA = {"error": "Descrição muito vaga", "erro": "Por favor, seja mais específico."}
+_TELEFONE_INVALIDO = {"error": "Telefone inválido", "erro": "Telefone inválido"}
+_TITULO_OBRIGATORIO = {"error": "Campo 'title/titulo' é obrigatório", "erro": "Campo 'title/titulo' é obrigatório"}
+_CATEGORIA_OBRIGATORIA = {"error": "Campo 'category/categoria' é obrigatório", "erro": "Campo 'category/categoria' é obrigatório"}
+_IMPACTO_OBRIGATORIO = {"error": "Campo 'impact/impacto' é obrigatório", "erro": "Campo 'impact/impacto' é obrigatório"}
+_LOCAL_INVALIDO = {"error": "Localização inválida", "erro": "Localização inválida"}
+
+
+def _descricao_curta(content_length: int) -> Dict[str, Any]:
+    return {
+        "error": "Descrição muito curta",
+        "erro": "O conteúdo total do chamado está curto. Inclua mais detalhes.",
+        "details": {"current_length": content_length, "required_length": 50},
+    }
+
+
+# Ordem dos argumentos de validar_chamado
+_CAMPOS_CHAMADO = ("description", "title", "category", "impact", "location", "contact_phone")
+# Tipos que seguem direto pelas regras (o resto passa por _como_texto)
+_TIPOS_TEXTO = frozenset((str, type(None)))
+
+
+def _tipo_invalido(campo: str, valor: Any) -> Dict[str, Any]:
+    mensagem = f"Campo '{campo}' deve ser texto"
+    return {"error": mensagem, "erro": mensagem, "details": {"field": campo, "received_type": type(valor).__name__}}
+
+
+def _como_texto(campo: str, valor: Any) -> Tuple[str | None, Dict[str, Any] | None]:
+    """Números viram texto (telefone enviado como número, por exemplo); objetos, listas e booleanos são violação."""
+    if valor is None or isinstance(valor, str):
+        return valor, None
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return str(valor), None
+    return None, _tipo_invalido(campo, valor)
+
+
+def validar_chamado(description, title, category, impact, location, contact_phone) -> Dict[str, Any] | None:
+    """
+    Regras de conteúdo do chamado (sem acesso a GLPI ou settings).
+
+    Retorna a primeira violação encontrada como {"error", "erro"[, "details"]} ou None se válido.
+    A ordem das verificações é a mesma exposta historicamente por /api/create-ticket-complete.
+    """
+    if not description:
+        return _DESCRICAO_OBRIGATORIA
+
+    if not (type(description) in _TIPOS_TEXTO and type(title) in _TIPOS_TEXTO and type(category) in _TIPOS_TEXTO
+            and type(impact) in _TIPOS_TEXTO and type(location) in _TIPOS_TEXTO
+            and type(contact_phone) in _TIPOS_TEXTO):
+        textos = []
+        valores = (description, title, category, impact, location, contact_phone)
+        for campo, valor in zip(_CAMPOS_CHAMADO, valores):
+            texto, violacao = _como_texto(campo, valor)
+            if violacao:
+                return violacao
+            textos.append(texto)
+        description, title, category, impact, location, contact_phone = textos
+
+    content_parts_validate = [description or ""]
+    if location:
+        content_parts_validate.append(f"Local: {location}")
+    if contact_phone:
+        content_parts_validate.append(f"Telefone: {contact_phone}")
+    if category:
+        content_parts_validate.append(f"Categoria: {category}")
+    full_content_validate = "\n\n".join(filter(None, content_parts_validate))
+    content_length = len(full_content_validate.strip())
+    if content_length < 50:
+        return _descricao_curta(content_length)
+
+    description_lower = description.lower()
+    found_vague_words = [word for word in VAGUE_WORDS if word in description_lower]
+    if found_vague_words and content_length < 100:
+        return _DESCRICAO_VAGA
+
+    if not contact_phone or len(contact_phone.strip()) < 8:
+        return _TELEFONE_INVALIDO
+    if not title:
+        return _TITULO_OBRIGATORIO
+    if not category:
+        return _CATEGORIA_OBRIGATORIA
+    if not impact:
+        return _IMPACTO_OBRIGATORIO
+    if not location or len(location.strip()) < 3:
+        return _LOCAL_INVALIDO
+    return None
+
+
+_ERROS_DESCRICAO = (_DESCRICAO_OBRIGATORIA["error"], "Descrição muito curta", _DESCRICAO_VAGA["error"])
+
+
+def _violacao_descricao(d: Dict[str, Any]) -> Dict[str, Any] | None:
+    # As regras da descrição vêm primeiro em validar_chamado e dependem de local, telefone e
+    # categoria (mínimo do conteúdo total); violações dos demais campos são ignoradas aqui
+    violacao = validar_chamado(d.get("description"), "-", d.get("category"), "-",
+                               d.get("location"), d.get("contact_phone"))
+    return violacao if violacao and violacao["error"] in _ERROS_DESCRICAO else None
+
+
+# Campo do rascunho -> regra (mesmas de validar_chamado, na mesma ordem)
+REGRAS_POR_CAMPO = {
+    "description": _violacao_descricao,
+    "contact_phone": lambda d: _TELEFONE_INVALIDO if not d.get("contact_phone") or len(d["contact_phone"].strip()) < 8 else None,
+    "title": lambda d: None if d.get("title") else _TITULO_OBRIGATORIO,
+    "category": lambda d: None if d.get("category") else _CATEGORIA_OBRIGATORIA,
+    "impact": lambda d: None if d.get("impact") else _IMPACTO_OBRIGATORIO,
+    "location": lambda d: _LOCAL_INVALIDO if not d.get("location") or len(d["location"].strip()) < 3 else None,
+}
+
+_CODIGOS = {"Descrição muito curta": "too_short", _DESCRICAO_VAGA["error"]: "too_vague",
+            _TELEFONE_INVALIDO["error"]: "invalid", _LOCAL_INVALIDO["error"]: "invalid"}
+
+
+def listar_violacoes(rascunho: Dict[str, Any], campos: List[str] | None = None) -> List[Dict[str, Any]]:
+    """
+    Todas as violações do rascunho (ou só dos `campos` pedidos), na ordem de validar_chamado.
+
+    Cada item: {"field", "code", "error", "erro"[, "details"]}, com `code` required, too_short,
+    too_vague, invalid ou invalid_type (objeto, lista ou booleano; números são aceitos como texto). Sem acesso a GLPI ou settings.
+    """
+    # Tipo errado é violação do próprio campo; para as demais regras ele conta como ausente
+    textos: Dict[str, Any] = {}
+    tipos: Dict[str, Dict[str, Any]] = {}
+    for campo in REGRAS_POR_CAMPO:
+        textos[campo], violacao = _como_texto(campo, rascunho.get(campo))
+        if violacao:
+            tipos[campo] = violacao
+
+    violacoes = []
+    for campo, regra in REGRAS_POR_CAMPO.items():
+        if campos is not None and campo not in campos:
+            continue
+        if campo in tipos:
+            violacoes.append({"field": campo, "code": "invalid_type", **tipos[campo]})
+            continue
+        violacao = regra(textos)
+        if violacao:
+            violacoes.append({"field": campo, "code": _CODIGOS.get(violacao["error"], "required"), **violacao})
+    return violacoes
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Utilidades compartilhadas pelos benchmarks (bench_load, bench_micro):
+percentis, metadados da execução, gravação em JSON e comparação com baseline.
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+RESULTS_DIR = Path(__file__).resolve().parent.parent / "bench_results"
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentil por nearest-rank sobre uma lista (ordenada ou não)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(latencies_ms)
+
+    def r(v: Optional[float]) -> Optional[float]:
+        return None if v is None else round(v, 3)
+
+    return {
+        "mean": r(sum(ordered) / len(ordered)) if ordered else None,
+        "p50": r(percentile(ordered, 50)),
+        "p90": r(percentile(ordered, 90)),
+        "p95": r(percentile(ordered, 95)),
+        "p99": r(percentile(ordered, 99)),
+        "max": r(ordered[-1]) if ordered else None,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_metadata(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+    }
+
+
+def save_results(results: Dict[str, Any], output: Optional[str], prefix: str) -> Path:
+    if output:
+        path = Path(output)
+    else:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = RESULTS_DIR / f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare_metrics(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+                    metrics: Iterable[str], threshold: float,
+                    higher_is_better: Iterable[str] = ()) -> List[str]:
+    """
+    Compara métricas por cenário e retorna as regressões acima do limiar relativo.
+
+    - `metrics` usa caminhos com ponto (ex.: "latency_ms.p95").
+    - Métricas em `higher_is_better` regridem quando caem; as demais quando sobem.
+    """
+    better_up = set(higher_is_better)
+    regressions = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in metrics:
+            c, b = _dig(cur, metric), _dig(base, metric)
+            if not isinstance(c, (int, float)) or not isinstance(b, (int, float)) or b == 0:
+                continue
+            change = (c - b) / abs(b)
+            if metric in better_up:
+                change = -change
+            if change > threshold:
+                regressions.append(f"{name}: {metric} {b:g} -> {c:g} ({change:+.1%})")
+    return regressions
+
+
+def _dig(obj: Dict[str, Any], dotted: str) -> Any:
+    for part in dotted.split("."):
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(part)
+    return obj
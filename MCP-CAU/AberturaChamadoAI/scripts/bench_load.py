@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga ponta a ponta dos endpoints usados pelo Copilot Studio.
+
+Por padrão sobe, no mesmo processo, o GLPI falso (fake_glpi_server) e a API (create_app)
+e executa cenários concorrentes:
+- auth_email:    POST /api/authenticate-user com e-mail + senha
+- user_lookup:   GET  /api/glpi-user-by-email
+- create_ticket: POST /api/create-ticket-complete com aliases em português
+
+Para cada cenário reporta vazão, percentis de latência, taxa de erro e chamadas ao GLPI
+por requisição (contadores do stand-in). O resultado é salvo em JSON e pode ser comparado
+com um baseline para barrar regressões antes do deploy.
+
+Execução (a partir de MCP-CAU/):
+    python -m AberturaChamadoAI.scripts.bench_load --requests 300 --concurrency 16
+    python -m AberturaChamadoAI.scripts.bench_load --compare bench_results/load-base.json --threshold 0.15
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import requests
+
+from .bench_common import compare_metrics, latency_summary, load_results, run_metadata, save_results
+from .fake_glpi_server import EndpointProfile, FakeGlpiConfig, FakeGlpiServer, generate_users
+from .glpi_sqlite_standin import build as build_standin
+
+
+SCENARIOS = ("auth_email", "user_lookup", "create_ticket")
+
+DESCRICOES = [
+    "A impressora do segundo andar não puxa papel desde ontem de manhã, já reiniciei e troquei a bandeja.",
+    "O computador da recepção desliga sozinho depois de alguns minutos ligado, com cheiro de queimado na fonte.",
+    "Não consigo acessar a pasta compartilhada do setor financeiro, aparece acesso negado desde a troca de senha.",
+    "O Wi-Fi da sala de reuniões 3 cai a cada poucos minutos e as chamadas de vídeo ficam interrompidas.",
+]
+CATEGORIAS = ["HARDWARE_IMPRESSORA", "HARDWARE_COMPUTADOR", "SEGURANCA", "CONECTIVIDADE", "SOFTWARE"]
+IMPACTOS = ["BAIXO", "MEDIO", "ALTO", "MUITO_ALTO"]
+
+
+class Scenario:
+    def __init__(self, name: str, emails: List[str], password: str, seed: int):
+        self.name = name
+        self.emails = emails
+        self.password = password
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _pick(self) -> str:
+        with self._lock:
+            return self._rng.choice(self.emails)
+
+    def build(self, base_url: str) -> Tuple[str, str, Dict[str, Any]]:
+        email = self._pick()
+        if self.name == "auth_email":
+            return "POST", f"{base_url}/api/authenticate-user", {"json": {"email": email, "senha": self.password}}
+        if self.name == "user_lookup":
+            return "GET", f"{base_url}/api/glpi-user-by-email", {"params": {"email": email}}
+        with self._lock:
+            descricao = self._rng.choice(DESCRICOES)
+            categoria = self._rng.choice(CATEGORIAS)
+            impacto = self._rng.choice(IMPACTOS)
+        body = {
+            "titulo": "Chamado de benchmark",
+            "descricao": descricao,
+            "categoria": categoria,
+            "impacto": impacto,
+            "localizacao": "Prédio principal, sala 201",
+            "telefone": "51999999999",
+            "usuario_email": email,
+        }
+        return "POST", f"{base_url}/api/create-ticket-complete", {"json": body}
+
+
+def run_scenario(scenario: Scenario, base_url: str, total: int, concurrency: int,
+                 glpi_stats: Callable[[], Dict[str, Any]], glpi_reset: Callable[[], None]) -> Dict[str, Any]:
+    local = threading.local()
+
+    def one(_: int) -> Tuple[float, int]:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        method, url, kwargs = scenario.build(base_url)
+        started = time.perf_counter()
+        try:
+            resp = session.request(method, url, timeout=60, **kwargs)
+            status = resp.status_code
+        except Exception:
+            status = 0
+        return (time.perf_counter() - started) * 1000, status
+
+    glpi_reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+    stats = glpi_stats()
+
+    latencies = [lat for lat, _ in samples]
+    errors = sum(1 for _, status in samples if not 200 <= status < 300)
+    status_counts: Dict[str, int] = {}
+    for _, status in samples:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+    calls = stats.get("calls", {})
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "status_counts": status_counts,
+        "latency_ms": latency_summary(latencies),
+        "glpi_calls_per_request": round(stats.get("total_calls", 0) / total, 3) if total else None,
+        "glpi_calls_by_endpoint": {k: round(v / total, 3) for k, v in sorted(calls.items())},
+    }
+
+
+def start_local_app(glpi_url: str, app_token: str, user_token: str):
+    """Sobe create_app() num servidor werkzeug threaded em porta livre."""
+    os.environ.update({
+        "GLPI_URL": glpi_url,
+        "GLPI_APP_TOKEN": app_token,
+        "GLPI_USER_TOKEN": user_token,
+        # O prober geraria chamadas ao GLPI fora das requisições medidas
+        "HEALTH_PROBE_ENABLED": "false",
+    })
+    from werkzeug.serving import make_server
+    from AberturaChamadoAI.app_core import create_app
+
+    server = make_server("127.0.0.1", 0, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-app", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    print(f"\n{'cenário':<14} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'erro':>7} {'glpi/req':>9}")
+    print("-" * 68)
+    for name, r in results["scenarios"].items():
+        lat = r["latency_ms"]
+        print(f"{name:<14} {r['throughput_rps'] or 0:>8.1f} {lat['p50'] or 0:>8.1f} {lat['p95'] or 0:>8.1f} "
+              f"{lat['p99'] or 0:>8.1f} {r['error_rate']:>7.1%} {r['glpi_calls_per_request'] or 0:>9.2f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de carga dos endpoints do agente GLPI")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Repetível; padrão: todos")
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10, help="Requisições descartadas por cenário")
+    parser.add_argument("--users", type=int, default=2000, help="Usuários sintéticos no GLPI falso")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--glpi-latency", default="lognormal:20:0.4", help="Distribuição aplicada a todos os endpoints")
+    parser.add_argument("--glpi-url", help="GLPI falso externo (precisa expor /_fake/stats)")
+    parser.add_argument("--app-url", help="API externa já apontada para o mesmo GLPI falso")
+    parser.add_argument("--password", default="senha123")
+    parser.add_argument("--user-backend", choices=("rest", "sql"), default="rest",
+                        help="sql: busca de usuários num stand-in SQLite com os mesmos usuários")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: bench_results/load-<ts>.json)")
+    parser.add_argument("--compare", help="JSON de baseline para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Regressão relativa tolerada")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # Logs da API em WARNING para não distorcer a medição
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    fake = None
+    glpi_url = args.glpi_url
+    if not glpi_url:
+        config = FakeGlpiConfig(users=args.users, seed=args.seed, password=args.password,
+                                profiles={"default": EndpointProfile(latency=args.glpi_latency)})
+        fake = FakeGlpiServer(config).start()
+        glpi_url = fake.base_url
+    control = requests.Session()
+
+    def glpi_stats() -> Dict[str, Any]:
+        return control.get(f"{glpi_url}/_fake/stats", timeout=10).json()
+
+    def glpi_reset() -> None:
+        control.post(f"{glpi_url}/_fake/reset", timeout=10)
+
+    app_server = None
+    base_url = args.app_url
+    if args.user_backend == "sql" and not base_url:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="bench-glpi-"), "glpi-standin.db")
+        build_standin(db_path, args.users, args.seed)
+        os.environ.update({"USER_LOOKUP_BACKEND": "sql", "USER_DB_URL": f"sqlite:///{db_path}"})
+    if not base_url:
+        defaults = FakeGlpiConfig()
+        app_server, base_url = start_local_app(glpi_url, defaults.app_token, defaults.user_token)
+
+    users = generate_users(args.users, args.seed)[1:]  # sem o usuário de serviço
+    emails = [u["email"] for u in users]
+
+    results: Dict[str, Any] = {
+        "meta": run_metadata({k: v for k, v in vars(args).items() if k not in ("output", "compare")}),
+        "scenarios": {},
+    }
+    try:
+        for name in args.scenario or SCENARIOS:
+            scenario = Scenario(name, emails, args.password, args.seed)
+            if args.warmup:
+                run_scenario(scenario, base_url, args.warmup, min(args.concurrency, args.warmup), glpi_stats, glpi_reset)
+            results["scenarios"][name] = run_scenario(scenario, base_url, args.requests, args.concurrency,
+                                                      glpi_stats, glpi_reset)
+    finally:
+        if app_server:
+            app_server.shutdown()
+        if fake:
+            fake.stop()
+
+    print_report(results)
+    path = save_results(results, args.output, "load")
+    print(f"\nResultados salvos em {path}")
+
+    if args.compare:
+        baseline = load_results(args.compare)
+        regressions = compare_metrics(
+            results["scenarios"], baseline.get("scenarios", {}),
+            metrics=("latency_ms.p95", "latency_ms.p99", "throughput_rps", "error_rate", "glpi_calls_per_request"),
+            threshold=args.threshold,
+            higher_is_better=("throughput_rps",),
+        )
+        if regressions:
+            print("\nREGRESSÕES detectadas:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nSem regressões acima de {args.threshold:.0%} em relação a {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
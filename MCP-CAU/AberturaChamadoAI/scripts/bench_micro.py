@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks das funções puras do caminho quente (sem rede, sem Flask):
+
+- mapear_categoria, calcular_prioridade (services.glpi)
+- is_powerfx_expression e a varredura PowerFx do corpo (utils.validators)
+- validar_chamado: bloco de validação de /api/create-ticket-complete
+- selecionar_usuario: seleção de linha e projeção (ColumnProjector) de /search/User
+
+Cada caso roda um número fixo de iterações, repetido algumas vezes; reporta-se a mediana
+e o mínimo em ns/op. Entradas representativas e adversariais (descrições enormes, corpos
+com milhares de chaves aninhadas, milhares de linhas de busca).
+
+Execução (a partir de MCP-CAU/):
+    python -m AberturaChamadoAI.scripts.bench_micro --save-baseline bench_results/micro-baseline.json
+    python -m AberturaChamadoAI.scripts.bench_micro --baseline bench_results/micro-baseline.json --threshold 0.25
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from AberturaChamadoAI.app_core.services.glpi import calcular_prioridade, mapear_categoria, selecionar_usuario
+from AberturaChamadoAI.app_core.services.glpi_schema import compilar_projetor
+from AberturaChamadoAI.app_core.utils.validators import is_powerfx_expression, validar_chamado
+
+from .bench_common import compare_metrics, load_results, run_metadata, save_results
+
+
+Case = Tuple[str, Callable[[], Any], int]
+
+
+def _search_rows(count: int, match_at: int | None) -> List[Dict[str, Any]]:
+    rows = []
+    for i in range(count):
+        login = f"usuario.{i}"
+        rows.append({"1": login, "2": 10 + i, "5": f"{login}@example.gov.br", "9": "Nome", "34": "Sobrenome"})
+    if match_at is not None:
+        rows[match_at]["5"] = "alvo@example.gov.br"
+    return rows
+
+
+def _nested_body(keys: int, depth: int) -> Dict[str, Any]:
+    def nest(level: int) -> Any:
+        return {"v": "texto comum"} if level == 0 else {"n": nest(level - 1)}
+    body: Dict[str, Any] = {f"campo_{i}": nest(depth) for i in range(keys)}
+    body.update({"descricao": "=Topic.Descricao", "titulo": "{Topic.Titulo}"})
+    return body
+
+
+def _powerfx_scan(body: Dict[str, Any]) -> List[str]:
+    # Mesmo laço usado pelas rotas antes de processar o corpo
+    return [f"{k}: {v}" for k, v in body.items() if is_powerfx_expression(v)]
+
+
+def build_cases() -> List[Case]:
+    descricao = "A impressora do segundo andar não puxa papel desde ontem de manhã, já reiniciei e troquei a bandeja."
+    huge = ("Texto de descrição repetido com detalhes do problema relatado. " * 4000)  # ~250 KB
+    huge_vague = huge + " não funciona"
+    braces_huge = "{" + ("x" * 1_000_000) + "}"
+    rows_5000_last = _search_rows(5000, match_at=4999)
+    rows_5000_none = _search_rows(5000, match_at=None)
+    rows_multi = _search_rows(5000, match_at=None)
+    rows_multi[-1]["5"] = "outro@example.gov.br$$##$$alvo@example.gov.br"
+    projetor = compilar_projetor("User", {})
+    body_wide = _nested_body(keys=2000, depth=2)
+    body_deep = _nested_body(keys=10, depth=200)
+
+    return [
+        ("mapear_categoria/conhecida", lambda: mapear_categoria("HARDWARE_IMPRESSORA"), 200_000),
+        ("mapear_categoria/normalizada", lambda: mapear_categoria("  hardware_impressora "), 200_000),
+        ("mapear_categoria/int", lambda: mapear_categoria(5), 200_000),
+        ("mapear_categoria/desconhecida", lambda: mapear_categoria("CATEGORIA_INEXISTENTE"), 50_000),
+        ("calcular_prioridade/impacto", lambda: calcular_prioridade("ALTO"), 200_000),
+        ("calcular_prioridade/ambos", lambda: calcular_prioridade("medio", "muito_alta"), 200_000),
+        ("calcular_prioridade/invalido", lambda: calcular_prioridade("???", "???"), 200_000),
+        ("is_powerfx/texto", lambda: is_powerfx_expression(descricao), 200_000),
+        ("is_powerfx/expressao", lambda: is_powerfx_expression("=Topic.Descricao"), 200_000),
+        ("is_powerfx/nao_str", lambda: is_powerfx_expression({"a": 1}), 200_000),
+        ("is_powerfx/chaves_1MB", lambda: is_powerfx_expression(braces_huge), 200),
+        ("powerfx_scan/2000_chaves", lambda: _powerfx_scan(body_wide), 500),
+        ("powerfx_scan/aninhado_200", lambda: _powerfx_scan(body_deep), 50_000),
+        ("validar_chamado/valido", lambda: validar_chamado(descricao, "Impressora", "HARDWARE_IMPRESSORA", "ALTO",
+                                                          "Sala 201", "51999999999"), 100_000),
+        ("validar_chamado/curto", lambda: validar_chamado("erro", "t", "SOFTWARE", "ALTO", "Sala", "5199"), 100_000),
+        ("validar_chamado/sem_campos", lambda: validar_chamado(None, None, None, None, None, None), 200_000),
+        ("validar_chamado/descricao_250KB", lambda: validar_chamado(huge, "t", "SOFTWARE", "ALTO", "Sala 201",
+                                                                    "51999999999"), 200),
+        ("validar_chamado/vaga_250KB", lambda: validar_chamado(huge_vague, "t", "SOFTWARE", "ALTO", "Sala 201",
+                                                               "51999999999"), 200),
+        ("selecionar_usuario/1_linha", lambda: selecionar_usuario(rows_5000_last[-1:], projetor, "email",
+                                                                  "alvo@example.gov.br"), 100_000),
+        ("selecionar_usuario/5000_match_fim", lambda: selecionar_usuario(rows_5000_last, projetor, "email",
+                                                                         "alvo@example.gov.br"), 50),
+        ("selecionar_usuario/5000_sem_match", lambda: selecionar_usuario(rows_5000_none, projetor, "email",
+                                                                         "alvo@example.gov.br"), 50),
+        ("selecionar_usuario/5000_multivalor", lambda: selecionar_usuario(rows_multi, projetor, "email",
+                                                                          "alvo@example.gov.br"), 50),
+    ]
+
+
+def measure(fn: Callable[[], Any], iterations: int, repeats: int) -> Dict[str, Any]:
+    fn()  # aquecimento
+    per_op = []
+    for _ in range(repeats):
+        started = time.perf_counter_ns()
+        for _ in range(iterations):
+            fn()
+        per_op.append((time.perf_counter_ns() - started) / iterations)
+    return {
+        "iterations": iterations,
+        "repeats": repeats,
+        "ns_per_op": {"median": round(statistics.median(per_op), 1), "min": round(min(per_op), 1)},
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks das funções puras do agente GLPI")
+    parser.add_argument("--filter", help="Executa apenas casos cujo nome contenha este texto")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplica as iterações fixas (ex.: 0.1 no CI)")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: bench_results/micro-<ts>.json)")
+    parser.add_argument("--save-baseline", help="Grava o resultado também como baseline neste caminho")
+    parser.add_argument("--baseline", help="Baseline para comparação")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Regressão relativa tolerada (mediana)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # Avisos de categoria desconhecida iriam para o log a cada iteração
+    logging.disable(logging.WARNING)
+
+    results: Dict[str, Any] = {"meta": run_metadata({"repeats": args.repeats, "scale": args.scale}), "cases": {}}
+    print(f"{'caso':<40} {'iter':>8} {'mediana ns/op':>14} {'min ns/op':>12}")
+    print("-" * 78)
+    for name, fn, iterations in build_cases():
+        if args.filter and args.filter not in name:
+            continue
+        r = measure(fn, max(1, int(iterations * args.scale)), args.repeats)
+        results["cases"][name] = r
+        print(f"{name:<40} {r['iterations']:>8} {r['ns_per_op']['median']:>14,.1f} {r['ns_per_op']['min']:>12,.1f}")
+
+    path = save_results(results, args.output, "micro")
+    print(f"\nResultados salvos em {path}")
+    if args.save_baseline:
+        print(f"Baseline salvo em {save_results(results, args.save_baseline, 'micro-baseline')}")
+
+    if args.baseline:
+        regressions = compare_metrics(results["cases"], load_results(args.baseline).get("cases", {}),
+                                      metrics=("ns_per_op.median",), threshold=args.threshold)
+        if regressions:
+            print("\nREGRESSÕES detectadas:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nSem regressões acima de {args.threshold:.0%} em relação a {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
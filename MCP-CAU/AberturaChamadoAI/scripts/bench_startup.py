@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark de cold start: import do app_core, create_app(), warm-up e primeira requisição.
+
+Cada rodada sobe um processo Python novo contra o GLPI falso (fake_glpi_server) e coleta
+as métricas de partida expostas em /api/health/ready (`startup`), além da latência da
+primeira busca de usuário, com e sem WARMUP_ENABLED:
+
+- cold: sem warm-up; a primeira requisição paga conexão, initSession e listSearchOptions.
+- warm: warm-up antes da prontidão; a primeira requisição já encontra pool e caches quentes.
+
+Execução (a partir de MCP-CAU/):
+    python -m AberturaChamadoAI.scripts.bench_startup --runs 5 --glpi-latency fixed:50
+    python -m AberturaChamadoAI.scripts.bench_startup --compare bench_results/startup-base.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .bench_common import compare_metrics, latency_summary, load_results, run_metadata, save_results
+from .fake_glpi_server import EndpointProfile, FakeGlpiConfig, FakeGlpiServer, generate_users
+
+
+MODES = {"cold": "false", "warm": "true"}
+METRICS = ("import_ms", "create_app_ms", "warmup_ms", "time_to_ready_ms", "first_request_ms", "process_ms")
+
+# Executado no processo filho: mede até a prontidão e a primeira requisição
+CHILD = r"""
+import json, logging, sys, time
+logging.basicConfig(level=logging.WARNING)
+from AberturaChamadoAI.app_core import create_app
+app = create_app()
+prober = app.extensions["glpi_health_prober"]
+deadline = time.monotonic() + 60
+while not prober.is_ready() and time.monotonic() < deadline:
+    time.sleep(0.002)
+client = app.test_client()
+started = time.perf_counter()
+resp = client.get("/api/glpi-user-by-email", query_string={"email": sys.argv[1]})
+first_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({"startup": app.extensions["startup_metrics"], "ready": prober.is_ready(),
+                  "first_request_ms": round(first_ms, 1), "first_status": resp.status_code}))
+"""
+
+
+def run_once(mode: str, glpi_url: str, email: str) -> Dict[str, Any]:
+    defaults = FakeGlpiConfig()
+    env = dict(os.environ)
+    env.update({
+        "GLPI_URL": glpi_url,
+        "GLPI_APP_TOKEN": defaults.app_token,
+        "GLPI_USER_TOKEN": defaults.user_token,
+        # Só o warm-up roda em background; o prober periódico distorceria a medição
+        "HEALTH_PROBE_ENABLED": "false",
+        "WARMUP_ENABLED": MODES[mode],
+    })
+    root = Path(__file__).resolve().parents[2]  # diretório que contém AberturaChamadoAI/
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", CHILD, email], cwd=root, env=env,
+                          capture_output=True, text=True, timeout=120)
+    process_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"Processo filho falhou ({mode}): {proc.stderr.strip()[-500:]}")
+    data = json.loads(proc.stdout.strip().splitlines()[-1])
+    row = dict(data["startup"])
+    row.update(first_request_ms=data["first_request_ms"], first_status=data["first_status"],
+               ready=data["ready"], process_ms=round(process_ms, 1))
+    return row
+
+
+def summarize(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {"runs": len(rows), "errors": sum(1 for r in rows if r["first_status"] != 200)}
+    for metric in METRICS:
+        values = [r[metric] for r in rows if isinstance(r.get(metric), (int, float))]
+        summary[metric] = latency_summary(values) if values else None
+    return summary
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    print(f"\n{'modo':<6} " + " ".join(f"{m:>17}" for m in METRICS))
+    print("-" * (7 + 18 * len(METRICS)))
+    for mode, summary in results["scenarios"].items():
+        cells = []
+        for metric in METRICS:
+            value = (summary.get(metric) or {}).get("p50")
+            cells.append(f"{value:>17.1f}" if value is not None else f"{'-':>17}")
+        print(f"{mode:<6} " + " ".join(cells))
+    print("(medianas em ms)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de cold start do agente GLPI")
+    parser.add_argument("--runs", type=int, default=5, help="Processos por modo")
+    parser.add_argument("--mode", action="append", choices=tuple(MODES), help="Repetível; padrão: cold e warm")
+    parser.add_argument("--glpi-latency", default="fixed:50", help="Latência do GLPI falso (simula rede/TLS)")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: bench_results/startup-<ts>.json)")
+    parser.add_argument("--compare", help="JSON de baseline para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Regressão relativa tolerada (mediana)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    config = FakeGlpiConfig(users=200, profiles={"default": EndpointProfile(latency=args.glpi_latency)})
+    fake = FakeGlpiServer(config).start()
+    email = generate_users(config.users, config.seed)[1]["email"]
+
+    results: Dict[str, Any] = {
+        "meta": run_metadata({k: v for k, v in vars(args).items() if k not in ("output", "compare")}),
+        "scenarios": {},
+    }
+    try:
+        for mode in args.mode or tuple(MODES):
+            rows = [run_once(mode, fake.base_url, email) for _ in range(max(1, args.runs))]
+            results["scenarios"][mode] = summarize(rows)
+    finally:
+        fake.stop()
+
+    print_report(results)
+    path = save_results(results, args.output, "startup")
+    print(f"\nResultados salvos em {path}")
+
+    if args.compare:
+        regressions = compare_metrics(
+            results["scenarios"], load_results(args.compare).get("scenarios", {}),
+            metrics=tuple(f"{m}.p50" for m in METRICS), threshold=args.threshold,
+        )
+        if regressions:
+            print("\nREGRESSÕES detectadas:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nSem regressões acima de {args.threshold:.0%} em relação a {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Servidor GLPI REST falso (stand-in local) para testes de carga e CI sem GLPI real.
+
+Implementa o subconjunto da API usado por app_core/services/glpi.py:
+- initSession (user_token ou login/password), killSession, getFullSession
+- search/User (criteria equals/contains com link AND/OR, forcedisplay, range) e listSearchOptions/User
+- Ticket (POST, GET por id e listagem) e ITILCategory (GET)
+
+Injeção de falhas por endpoint: distribuição de latência, taxa de erro e expiração de sessão.
+Contadores de chamadas ficam disponíveis em GET /_fake/stats (e POST /_fake/reset).
+
+Somente biblioteca padrão. Execução:
+    python -m AberturaChamadoAI.scripts.fake_glpi_server --port 8088 --users 2000 \\
+        --latency search=lognormal:40:0.5 --latency initSession=normal:30:10 --error-rate Ticket=0.02
+
+Configure o agente com GLPI_URL=http://127.0.0.1:8088/apirest.php, GLPI_APP_TOKEN=fake-app-token
+e GLPI_USER_TOKEN=fake-user-token (valores padrão do stand-in).
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+# -----------------------------
+# Perfis de latência/erro
+# -----------------------------
+@dataclass
+class EndpointProfile:
+    """
+    Distribuição de latência (ms) e taxa de erro de um endpoint.
+
+    latency: "fixed:MS" | "uniform:MIN:MAX" | "normal:MEDIA:DESVIO" | "lognormal:MEDIANA:SIGMA"
+    """
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    error_status: int = 500
+
+    def sample_delay(self, rng: random.Random) -> float:
+        kind, *args = self.latency.split(":")
+        values = [float(a) for a in args] or [0.0]
+        if kind == "uniform":
+            ms = rng.uniform(values[0], values[1] if len(values) > 1 else values[0])
+        elif kind == "normal":
+            ms = rng.gauss(values[0], values[1] if len(values) > 1 else 0.0)
+        elif kind == "lognormal":
+            median = max(values[0], 0.001)
+            ms = rng.lognormvariate(math.log(median), values[1] if len(values) > 1 else 0.5)
+        else:
+            ms = values[0]
+        return max(0.0, ms) / 1000.0
+
+
+@dataclass
+class FakeGlpiConfig:
+    app_token: str = "fake-app-token"
+    user_token: str = "fake-user-token"
+    password: str = "senha123"
+    users: int = 500
+    session_ttl: float = 1440.0
+    seed: int = 42
+    # Chaves: initSession, killSession, getFullSession, search, listSearchOptions, Ticket, ITILCategory, default
+    profiles: Dict[str, EndpointProfile] = field(default_factory=dict)
+
+    def profile(self, endpoint: str) -> EndpointProfile:
+        return self.profiles.get(endpoint) or self.profiles.get("default") or EndpointProfile()
+
+
+# -----------------------------
+# Dados sintéticos
+# -----------------------------
+FIRST_NAMES = ["Ana", "João", "Maria", "José", "Luíza", "Pedro", "Fernanda", "Carlos", "Beatriz", "Rafael",
+               "Juliana", "Marcos", "Patrícia", "Lucas", "Camila", "André", "Letícia", "Gustavo", "Mônica", "Tiago"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Pereira", "Lima", "Carvalho", "Gomes", "Ribeiro", "Martins",
+              "Araújo", "Barbosa", "Rocha", "Almeida", "Conceição", "Fagundes", "Moraes", "Cardoso", "Teixeira", "Brandão"]
+
+CATEGORIES = [
+    {"id": 1, "name": "Tipos de computador", "completename": "Hardware > Tipos de computador"},
+    {"id": 2, "name": "Tipos de impressora", "completename": "Hardware > Tipos de impressora"},
+    {"id": 3, "name": "Tipos de monitor", "completename": "Hardware > Tipos de monitor"},
+    {"id": 4, "name": "Categorias de software", "completename": "Software > Categorias de software"},
+    {"id": 5, "name": "Redes", "completename": "Conectividade > Redes"},
+    {"id": 6, "name": "Categorias ITIL", "completename": "Segurança > Gestão de identidade"},
+    {"id": 7, "name": "Assistência", "completename": "Solicitação > Assistência"},
+    {"id": 8, "name": "Geral", "completename": "Geral"},
+]
+
+# Mapeamento searchoption -> atributo do usuário (ids do GLPI para itemtype User)
+USER_SEARCH_FIELDS = {1: "name", 2: "id", 5: "email", 9: "firstname", 34: "realname"}
+
+# Subconjunto de listSearchOptions/User no formato do GLPI
+USER_SEARCH_OPTIONS = {
+    "common": "Características",
+    "1": {"name": "Login", "table": "glpi_users", "field": "name", "datatype": "itemlink", "uid": "User.name"},
+    "2": {"name": "ID", "table": "glpi_users", "field": "id", "datatype": "number", "uid": "User.id"},
+    "5": {"name": "E-mails", "table": "glpi_useremails", "field": "email", "datatype": "email",
+          "uid": "User.UserEmail.email"},
+    "9": {"name": "Nome", "table": "glpi_users", "field": "firstname", "datatype": "string", "uid": "User.firstname"},
+    "34": {"name": "Sobrenome", "table": "glpi_users", "field": "realname", "datatype": "string",
+           "uid": "User.realname"},
+}
+
+
+def _ascii(s: str) -> str:
+    return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
+
+
+def generate_users(count: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    users = [{"id": 2, "name": "glpi", "firstname": "", "realname": "Serviço", "email": "glpi@example.gov.br"}]
+    for i in range(count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        login = _ascii(f"{first}.{last}{i}").lower()
+        users.append({
+            "id": 10 + i,
+            "name": login,
+            "firstname": first,
+            "realname": last,
+            "email": f"{login}@example.gov.br",
+        })
+    return users
+
+
+# -----------------------------
+# Estado do GLPI falso
+# -----------------------------
+class FakeGlpi:
+    def __init__(self, config: FakeGlpiConfig):
+        self.config = config
+        self.users = generate_users(config.users, config.seed)
+        self.users_by_id = {u["id"]: u for u in self.users}
+        self.users_by_login = {u["name"].lower(): u for u in self.users}
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.tickets: Dict[int, Dict[str, Any]] = {}
+        self._next_ticket = 1
+        self._lock = threading.Lock()
+        self._rng = random.Random(config.seed)
+        self.calls: Counter = Counter()
+
+    # Sessões
+    def open_session(self, user_id: int) -> str:
+        token = uuid.uuid4().hex
+        with self._lock:
+            self.sessions[token] = {"user_id": user_id, "expires": time.monotonic() + self.config.session_ttl}
+        return token
+
+    def session_user(self, token: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not token:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            sess = self.sessions.get(token)
+            if not sess:
+                return None
+            if sess["expires"] < now:
+                self.sessions.pop(token, None)
+                return None
+            # Expiração deslizante, como o timeout de sessão PHP do GLPI
+            sess["expires"] = now + self.config.session_ttl
+            return self.users_by_id.get(sess["user_id"])
+
+    def kill_session(self, token: str) -> bool:
+        with self._lock:
+            return self.sessions.pop(token, None) is not None
+
+    # Latência e falhas
+    def inject(self, endpoint: str) -> Optional[int]:
+        profile = self.config.profile(endpoint)
+        with self._lock:
+            self.calls[endpoint] += 1
+            delay = profile.sample_delay(self._rng)
+            fail = profile.error_rate > 0 and self._rng.random() < profile.error_rate
+        if delay:
+            time.sleep(delay)
+        return profile.error_status if fail else None
+
+    # Busca
+    def search_users(self, criteria: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        def matches(user: Dict[str, Any], crit: Dict[str, str]) -> bool:
+            attr = USER_SEARCH_FIELDS.get(int(crit.get("field", 1) or 1))
+            if not attr:
+                return False
+            current = str(user.get(attr, "")).lower()
+            wanted = str(crit.get("value", "")).lower()
+            if crit.get("searchtype", "contains") == "equals":
+                return current == wanted
+            return wanted in current
+
+        if not criteria:
+            return list(self.users)
+        result = []
+        for user in self.users:
+            ok = matches(user, criteria[0])
+            for crit in criteria[1:]:
+                if (crit.get("link") or "AND").upper() == "OR":
+                    ok = ok or matches(user, crit)
+                else:
+                    ok = ok and matches(user, crit)
+            if ok:
+                result.append(user)
+        return result
+
+    def create_ticket(self, data: Dict[str, Any], requester_id: int) -> int:
+        with self._lock:
+            ticket_id = self._next_ticket
+            self._next_ticket += 1
+            self.tickets[ticket_id] = {"id": ticket_id, "users_id_recipient": requester_id, **data}
+        return ticket_id
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "open_sessions": len(self.sessions),
+                "tickets": len(self.tickets),
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+
+# -----------------------------
+# Handler HTTP
+# -----------------------------
+_CRITERIA_RE = re.compile(r"^criteria\[(\d+)\]\[(\w+)\]$")
+_FORCEDISPLAY_RE = re.compile(r"^forcedisplay\[(\d+)\]$")
+
+
+def parse_search_params(query: Dict[str, List[str]]) -> Tuple[List[Dict[str, str]], List[int], Tuple[int, int]]:
+    criteria: Dict[int, Dict[str, str]] = {}
+    forcedisplay: List[int] = []
+    for key, values in query.items():
+        m = _CRITERIA_RE.match(key)
+        if m:
+            criteria.setdefault(int(m.group(1)), {})[m.group(2)] = values[-1]
+            continue
+        if _FORCEDISPLAY_RE.match(key):
+            try:
+                forcedisplay.append(int(values[-1]))
+            except ValueError:
+                pass
+    start, end = 0, 49  # padrão do GLPI
+    if "range" in query:
+        try:
+            a, b = query["range"][-1].split("-", 1)
+            start, end = int(a), int(b)
+        except ValueError:
+            pass
+    return [criteria[i] for i in sorted(criteria)], forcedisplay, (start, end)
+
+
+class FakeGlpiHandler(BaseHTTPRequestHandler):
+    glpi: FakeGlpi  # injetado pela subclasse criada em FakeGlpiServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # silencioso; contadores em /_fake/stats
+        return
+
+    # Utilidades
+    def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, code: str, message: str) -> None:
+        self._send(status, [code, message])
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        raw = self.rfile.read(length)
+        try:
+            return json.loads(raw.decode("utf-8"))
+        except Exception:
+            return None
+
+    def _route(self) -> Tuple[List[str], Dict[str, List[str]]]:
+        parts = urlsplit(self.path)
+        path = parts.path
+        if path.startswith("/apirest.php"):
+            path = path[len("/apirest.php"):]
+        return [p for p in path.split("/") if p], parse_qs(parts.query)
+
+    def _check_app_token(self) -> bool:
+        expected = self.glpi.config.app_token
+        if expected and self.headers.get("App-Token") != expected:
+            self._error(400, "ERROR_WRONG_APP_TOKEN_PARAMETER", "parameter app_token seems wrong")
+            return False
+        return True
+
+    def _session_user(self) -> Optional[Dict[str, Any]]:
+        user = self.glpi.session_user(self.headers.get("Session-Token"))
+        if user is None:
+            self._error(401, "ERROR_SESSION_TOKEN_INVALID", "session_token seems invalid")
+        return user
+
+    def _injected_failure(self, endpoint: str) -> bool:
+        status = self.glpi.inject(endpoint)
+        if status:
+            self._error(status, "ERROR_FAKE_INJECTED", f"falha injetada em {endpoint}")
+            return True
+        return False
+
+    # Verbos
+    def do_GET(self):
+        segments, query = self._route()
+        if segments[:1] == ["_fake"]:
+            return self._send(200, self.glpi.stats())
+        if not segments:
+            return self._error(404, "ERROR_RESOURCE_NOT_FOUND_NOR_COMMONDBTM", "resource not found")
+        endpoint = segments[0]
+
+        if endpoint == "search" and len(segments) > 1:
+            if self._injected_failure("search") or not self._check_app_token() or not self._session_user():
+                return
+            if segments[1] != "User":
+                return self._error(400, "ERROR_ITEM_NOT_FOUND", "itemtype não suportado pelo stand-in")
+            return self._search_users(query)
+
+        if endpoint == "listSearchOptions" and len(segments) > 1:
+            if self._injected_failure("listSearchOptions") or not self._check_app_token() or not self._session_user():
+                return
+            if segments[1] != "User":
+                return self._error(400, "ERROR_ITEM_NOT_FOUND", "itemtype não suportado pelo stand-in")
+            return self._send(200, USER_SEARCH_OPTIONS)
+
+        if endpoint == "getFullSession":
+            if self._injected_failure("getFullSession") or not self._check_app_token():
+                return
+            user = self._session_user()
+            if not user:
+                return
+            return self._send(200, {"session": {"glpiID": user["id"], "glpiname": user["name"],
+                                                "glpirealname": user["realname"], "glpifirstname": user["firstname"]}})
+
+        if endpoint == "Ticket":
+            if self._injected_failure("Ticket") or not self._check_app_token() or not self._session_user():
+                return
+            if len(segments) > 1:
+                ticket = self.glpi.tickets.get(int(segments[1])) if segments[1].isdigit() else None
+                if not ticket:
+                    return self._error(404, "ERROR_ITEM_NOT_FOUND", "Item not found")
+                return self._send(200, ticket)
+            return self._send(200, list(self.glpi.tickets.values())[:50])
+
+        if endpoint == "ITILCategory":
+            if self._injected_failure("ITILCategory") or not self._check_app_token() or not self._session_user():
+                return
+            if len(segments) > 1:
+                cat = next((c for c in CATEGORIES if str(c["id"]) == segments[1]), None)
+                if not cat:
+                    return self._error(404, "ERROR_ITEM_NOT_FOUND", "Item not found")
+                return self._send(200, cat)
+            return self._send(200, CATEGORIES)
+
+        self._error(404, "ERROR_RESOURCE_NOT_FOUND_NOR_COMMONDBTM", "resource not found")
+
+    def do_POST(self):
+        segments, _ = self._route()
+        body = self._body()
+        if segments[:2] == ["_fake", "reset"]:
+            self.glpi.reset_stats()
+            return self._send(200, {"reset": True})
+        endpoint = segments[0] if segments else ""
+
+        if endpoint == "initSession":
+            if self._injected_failure("initSession") or not self._check_app_token():
+                return
+            auth = self.headers.get("Authorization", "")
+            if auth.startswith("user_token "):
+                if auth[len("user_token "):] != self.glpi.config.user_token:
+                    return self._error(401, "ERROR_GLPI_LOGIN_USER_TOKEN", "parameter user_token seems invalid")
+                return self._send(200, {"session_token": self.glpi.open_session(2)})
+            if isinstance(body, dict) and body.get("login"):
+                user = self.glpi.users_by_login.get(str(body["login"]).lower())
+                if not user or body.get("password") != self.glpi.config.password:
+                    return self._error(401, "ERROR_GLPI_LOGIN", "Incorrect username or password")
+                return self._send(200, {"session_token": self.glpi.open_session(user["id"])})
+            return self._error(400, "ERROR_LOGIN_PARAMETERS_MISSING", "parameter(s) login, password missing")
+
+        if endpoint == "killSession":
+            if self._injected_failure("killSession") or not self._check_app_token():
+                return
+            token = self.headers.get("Session-Token")
+            if not self.glpi.kill_session(token or ""):
+                return self._error(401, "ERROR_SESSION_TOKEN_INVALID", "session_token seems invalid")
+            return self._send(200, [])
+
+        if endpoint == "Ticket":
+            if self._injected_failure("Ticket") or not self._check_app_token():
+                return
+            user = self._session_user()
+            if not user:
+                return
+            data = body.get("input") if isinstance(body, dict) else None
+            if not isinstance(data, dict) or not data.get("name"):
+                return self._error(400, "ERROR_BAD_ARRAY", "input parameter must be an array of objects")
+            ticket_id = self.glpi.create_ticket(data, user["id"])
+            return self._send(201, {"id": ticket_id, "message": ""})
+
+        self._error(404, "ERROR_RESOURCE_NOT_FOUND_NOR_COMMONDBTM", "resource not found")
+
+    def _search_users(self, query: Dict[str, List[str]]) -> None:
+        criteria, forcedisplay, (start, end) = parse_search_params(query)
+        found = self.glpi.search_users(criteria)
+        total = len(found)
+        page = found[start:end + 1]
+        columns = sorted({1, *forcedisplay} & set(USER_SEARCH_FIELDS))
+        rows = [{str(c): user[USER_SEARCH_FIELDS[c]] for c in columns} for user in page]
+        last = start + len(rows) - 1
+        payload: Dict[str, Any] = {
+            "totalcount": total,
+            "count": len(rows),
+            "sort": [1],
+            "order": ["ASC"],
+            "content-range": f"{start}-{last}/{total}",
+        }
+        if rows:
+            payload["data"] = rows
+        status = 206 if total > len(rows) and rows else 200
+        self._send(status, payload, {"Content-Range": f"{start}-{last}/{total}", "Accept-Range": f"User {total}"})
+
+
+# -----------------------------
+# Servidor
+# -----------------------------
+class FakeGlpiServer:
+    """Sobe o stand-in numa thread; útil para benchmarks e testes no mesmo processo."""
+
+    def __init__(self, config: Optional[FakeGlpiConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.glpi = FakeGlpi(config or FakeGlpiConfig())
+        handler = type("BoundFakeGlpiHandler", (FakeGlpiHandler,), {"glpi": self.glpi})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/apirest.php"
+
+    def start(self) -> "FakeGlpiServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-glpi", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.glpi.stats()
+
+    def reset_stats(self) -> None:
+        self.glpi.reset_stats()
+
+    def __enter__(self) -> "FakeGlpiServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _parse_pairs(values: Optional[List[str]]) -> Dict[str, str]:
+    pairs = {}
+    for item in values or []:
+        if "=" not in item:
+            raise SystemExit(f"Formato inválido (esperado endpoint=valor): {item}")
+        k, v = item.split("=", 1)
+        pairs[k.strip()] = v.strip()
+    return pairs
+
+
+def build_config(args: argparse.Namespace) -> FakeGlpiConfig:
+    profiles: Dict[str, EndpointProfile] = {}
+    for endpoint, spec in _parse_pairs(args.latency).items():
+        profiles.setdefault(endpoint, EndpointProfile()).latency = spec
+    for endpoint, rate in _parse_pairs(args.error_rate).items():
+        profiles.setdefault(endpoint, EndpointProfile()).error_rate = float(rate)
+    return FakeGlpiConfig(
+        app_token=args.app_token,
+        user_token=args.user_token,
+        password=args.password,
+        users=args.users,
+        session_ttl=args.session_ttl,
+        seed=args.seed,
+        profiles=profiles,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GLPI REST falso para testes offline")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--password", default="senha123")
+    parser.add_argument("--app-token", default="fake-app-token")
+    parser.add_argument("--user-token", default="fake-user-token")
+    parser.add_argument("--session-ttl", type=float, default=1440.0, help="Expiração (s) de sessão ociosa")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", action="append",
+                        help="endpoint=dist (ex.: search=lognormal:40:0.5, default=fixed:5)")
+    parser.add_argument("--error-rate", action="append", help="endpoint=taxa (ex.: Ticket=0.05)")
+    args = parser.parse_args(argv)
+
+    server = FakeGlpiServer(build_config(args), host=args.host, port=args.port)
+    print(f"GLPI falso em {server.base_url} ({args.users} usuários). Ctrl+C para encerrar.")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
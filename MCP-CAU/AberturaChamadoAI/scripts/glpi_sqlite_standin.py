@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Banco SQLite que imita as tabelas de identidade do GLPI (glpi_users, glpi_useremails),
+para testar o backend de busca USER_LOOKUP_BACKEND=sql sem um MySQL do GLPI.
+
+Os usuários são os mesmos do GLPI falso (fake_glpi_server.generate_users), então REST e SQL
+podem ser comparados sobre os mesmos dados. Os índices seguem os do GLPI:
+glpi_users(name), glpi_useremails(email) e glpi_useremails(users_id).
+
+Execução (a partir de MCP-CAU/):
+    python -m AberturaChamadoAI.scripts.glpi_sqlite_standin --output glpi-standin.db --users 2000
+    USER_LOOKUP_BACKEND=sql USER_DB_URL=sqlite:///glpi-standin.db python -m AberturaChamadoAI.scripts.run_server
+"""
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+from .fake_glpi_server import generate_users
+
+
+# Subconjunto das colunas do GLPI usado pela busca; COLLATE NOCASE imita a collation
+# case-insensitive do MySQL do GLPI (utf8mb4_unicode_ci) sem perder o índice.
+SCHEMA = """
+CREATE TABLE glpi_users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL COLLATE NOCASE,
+    firstname TEXT,
+    realname TEXT,
+    is_active INTEGER NOT NULL DEFAULT 1,
+    is_deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX name ON glpi_users (name);
+CREATE TABLE glpi_useremails (
+    id INTEGER PRIMARY KEY,
+    users_id INTEGER NOT NULL,
+    is_default INTEGER NOT NULL DEFAULT 0,
+    is_dynamic INTEGER NOT NULL DEFAULT 0,
+    email TEXT COLLATE NOCASE
+);
+CREATE INDEX email ON glpi_useremails (email);
+CREATE INDEX users_id ON glpi_useremails (users_id);
+"""
+
+
+def build(path: str, users: int, seed: int) -> Path:
+    target = Path(path)
+    if target.exists():
+        target.unlink()
+    conn = sqlite3.connect(str(target))
+    try:
+        conn.executescript(SCHEMA)
+        rows = generate_users(users, seed)
+        conn.executemany(
+            "INSERT INTO glpi_users (id, name, firstname, realname) VALUES (?, ?, ?, ?)",
+            [(u["id"], u["name"], u["firstname"], u["realname"]) for u in rows],
+        )
+        conn.executemany(
+            "INSERT INTO glpi_useremails (users_id, is_default, email) VALUES (?, 1, ?)",
+            [(u["id"], u["email"]) for u in rows],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return target
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in SQLite das tabelas de usuário do GLPI")
+    parser.add_argument("--output", default="glpi-standin.db")
+    parser.add_argument("--users", type=int, default=2000, help="Mesmo valor usado no GLPI falso")
+    parser.add_argument("--seed", type=int, default=42, help="Mesmo valor usado no GLPI falso")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    target = build(args.output, args.users, args.seed)
+    print(f"Stand-in criado em {target} ({args.users + 1} usuários)")
+    print(f"USER_LOOKUP_BACKEND=sql USER_DB_URL=sqlite:///{target.resolve()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,39 @@
 #!/usr/bin/env python3
 """
 Script de monitoramento de saúde do servidor GLPI Agent.
-Verifica periodicamente se o servidor está respondendo e reinicia se necessário.
+Verifica periodicamente, em paralelo, uma ou mais instâncias e reinicia as que falharem.
+
+- Liveness (/api/health/live) define falha "dura". No orçamento de erros entram só falhas da própria
+  instância (sem resposta, 5xx da app); /api/health/ready em 503 por GLPI fora do ar, aquecimento ou
+  drenagem não conta (reiniciar o agente não traz o GLPI de volta).
+- Latência p50/p95/p99 e orçamento de erros são calculados numa janela móvel por instância.
+- Reinício por falhas consecutivas ou por violação de SLO (p95 ou orçamento esgotado).
+- Após iniciar/reiniciar, aguarda readiness com backoff exponencial em vez de sleeps fixos.
+- Só gerencia (inicia/reinicia) instâncias locais (localhost/loopback): o comando roda nesta
+  máquina, então para um host remoto ele subiria um processo aqui e não lá. Hosts remotos são
+  apenas monitorados, com aviso; --manage-remote força o gerenciamento.
+
+Uso:
+    python -m scripts.monitor_health
+    python -m scripts.monitor_health --instance http://host-a:5000 --instance http://host-b:5000 --no-manage
 """
 
-import time
-import requests
-import subprocess
+import argparse
+import asyncio
+import ipaddress
 import logging
-import sys
+import math
 import os
-from datetime import datetime
+import shlex
+import subprocess
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
 
 # Configuração de logging
 logging.basicConfig(
@@ -24,115 +47,329 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class SLOConfig:
+    """Objetivos por instância avaliados sobre a janela móvel de amostras."""
+    p95_ms: float = 2000.0
+    availability: float = 0.99
+    window: int = 120
+    min_samples: int = 20
+
+
+class LatencyWindow:
+    """Janela móvel de (latência_ms, ok) com percentis e orçamento de erros."""
+
+    def __init__(self, size: int):
+        self.samples: Deque[Tuple[float, bool]] = deque(maxlen=size)
+
+    def add(self, latency_ms: float, ok: bool) -> None:
+        self.samples.append((latency_ms, ok))
+
+    def clear(self) -> None:
+        self.samples.clear()
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(lat for lat, _ in self.samples)
+        # Nearest-rank: estável para janelas pequenas
+        rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+        return ordered[rank - 1]
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        errors = sum(1 for _, ok in self.samples if not ok)
+        return errors / len(self.samples)
+
+    def budget_remaining(self, availability: float) -> float:
+        """Fração restante do orçamento de erros (1.0 = intacto, <= 0 = esgotado)."""
+        allowed = 1.0 - availability
+        if allowed <= 0:
+            return 0.0 if self.error_rate() > 0 else 1.0
+        return 1.0 - (self.error_rate() / allowed)
+
+
+@dataclass
+class InstanceState:
+    consecutive_failures: int = 0
+    restarts: int = 0
+    last_restart: float = 0.0
+    ready: bool = False
+    process: Optional[subprocess.Popen] = None
+    window: LatencyWindow = field(default_factory=lambda: LatencyWindow(120))
+
+
 class ServerMonitor:
-    def __init__(self, server_url="http://localhost:5000", check_interval=30):
-        self.server_url = server_url
-        self.health_endpoint = f"{server_url}/api/health"
-        self.check_interval = check_interval
-        self.consecutive_failures = 0
-        self.max_failures = 3
-        self.server_process = None
-        
-    def check_health(self):
-        """Verifica se o servidor está saudável."""
+    """Monitor de uma instância; vários rodam concorrentes em MultiServerMonitor."""
+
+    def __init__(self, server_url="http://localhost:5000", start_cmd: Optional[List[str]] = None,
+                 slo: Optional[SLOConfig] = None, max_failures=3, timeout=10.0,
+                 startup_timeout=60.0, restart_cooldown=120.0):
+        self.server_url = server_url.rstrip("/")
+        self.live_endpoint = f"{self.server_url}/api/health/live"
+        self.ready_endpoint = f"{self.server_url}/api/health/ready"
+        self.start_cmd = start_cmd
+        self.slo = slo or SLOConfig()
+        self.max_failures = max_failures
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.restart_cooldown = restart_cooldown
+        self.state = InstanceState(window=LatencyWindow(self.slo.window))
+        self._http = requests.Session()
+
+    # ------------------------------------------------------------------
+    # Verificações
+    # ------------------------------------------------------------------
+    async def _get(self, url: str) -> Tuple[Optional[int], float, Optional[Dict[str, Any]]]:
+        """(status, latência_ms, corpo JSON ou None); status None quando não houve resposta."""
+        started = time.perf_counter()
+        try:
+            resp = await asyncio.to_thread(self._http.get, url, timeout=self.timeout)
+        except Exception as e:
+            logger.debug(f"[{self.server_url}] GET {url} falhou: {e}")
+            return None, (time.perf_counter() - started) * 1000, None
+        latency_ms = (time.perf_counter() - started) * 1000
         try:
-            response = requests.get(self.health_endpoint, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('glpi_connection') == 'ok':
-                    return True
+            body = resp.json()
+        except ValueError:
+            body = None
+        return resp.status_code, latency_ms, body if isinstance(body, dict) else None
+
+    async def check_live(self) -> bool:
+        status, _, _ = await self._get(self.live_endpoint)
+        return status == 200
+
+    async def check_ready(self) -> bool:
+        status, _, _ = await self._get(self.ready_endpoint)
+        return status == 200
+
+    @staticmethod
+    def falha_da_instancia(status: Optional[int], body: Optional[Dict[str, Any]]) -> bool:
+        """
+        Se a amostra de readiness é falha da própria instância (consome o orçamento de erros).
+
+        O 503 de /api/health/ready com o snapshot do prober ({"ready": false, ...}) significa
+        GLPI indisponível, aquecimento ou drenagem: a app responde normalmente e reiniciá-la
+        não resolve. Sem resposta ou qualquer outro status diferente de 200 conta como falha.
+        """
+        if status == 200:
             return False
+        return not (status == 503 and body is not None and body.get("ready") is False)
+
+    async def check_health(self) -> Tuple[bool, bool]:
+        """Retorna (live, ready) e registra a amostra de readiness na janela."""
+        status, latency_ms, body = await self._get(self.ready_endpoint)
+        ready = status == 200
+        self.state.window.add(latency_ms, not self.falha_da_instancia(status, body))
+        if status is None:
+            # Sem resposta alguma: confirmar via liveness antes de contar falha dura
+            return await self.check_live(), False
+        if not ready and body is not None and ready != self.state.ready:
+            motivo = "drenagem" if body.get("draining") else body.get("glpi_error") or body.get("glpi_connection")
+            logger.info(f"[{self.server_url}] Não pronto ({motivo}); fora do orçamento de erros")
+        return True, ready
+
+    async def wait_until_ready(self) -> bool:
+        """Aguarda readiness com backoff exponencial limitado por startup_timeout."""
+        deadline = time.monotonic() + self.startup_timeout
+        delay = 0.25
+        live = False
+        while time.monotonic() < deadline:
+            live = live or await self.check_live()
+            if live and await self.check_ready():
+                return True
+            await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 2, 5.0)
+        if live:
+            logger.warning(f"[{self.server_url}] Processo ativo mas não ficou pronto em {self.startup_timeout:.0f}s")
+        return False
+
+    def slo_breach(self) -> Optional[str]:
+        window = self.state.window
+        if len(window) < self.slo.min_samples:
+            return None
+        p95 = window.percentile(95)
+        if p95 is not None and p95 > self.slo.p95_ms:
+            return f"p95 {p95:.0f}ms > {self.slo.p95_ms:.0f}ms"
+        if window.budget_remaining(self.slo.availability) <= 0:
+            return f"orçamento de erros esgotado (erro {window.error_rate():.1%})"
+        return None
+
+    def summary(self) -> str:
+        w = self.state.window
+
+        def fmt(v: Optional[float]) -> str:
+            return "-" if v is None else f"{v:.0f}"
+
+        return (
+            f"p50={fmt(w.percentile(50))}ms p95={fmt(w.percentile(95))}ms p99={fmt(w.percentile(99))}ms "
+            f"erro={w.error_rate():.1%} orçamento={w.budget_remaining(self.slo.availability):.0%} n={len(w)}"
+        )
+
+    # ------------------------------------------------------------------
+    # Processo
+    # ------------------------------------------------------------------
+    async def start_server(self) -> bool:
+        """Inicia o servidor (quando há comando configurado) e aguarda readiness."""
+        if not self.start_cmd:
+            logger.error(f"[{self.server_url}] Sem comando de inicialização; apenas monitorando")
+            return False
+        try:
+            logger.info(f"[{self.server_url}] Iniciando servidor...")
+            self.state.process = subprocess.Popen(self.start_cmd, cwd=os.getcwd())
         except Exception as e:
-            logger.warning(f"Health check falhou: {e}")
+            logger.error(f"[{self.server_url}] Erro ao iniciar servidor: {e}")
             return False
-    
-    def start_server(self):
-        """Inicia o servidor."""
+        if await self.wait_until_ready():
+            logger.info(f"[{self.server_url}] Servidor pronto! PID: {self.state.process.pid}")
+            return True
+        logger.error(f"[{self.server_url}] Servidor iniciou mas não ficou pronto")
+        return False
+
+    async def stop_server(self) -> None:
+        process = self.state.process
+        if not process:
+            return
         try:
-            logger.info("Iniciando servidor...")
-            self.server_process = subprocess.Popen([
-                sys.executable, "-m", "scripts.run_server"
-            ], cwd=os.getcwd())
-            
-            # Aguarda um pouco para o servidor inicializar
-            time.sleep(5)
-            
-            # Verifica se o servidor iniciou corretamente
-            if self.check_health():
-                logger.info(f"Servidor iniciado com sucesso! PID: {self.server_process.pid}")
-                return True
-            else:
-                logger.error("Servidor iniciou mas health check falhou")
-                return False
-                
+            process.terminate()
+            await asyncio.to_thread(process.wait, 30)
+            logger.info(f"[{self.server_url}] Servidor parado")
+        except subprocess.TimeoutExpired:
+            process.kill()
+            logger.warning(f"[{self.server_url}] Servidor forçadamente finalizado")
         except Exception as e:
-            logger.error(f"Erro ao iniciar servidor: {e}")
+            logger.error(f"[{self.server_url}] Erro ao parar servidor: {e}")
+        self.state.process = None
+
+    async def restart_server(self, reason: str) -> bool:
+        since_last = time.monotonic() - self.state.last_restart
+        if self.state.last_restart and since_last < self.restart_cooldown:
+            logger.warning(f"[{self.server_url}] Reinício adiado ({reason}); cooldown de {self.restart_cooldown:.0f}s")
             return False
-    
-    def stop_server(self):
-        """Para o servidor."""
-        if self.server_process:
-            try:
-                self.server_process.terminate()
-                self.server_process.wait(timeout=10)
-                logger.info("Servidor parado")
-            except subprocess.TimeoutExpired:
-                self.server_process.kill()
-                logger.warning("Servidor forçadamente finalizado")
-            except Exception as e:
-                logger.error(f"Erro ao parar servidor: {e}")
-    
-    def restart_server(self):
-        """Reinicia o servidor."""
-        logger.info("Reiniciando servidor...")
-        self.stop_server()
-        time.sleep(2)
-        return self.start_server()
-    
-    def monitor(self):
-        """Loop principal de monitoramento."""
+        logger.error(f"[{self.server_url}] Reiniciando servidor: {reason}")
+        self.state.last_restart = time.monotonic()
+        self.state.restarts += 1
+        await self.stop_server()
+        ok = await self.start_server()
+        self.state.window.clear()
+        if ok:
+            self.state.consecutive_failures = 0
+        return ok
+
+    # ------------------------------------------------------------------
+    # Loop
+    # ------------------------------------------------------------------
+    async def monitor(self, check_interval: float) -> None:
+        if not await self.check_live():
+            if self.start_cmd and not await self.start_server():
+                logger.error(f"[{self.server_url}] Falha ao iniciar servidor")
+        while True:
+            live, ready = await self.check_health()
+            if live:
+                if self.state.consecutive_failures > 0:
+                    logger.info(f"[{self.server_url}] Servidor recuperado!")
+                self.state.consecutive_failures = 0
+            else:
+                self.state.consecutive_failures += 1
+                logger.warning(
+                    f"[{self.server_url}] [ERRO] Liveness falhou ({self.state.consecutive_failures}/{self.max_failures})"
+                )
+            if ready != self.state.ready:
+                logger.info(f"[{self.server_url}] Readiness: {'pronto' if ready else 'não pronto'}")
+                self.state.ready = ready
+
+            reason = None
+            if self.state.consecutive_failures >= self.max_failures:
+                reason = "máximo de falhas consecutivas atingido"
+            else:
+                reason = self.slo_breach()
+            if reason and self.start_cmd:
+                await self.restart_server(reason)
+            elif reason:
+                logger.error(f"[{self.server_url}] Violação sem reinício automático: {reason}")
+
+            logger.info(f"[{self.server_url}] {'[OK]' if ready else '[--]'} {self.summary()}")
+            await asyncio.sleep(check_interval)
+
+
+def host_local(url: str) -> bool:
+    """Se a URL aponta para esta máquina (localhost ou endereço de loopback IPv4/IPv6)."""
+    host = (urlsplit(url).hostname or "").lower()
+    if host == "localhost" or host.endswith(".localhost"):
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class MultiServerMonitor:
+    """Executa um ServerMonitor por instância, todos no mesmo event loop."""
+
+    def __init__(self, monitors: List[ServerMonitor], check_interval=30.0):
+        self.monitors = monitors
+        self.check_interval = check_interval
+
+    async def run(self) -> None:
         logger.info("=== Iniciando Monitor de Saúde do Servidor GLPI ===")
-        logger.info(f"URL: {self.server_url}")
+        logger.info(f"Instâncias: {', '.join(m.server_url for m in self.monitors)}")
         logger.info(f"Intervalo de verificação: {self.check_interval}s")
-        logger.info(f"Máximo de falhas consecutivas: {self.max_failures}")
-        
-        # Inicia o servidor se não estiver rodando
-        if not self.check_health():
-            if not self.start_server():
-                logger.error("Falha ao iniciar servidor. Encerrando monitor.")
-                return
-        
         try:
-            while True:
-                if self.check_health():
-                    if self.consecutive_failures > 0:
-                        logger.info("Servidor recuperado!")
-                    self.consecutive_failures = 0
-                    logger.info("[OK] Servidor saudavel")
-                else:
-                    self.consecutive_failures += 1
-                    logger.warning(f"[ERRO] Health check falhou ({self.consecutive_failures}/{self.max_failures})")
-                    
-                    if self.consecutive_failures >= self.max_failures:
-                        logger.error("Máximo de falhas atingido. Reiniciando servidor...")
-                        if self.restart_server():
-                            self.consecutive_failures = 0
-                        else:
-                            logger.error("Falha ao reiniciar servidor!")
-                
-                time.sleep(self.check_interval)
-                
-        except KeyboardInterrupt:
-            logger.info("Monitor interrompido pelo usuário")
-        except Exception as e:
-            logger.error(f"Erro no monitor: {e}")
+            await asyncio.gather(*(m.monitor(self.check_interval) for m in self.monitors))
         finally:
-            self.stop_server()
+            await asyncio.gather(*(m.stop_server() for m in self.monitors), return_exceptions=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Monitor de saúde (multi-instância) do agente GLPI")
+    parser.add_argument("--instance", action="append", dest="instances",
+                        help="URL base da instância (repetível). Padrão: http://localhost:5000")
+    parser.add_argument("--start-cmd", default=f"{shlex.quote(sys.executable)} -m scripts.run_server --port {{port}}",
+                        help="Comando para iniciar uma instância local ({port} é substituído)")
+    parser.add_argument("--no-manage", action="store_true", help="Apenas monitorar; não iniciar/reiniciar")
+    parser.add_argument("--manage-remote", action="store_true",
+                        help="Gerenciar também hosts não locais (o comando roda nesta máquina)")
+    parser.add_argument("--interval", type=float, default=30.0)
+    parser.add_argument("--max-failures", type=int, default=3)
+    parser.add_argument("--slo-p95-ms", type=float, default=2000.0)
+    parser.add_argument("--slo-availability", type=float, default=0.99)
+    parser.add_argument("--window", type=int, default=120)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    return parser.parse_args(argv)
 
-def main():
+
+def criar_monitores(args) -> List[ServerMonitor]:
+    urls = args.instances or ["http://localhost:5000"]
+    slo = SLOConfig(p95_ms=args.slo_p95_ms, availability=args.slo_availability,
+                    window=args.window, min_samples=min(20, args.window))
+    monitors = []
+    for url in urls:
+        start_cmd = None
+        if not args.no_manage and not args.manage_remote and not host_local(url):
+            logger.warning(f"[{url}] Host remoto: apenas monitorando (reinício só para localhost; use --manage-remote)")
+        elif not args.no_manage:
+            parts = urlsplit(url)
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            start_cmd = shlex.split(args.start_cmd.replace("{port}", str(port)))
+        monitors.append(ServerMonitor(url, start_cmd=start_cmd, slo=slo, max_failures=args.max_failures,
+                                      startup_timeout=args.startup_timeout))
+    return monitors
+
+
+def main(argv=None):
     """Função principal."""
-    monitor = ServerMonitor()
-    monitor.monitor()
+    args = parse_args(argv)
+    monitors = criar_monitores(args)
+    try:
+        asyncio.run(MultiServerMonitor(monitors, check_interval=args.interval).run())
+    except KeyboardInterrupt:
+        logger.info("Monitor interrompido pelo usuário")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,13 +2,23 @@
 """
 Script para executar o servidor Flask com configurações de produção.
 Inclui tratamento de exceções, logging e configurações otimizadas.
+
+Encerramento (SIGTERM/SIGINT): marca a instância como não pronta, aguarda SHUTDOWN_GRACE_PERIOD,
+para de aceitar conexões, drena as requisições em andamento até SHUTDOWN_DRAIN_TIMEOUT, encerra a
+sessão de serviço do GLPI, fecha o socket e só então sai, registrando tempo de drenagem e
+requisições abandonadas.
 """
 
+import argparse
 import os
 import sys
 import signal
 import logging
+import threading
+from werkzeug.serving import make_server
 from AberturaChamadoAI.app_core import create_app
+from AberturaChamadoAI.app_core.config import load_settings
+from AberturaChamadoAI.app_core.utils.lifecycle import encerrar_app
 
 # Configuração de logging para produção
 logging.basicConfig(
@@ -22,42 +32,67 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Sinalizado pelo handler; o encerramento roda na thread principal, fora do handler
+shutdown_requested = threading.Event()
+
+
 def signal_handler(sig, frame):
-    """Handler para sinais de interrupção."""
-    logger.info('Recebido sinal de interrupção. Encerrando servidor...')
-    sys.exit(0)
+    """Handler para sinais de interrupção: apenas pede o encerramento ordenado."""
+    if shutdown_requested.is_set():
+        logger.warning('Segundo sinal recebido durante o encerramento; aguardando prazo de drenagem')
+        return
+    logger.info(f'Recebido sinal {signal.Signals(sig).name}. Encerrando servidor...')
+    shutdown_requested.set()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor do agente GLPI")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5000")))
+    return parser.parse_args(argv)
+
 
-def main():
+def main(argv=None):
     """Função principal para executar o servidor."""
+    args = parse_args(argv)
     try:
         # Registra handlers para sinais
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
-        
+
         logger.info("=== Iniciando Servidor Flask - Agente GLPI ===")
         logger.info(f"Python: {sys.version}")
         logger.info(f"Diretório: {os.getcwd()}")
-        
+
         # Cria app e configura para produção
         app = create_app()
         app.config['DEBUG'] = False
         app.config['TESTING'] = False
 
-        # Inicia o servidor
-        logger.info("Servidor iniciando na porta 5000...")
-        app.run(
-            host="0.0.0.0",
-            port=5000,
-            debug=False,
-            use_reloader=False,
-            threaded=True
-        )
-        
+        # Inicia o servidor numa thread; a principal fica livre para o encerramento
+        server = make_server(args.host, args.port, app, threaded=True)
+        serving = threading.Thread(target=server.serve_forever, name="http-server", daemon=True)
+        serving.start()
+        logger.info(f"Servidor iniciando na porta {args.port}...")
+
+        shutdown_requested.wait()
+
+        # Prontidão false e período de graça antes de parar de aceitar conexões; as já
+        # aceitas seguem nas suas threads e o socket só fecha depois da drenagem
+        settings = load_settings()
+        report = encerrar_app(app, settings.shutdown_drain_timeout, parar_servidor=server.shutdown,
+                              grace_period=settings.shutdown_grace_period)
+        server.server_close()
+        logger.info(f"Relatório de encerramento: {report}")
+        logging.shutdown()
+        sys.exit(0 if report["drained"] else 1)
+
     except KeyboardInterrupt:
         logger.info("Servidor interrompido pelo usuário")
     except Exception as e:
         logger.error(f"Erro fatal no servidor: {e}")
         sys.exit(1)
 
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
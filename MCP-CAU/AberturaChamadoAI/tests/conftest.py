@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pytest
+
+# Tornar o pacote app_core importável (mesmo esquema de priority_mapping_analysis.py)
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Cliente de teste da app, sem prober de saúde nem diretório de usuários em background."""
+    monkeypatch.setenv("HEALTH_PROBE_ENABLED", "false")
+    monkeypatch.setenv("USER_SUGGEST_ENABLED", "false")
+    from app_core import create_app
+    app = create_app()
+    yield app.test_client()
+    app.extensions["glpi_health_prober"].stop()
+    if app.extensions.get("kb_index") is not None:
+        app.extensions["kb_index"].stop()
+
+
+@pytest.fixture(scope="session")
+def _servidor_glpi():
+    from scripts.fake_glpi_server import FakeGlpiConfig, FakeGlpiServer
+    server = FakeGlpiServer(FakeGlpiConfig(users=50)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def glpi_fake(_servidor_glpi, monkeypatch):
+    """
+    GLPI falso (scripts/fake_glpi_server.py) no mesmo processo, com caches e pools do app
+    zerados. Pedir antes de `client` para a app já ler GLPI_URL/tokens do ambiente.
+    """
+    from app_core.services import conversation, duplicates, glpi, glpi_http, glpi_schema
+    monkeypatch.setenv("GLPI_URL", _servidor_glpi.base_url)
+    monkeypatch.setenv("GLPI_APP_TOKEN", _servidor_glpi.glpi.config.app_token)
+    monkeypatch.setenv("GLPI_USER_TOKEN", _servidor_glpi.glpi.config.user_token)
+    monkeypatch.setenv("GLPI_NODES", "")
+
+    def limpar():
+        glpi.limpar_cache_usuarios()
+        glpi._service_sessions.clear()
+        glpi_schema.limpar_cache_projetores()
+        conversation.limpar_contextos()
+        duplicates.limpar_indice()
+        glpi_http.fechar_pool()
+
+    limpar()
+    _servidor_glpi.reset_stats()
+    yield _servidor_glpi
+    limpar()
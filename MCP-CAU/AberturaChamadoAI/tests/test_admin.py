@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import json
+import tracemalloc
+
+import pytest
+
+TOKEN = "segredo-admin"
+ADMIN = {"X-Admin-Token": TOKEN}
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", TOKEN)
+
+
+@pytest.fixture
+def profiling(admin, monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    monkeypatch.setenv("PROFILING_OUTPUT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_sem_admin_token_superficie_nao_existe(monkeypatch, client):
+    monkeypatch.setenv("ADMIN_TOKEN", "")
+    resp = client.get("/api/admin/memory", headers=ADMIN)
+    assert resp.status_code == 404 and resp.get_json()["erro"] == "not_found"
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Admin-Token": "errado"}, {"X-Admin-Token": ""}])
+def test_token_invalido_proibido(admin, client, headers):
+    resp = client.get("/api/admin/memory", headers=headers)
+    assert resp.status_code == 403 and resp.get_json()["erro"] == "forbidden"
+
+
+def test_profiling_desligado_responde_409(admin, client):
+    resp = client.get("/api/admin/profiling", headers=ADMIN)
+    assert resp.status_code == 409 and resp.get_json()["erro"] == "profiling_disabled"
+    # Desligado, nenhum hook é instalado: X-Profile não tem efeito
+    live = client.get("/api/health/live", headers={**ADMIN, "X-Profile": "1"})
+    assert "X-Profile-Trace-Id" not in live.headers
+
+
+def test_profiling_sob_demanda_e_flush(profiling, client):
+    status = client.get("/api/admin/profiling", headers=ADMIN).get_json()["profiling"]
+    assert status["sample_rate"] == 0.0 and status["samples"] == {}
+
+    # X-Profile só vale com token administrativo válido
+    assert "X-Profile-Trace-Id" not in client.get("/api/health/live", headers={"X-Profile": "1"}).headers
+    resp = client.get("/api/health/live", headers={**ADMIN, "X-Profile": "1"})
+    trace_id = resp.headers["X-Profile-Trace-Id"]
+
+    samples = client.get("/api/admin/profiling", headers=ADMIN).get_json()["profiling"]["samples"]
+    assert samples == {"/api/health/live": 1}
+    indice = [json.loads(l) for l in (profiling / "index.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert indice[-1]["trace_id"] == trace_id and indice[-1]["route"] == "/api/health/live"
+
+    files = client.post("/api/admin/profiling/flush", headers=ADMIN).get_json()["files"]
+    assert len(files) == 1 and files[0].endswith("api_health_live.pstats")
+    assert (profiling / "api_health_live.txt").exists()
+
+
+def test_profiling_reconfigura_em_tempo_de_execucao(profiling, client):
+    resp = client.post("/api/admin/profiling", headers=ADMIN,
+                       json={"sample_rate": 5, "routes": ["/api/health/live"], "active": False})
+    status = resp.get_json()["profiling"]
+    assert status["sample_rate"] == 1.0 and status["routes"] == ["/api/health/live"] and not status["active"]
+    assert "X-Profile-Trace-Id" not in client.get("/api/health/live").headers
+
+    client.post("/api/admin/profiling", headers=ADMIN, json={"active": True, "sample_rate": 0})
+    assert "X-Profile-Trace-Id" in client.get("/api/health/live").headers  # rota escolhida
+
+    resp = client.post("/api/admin/profiling", headers=ADMIN, json={"sample_rate": "muito"})
+    assert resp.status_code == 400
+    status = client.post("/api/admin/profiling", headers=ADMIN, json={"reset": True}).get_json()["profiling"]
+    assert status["samples"] == {}
+
+
+@pytest.fixture
+def memoria(admin, monkeypatch):
+    monkeypatch.setenv("MEMORY_MAX_SNAPSHOTS", "2")
+    yield
+    tracemalloc.stop()
+
+
+def test_memoria_status_e_objetos(memoria, client):
+    status = client.get("/api/admin/memory", headers=ADMIN).get_json()["memory"]
+    assert status["tracing"] is False and status["snapshots"] == [] and status["max_snapshots"] == 2
+    objetos = client.get("/api/admin/memory/objects?limit=3", headers=ADMIN).get_json()["objects"]
+    assert len(objetos) == 3 and objetos[0]["count"] >= objetos[-1]["count"]
+
+
+def test_snapshot_exige_tracing(memoria, client):
+    resp = client.post("/api/admin/memory/snapshots", headers=ADMIN, json={"label": "a"})
+    assert resp.status_code == 409 and resp.get_json()["erro"] == "tracing_inactive"
+
+
+def test_snapshots_top_e_diff(memoria, client):
+    status = client.post("/api/admin/memory/tracing", headers=ADMIN, json={"frames": 5}).get_json()["memory"]
+    assert status["tracing"] is True
+
+    assert client.post("/api/admin/memory/snapshots", headers=ADMIN, json={"label": "antes"}).status_code == 201
+    retido = [bytearray(1024) for _ in range(200)]  # noqa: F841 - precisa estar viva no snapshot
+    assert client.post("/api/admin/memory/snapshots", headers=ADMIN, json={"label": "depois"}).status_code == 201
+
+    top = client.get("/api/admin/memory/snapshots/depois/top?limit=5", headers=ADMIN).get_json()["top"]
+    assert 0 < len(top) <= 5 and "test_admin.py:" in top[0]["site"]  # a lista retida é o maior site
+    assert client.get("/api/admin/memory/snapshots/depois/top?group_by=x", headers=ADMIN).status_code == 400
+    assert client.get("/api/admin/memory/snapshots/nenhum/top", headers=ADMIN).status_code == 404
+
+    diff = client.get("/api/admin/memory/diff?base=antes&target=depois", headers=ADMIN).get_json()["diff"]
+    assert max(d["size_diff_kb"] for d in diff) >= 150
+    assert client.get("/api/admin/memory/diff", headers=ADMIN).status_code == 400
+    assert client.get("/api/admin/memory/diff?base=nenhum", headers=ADMIN).status_code == 404
+
+    # Sem target, o diff tira um snapshot novo; o limite (2) descarta o mais antigo
+    assert client.get("/api/admin/memory/diff?base=depois", headers=ADMIN).status_code == 200
+    labels = [s["label"] for s in client.get("/api/admin/memory", headers=ADMIN).get_json()["memory"]["snapshots"]]
+    assert len(labels) == 2 and labels[0] == "depois"
+
+    status = client.post("/api/admin/memory/tracing", headers=ADMIN, json={"active": False}).get_json()["memory"]
+    assert status["tracing"] is False and status["snapshots"] == []
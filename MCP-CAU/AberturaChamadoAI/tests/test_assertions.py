@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from app_core.utils.assertions import AssercaoInvalida, emitir_assercao, verificar_assercao
+
+CHAVES = "k1:segredo-de-teste"
+
+
+@pytest.fixture
+def chaves(monkeypatch):
+    monkeypatch.setenv("AUTH_ASSERTION_KEYS", CHAVES)
+    monkeypatch.setenv("AUTH_ASSERTION_TTL", "60")
+
+
+def test_assercao_expira(chaves, monkeypatch):
+    token, exp = emitir_assercao(7, "joao.silva", "joao@example.com")
+    assert verificar_assercao(token)["sub"] == 7
+    agora = time.time()
+    monkeypatch.setattr(time, "time", lambda: agora + 61)
+    with pytest.raises(AssercaoInvalida, match="expirada"):
+        verificar_assercao(token)
+
+
+def test_assercao_assinatura_e_chave(chaves):
+    token, _ = emitir_assercao(7, "joao.silva")
+    kid, payload, assinatura = token.split(".")
+    with pytest.raises(AssercaoInvalida, match="assinatura"):
+        verificar_assercao(f"{kid}.{payload}.{assinatura[:-2]}xx")
+    with pytest.raises(AssercaoInvalida, match="chave desconhecida"):
+        verificar_assercao(f"k0.{payload}.{assinatura}")
+
+
+def test_login_por_assercao_nao_renova(chaves, client):
+    token, exp = emitir_assercao(7, "joao.silva", "joao@example.com")
+    resp = client.post("/api/authenticate-user", json={"login": "joao.silva"},
+                       headers={"X-Auth-Assertion": token})
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert body["auth"]["method"] == "assertion"
+    assert body["assertion"] == token
+    assert body["assertion_expires_at"] == exp
+
+
+def test_login_por_assercao_expirada_exige_senha(chaves, client, monkeypatch):
+    token, _ = emitir_assercao(7, "joao.silva")
+    agora = time.time()
+    monkeypatch.setattr(time, "time", lambda: agora + 61)
+    resp = client.post("/api/authenticate-user", json={"login": "joao.silva"},
+                       headers={"X-Auth-Assertion": token})
+    assert resp.status_code == 422
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from scripts.fake_glpi_server import generate_users
+
+USUARIOS = generate_users(50, 42)[1:6]
+
+
+def test_lote_em_blocos_com_invalidos_e_duplicados(glpi_fake, client, monkeypatch):
+    monkeypatch.setenv("BATCH_LOOKUP_CHUNK_SIZE", "2")
+    emails = [u["email"].upper() for u in USUARIOS] + ["ninguem@example.gov.br", USUARIOS[0]["email"], "invalido", 7]
+    resp = client.post("/api/glpi-users-by-email", json={"emails": emails})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert (body["total"], body["found"], body["not_found"]) == (6, 5, 1)
+    assert body["invalidos"] == ["invalido", 7]
+    assert sorted(body["resultados"]) == sorted([u["email"] for u in USUARIOS] + ["ninguem@example.gov.br"])
+    assert body["resultados"][USUARIOS[2]["email"]]["user_id"] == USUARIOS[2]["id"]
+    assert not body["resultados"]["ninguem@example.gov.br"]["found"]
+    # 6 e-mails em blocos de 2 critérios OR: 3 buscas no GLPI
+    assert glpi_fake.stats()["calls"]["search"] == 3
+
+    # Encontrados ficam em cache: só o não encontrado volta ao GLPI
+    glpi_fake.reset_stats()
+    compacto = client.post("/api/v2/glpi-users-by-email", json={"emails": emails}).get_json()
+    assert compacto["data"]["found"] == 5 and compacto["data"]["invalid"] == ["invalido", 7]
+    assert glpi_fake.stats()["calls"]["search"] == 1
+
+
+def test_lote_acima_do_limite(glpi_fake, client, monkeypatch):
+    monkeypatch.setenv("BATCH_LOOKUP_MAX_EMAILS", "3")
+    resp = client.post("/api/glpi-users-by-email", json={"emails": [u["email"] for u in USUARIOS]})
+    assert resp.status_code == 413
+    assert "Máximo de 3" in resp.get_json()["erro"]
+    assert glpi_fake.stats()["calls"].get("search", 0) == 0
+
+    compacto = client.post("/api/v2/glpi-users-by-email", json={"emails": [u["email"] for u in USUARIOS]})
+    assert compacto.status_code == 413 and compacto.get_json()["error"]["code"] == "payload_too_large"
+
+
+def test_lote_vazio(client):
+    assert client.post("/api/glpi-users-by-email", json={"emails": []}).status_code == 400
+    assert client.post("/api/glpi-users-by-email", data="nada", content_type="application/json").status_code == 400
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from app_core.services import glpi, glpi_schema
+
+
+class _Resposta:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def glpi_falso(monkeypatch):
+    """Responde /search/User com a página configurada para cada searchtype."""
+    monkeypatch.setenv("GLPI_URL", "http://glpi.teste/apirest.php")
+    monkeypatch.setattr(glpi, "obter_projetor", lambda itemtype, headers: glpi_schema.compilar_projetor(itemtype, {}))
+    paginas = {}
+    pedidos = []
+
+    def glpi_request(method, path, kind, headers=None, params=None, timeout=10):
+        pedidos.append(params["criteria[0][searchtype]"])
+        return _Resposta(paginas.get(params["criteria[0][searchtype]"], {"totalcount": 0, "count": 0}))
+
+    monkeypatch.setattr(glpi, "glpi_request", glpi_request)
+    return paginas, pedidos
+
+
+def test_raw_e_o_json_do_glpi_e_search_o_resumo(glpi_falso):
+    paginas, pedidos = glpi_falso
+    paginas["equals"] = {"totalcount": 1, "count": 1, "content-range": "0-0/1",
+                         "data": [{"2": 7, "1": "joao.silva", "5": "joao@example.com", "9": "João", "34": "Silva"}]}
+    res = glpi.buscar_usuario_glpi(email="joao@example.com", headers={})
+    assert res["found"] is True
+    assert res["user"]["name"] == "joao.silva"
+    assert res["raw"] is paginas["equals"]
+    assert res["search"] == {"searchtype": "equals", "totalcount": 1, "rows_read": 1, "pages": 1}
+    assert pedidos == ["equals"]
+
+
+def test_raw_da_busca_contains(glpi_falso):
+    paginas, pedidos = glpi_falso
+    paginas["contains"] = {"totalcount": 1, "count": 1, "data": [{"2": 9, "1": "maria"}]}
+    res = glpi.buscar_usuario_glpi(login="mar", headers={})
+    assert res["user"]["id"] == 9
+    assert res["raw"] is paginas["contains"]
+    assert res["search"]["searchtype"] == "contains"
+    assert pedidos == ["equals", "contains"]
+
+
+def test_nao_encontrado_raw_da_busca_equals(glpi_falso):
+    res = glpi.buscar_usuario_glpi(login="ninguem", headers={})
+    assert res["found"] is False and res["user"] is None
+    assert res["raw"] == {"totalcount": 0, "count": 0}
+
+
+def test_linhas_posicionais(glpi_falso):
+    paginas, _ = glpi_falso
+    paginas["equals"] = {"totalcount": 1, "data": [[12, "Ana Souza", "ana@example.com", "ana.souza"]]}
+    res = glpi.buscar_usuario_glpi(email="ana@example.com", headers={})
+    assert res["found"] is True
+    assert res["user"]["id"] == 12
+    assert res["user"]["name"] == "Ana Souza"
+    assert res["user"]["email"] == "ana@example.com"
+    assert res["user"]["login"] == "ana.souza"
+
+
+def test_linha_em_dicionario_tem_preferencia_sobre_posicional():
+    projetor = glpi_schema.compilar_projetor("User", {})
+    usuario = glpi.selecionar_usuario([[1, "x"], {"2": 5, "1": "pedro"}], projetor, "login", "pedro")
+    assert usuario.id == 5
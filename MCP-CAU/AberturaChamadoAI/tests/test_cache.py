@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from app_core.utils.cache import TTLCache
+
+
+def _concorrentes(n, alvo):
+    barreira = threading.Barrier(n)
+    resultados, erros = [], []
+
+    def rodar():
+        barreira.wait()
+        try:
+            resultados.append(alvo())
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=rodar) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return resultados, erros
+
+
+def test_get_or_load_single_flight():
+    cache = TTLCache(ttl=60)
+    chamadas = []
+
+    def loader():
+        chamadas.append(1)
+        time.sleep(0.1)
+        return {"Session-Token": "abc"}
+
+    resultados, erros = _concorrentes(8, lambda: cache.get_or_load("glpi", loader))
+    assert not erros
+    assert len(chamadas) == 1
+    assert all(r is resultados[0] for r in resultados)
+    assert cache.get("glpi") is resultados[0]
+
+
+def test_get_or_load_falha_repassada_e_nada_armazenado():
+    cache = TTLCache(ttl=60)
+    chamadas = []
+
+    def loader():
+        chamadas.append(1)
+        time.sleep(0.1)
+        raise RuntimeError("GLPI fora do ar")
+
+    resultados, erros = _concorrentes(4, lambda: cache.get_or_load("glpi", loader))
+    assert not resultados
+    assert len(erros) == 4 and len(chamadas) == 1
+    assert cache.get("glpi") is None
+    assert cache.get_or_load("glpi", lambda: "ok") == "ok"
+
+
+def test_on_evict_expiracao_limite_e_substituicao():
+    descartados = []
+    cache = TTLCache(maxsize=2, ttl=60, on_evict=lambda k, v: descartados.append((k, v)))
+    cache.set("curto", 1, ttl=0)
+    assert cache.get("curto") is None
+    cache.set("a", "A")
+    cache.set("b", "B")
+    cache.set("c", "C")
+    cache.set("c", "C2")
+    assert descartados == [("curto", 1), ("a", "A"), ("c", "C")]
+    assert cache.pop("b") == "B"
+    cache.clear()
+    assert len(descartados) == 3
+    assert cache.stats()["evictions"] == 3
+
+
+def test_on_evict_com_erro_nao_propaga():
+    cache = TTLCache(ttl=0, on_evict=lambda k, v: 1 / 0)
+    cache.set("x", 1)
+    assert cache.get("x", "padrão") == "padrão"
+
+
+def test_sessao_servico_um_init_session_e_kill_na_expiracao(monkeypatch):
+    from app_core.services import glpi
+
+    monkeypatch.setenv("GLPI_URL", "http://glpi.teste/apirest.php")
+    monkeypatch.setenv("GLPI_SESSION_TTL", "60")
+    glpi._service_sessions.clear()
+    abertas, encerradas = [], []
+
+    def autenticar(timeout=10):
+        time.sleep(0.1)
+        abertas.append(f"s{len(abertas)}")
+        return {"Session-Token": abertas[-1]}
+
+    monkeypatch.setattr(glpi, "autenticar_glpi", autenticar)
+    monkeypatch.setattr(glpi, "encerrar_sessao_glpi", lambda headers, timeout=10: encerradas.append(headers) or True)
+
+    resultados, erros = _concorrentes(6, glpi.sessao_servico)
+    assert not erros and abertas == ["s0"]
+    assert {r["Session-Token"] for r in resultados} == {"s0"}
+
+    agora = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: agora + 61)
+    assert glpi.sessao_servico()["Session-Token"] == "s1"
+    assert encerradas == [{"Session-Token": "s0"}]
+    glpi._service_sessions.clear()
+
+
+def test_get_or_load_ttl_zero_nao_reaproveita():
+    cache = TTLCache(ttl=60)
+    assert cache.get_or_load("k", lambda: 1, 0) == 1
+    assert cache.get_or_load("k", lambda: 2, 0) == 2
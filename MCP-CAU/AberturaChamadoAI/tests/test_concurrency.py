@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from app_core.config import Settings
+from app_core.services.glpi_http import PRIORIDADE_BACKGROUND, PRIORIDADE_URGENTE, prioridade_glpi
+from app_core.utils.concurrency import AdaptiveConcurrencyLimiter, instalar_limitador
+
+
+def test_observe_ignora_chamadas_em_background():
+    limiter = AdaptiveConcurrencyLimiter(initial=20, min_limit=4)
+    with prioridade_glpi(PRIORIDADE_BACKGROUND):
+        for _ in range(10):
+            limiter.observe("search", 5000.0, False)
+    assert limiter.limit == 20
+    assert limiter.decreases == 0
+    assert limiter.status()["glpi_latency"] == {}
+
+
+def test_observe_conta_chamadas_das_requisicoes():
+    limiter = AdaptiveConcurrencyLimiter(initial=20, min_limit=4)
+    limiter.observe("search", 5000.0, False)
+    with prioridade_glpi(PRIORIDADE_URGENTE):
+        limiter.observe("Ticket", 5000.0, False)
+    assert limiter.limit < 20
+    assert set(limiter.status()["glpi_latency"]) == {"search", "Ticket"}
+
+
+def _settings(**kw):
+    return Settings(glpi_url=None, glpi_app_token=None, glpi_user_token=None, **kw)
+
+
+def test_fila_justa_sem_limitador_avisa(caplog):
+    with caplog.at_level(logging.WARNING, logger="app_core.utils.concurrency"):
+        assert instalar_limitador(None, _settings(fair_queue_enabled=True)) is None
+    assert "CONCURRENCY_LIMIT_ENABLED" in caplog.text
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="app_core.utils.concurrency"):
+        instalar_limitador(None, _settings())
+    assert caplog.text == ""
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from pathlib import Path
+
+from app_core import config
+
+PROJECT_ROOT = Path(config.__file__).resolve().parents[2]
+
+
+def test_raiz_do_projeto_e_mcp_cau():
+    assert (PROJECT_ROOT / "AberturaChamadoAI" / "app_core" / "config.py").is_file()
+    assert (PROJECT_ROOT / "docs").is_dir()
+
+
+def test_kb_docs_dir(monkeypatch):
+    monkeypatch.delenv("KB_DOCS_DIR", raising=False)
+    assert config.load_settings().kb_docs_dir == str(PROJECT_ROOT / "docs" / "kb")
+    monkeypatch.setenv("KB_DOCS_DIR", "outra/kb")
+    assert config.load_settings().kb_docs_dir == str(PROJECT_ROOT / "outra" / "kb")
+    monkeypatch.setenv("KB_DOCS_DIR", "")
+    assert config.load_settings().kb_docs_dir is None
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from scripts.fake_glpi_server import generate_users
+
+USUARIO, OUTRO = generate_users(50, 42)[4:6]
+CHAMADO = {
+    "title": "Impressora sem papel",
+    "description": "A impressora do segundo andar não puxa papel desde a manhã de hoje.",
+    "category": "HARDWARE_IMPRESSORA",
+    "impact": "MEDIO",
+    "location": "Bloco B, sala 204",
+    "contact_phone": "(61) 3333-4444",
+}
+
+
+def _autenticar(client):
+    resp = client.post("/api/authenticate-user", json={"login": USUARIO["name"], "password": "senha123"})
+    assert resp.status_code == 200
+    return resp.get_json()["conversation_id"]
+
+
+def test_chamado_reaproveita_identidade_da_conversa(glpi_fake, client):
+    conversation_id = _autenticar(client)
+    assert conversation_id
+    glpi_fake.reset_stats()
+
+    resp = client.post("/api/create-ticket-complete", json={**CHAMADO, "conversation_id": conversation_id})
+    assert resp.status_code == 201
+    requester = resp.get_json()["details"]["requester"]
+    assert requester["source"] == "conversation" and requester["user_id"] == USUARIO["id"]
+    # Nenhuma busca de usuário no GLPI: só a criação do chamado
+    assert "search" not in glpi_fake.stats()["calls"]
+    ticket = glpi_fake.glpi.tickets[resp.get_json()["ticket_id"]]
+    assert ticket["_users_id_requester"] == USUARIO["id"]
+
+    # Header X-Conversation-Id equivale ao campo do corpo
+    resp = client.post("/api/create-ticket-complete", json=CHAMADO, headers={"X-Conversation-Id": conversation_id})
+    assert resp.get_json()["details"]["requester"]["source"] == "conversation"
+
+
+def test_outro_requerente_ou_conversa_desconhecida_buscam_no_glpi(glpi_fake, client):
+    conversation_id = _autenticar(client)
+    glpi_fake.reset_stats()
+
+    resp = client.post("/api/create-ticket-complete",
+                       json={**CHAMADO, "conversation_id": conversation_id, "requester_email": OUTRO["email"]})
+    requester = resp.get_json()["details"]["requester"]
+    assert requester["source"] == "lookup" and requester["user_id"] == OUTRO["id"]
+
+    resp = client.post("/api/create-ticket-complete",
+                       json={**CHAMADO, "conversation_id": "desconhecida", "requester_email": USUARIO["email"]})
+    requester = resp.get_json()["details"]["requester"]
+    assert requester["source"] == "lookup" and requester["user_id"] == USUARIO["id"]
+    assert glpi_fake.stats()["calls"]["search"] >= 2
+
+
+def test_contexto_desativado(glpi_fake, client, monkeypatch):
+    monkeypatch.setenv("CONVERSATION_CONTEXT_TTL", "0")
+    assert _autenticar(client) is None
+    resp = client.post("/api/create-ticket-complete", json={**CHAMADO, "conversation_id": "qualquer"})
+    assert resp.status_code == 201 and resp.get_json()["details"]["requester"] is None
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from app_core.services import duplicates
+from app_core.services.duplicates import IndiceDuplicatas, esboco, similaridade
+from scripts.fake_glpi_server import generate_users
+
+USUARIO = generate_users(50, 42)[9]
+TEXTO = "Impressora sem papel. A impressora do segundo andar não puxa papel desde a manhã."
+CHAMADO = {
+    "title": "Impressora sem papel",
+    "description": "A impressora do segundo andar não puxa papel desde a manhã.",
+    "category": "HARDWARE_IMPRESSORA",
+    "impact": "MEDIO",
+    "location": "Bloco B, sala 204",
+    "contact_phone": "(61) 3333-4444",
+    "requester_email": USUARIO["email"],
+}
+
+
+def test_similaridade_minhash():
+    assert similaridade(esboco(TEXTO), esboco(TEXTO)) == 1.0
+    reescrito = "IMPRESSORA sem papel!! a impressora do 2o andar nao puxa papel desde a manha"
+    assert similaridade(esboco(TEXTO), esboco(reescrito)) >= 0.5
+    assert similaridade(esboco(TEXTO), esboco("Sem acesso à VPN com certificado expirado")) < 0.2
+
+
+def test_indice_por_requerente_local_e_janela(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(duplicates.time, "monotonic", lambda: agora[0])
+    indice = IndiceDuplicatas(window=600.0, threshold=0.5)
+    indice.registrar(7, "Sala 204", TEXTO, 101, "Impressora sem papel")
+
+    agora[0] += 60
+    achado = indice.procurar(7, "sala 204", TEXTO)
+    assert achado == {"ticket_id": 101, "similarity": 1.0, "age_s": 60.0, "title": "Impressora sem papel"}
+    assert indice.procurar(8, "Sala 204", TEXTO) is None
+    assert indice.procurar(7, "Sala 305", TEXTO) is None
+    assert indice.procurar(None, "Sala 204", TEXTO) is None
+
+    # Fora da janela: a entrada sai e o par deixa de ocupar o índice
+    agora[0] += 600
+    assert indice.procurar(7, "Sala 204", TEXTO) is None
+    assert indice.status()["buckets"] == 0 and indice.status()["hits"] == 1
+
+
+@pytest.mark.parametrize("modo", ["flag", "return"])
+def test_reenvio_do_mesmo_chamado(glpi_fake, client, monkeypatch, modo):
+    monkeypatch.setenv("DUPLICATE_MODE", modo)
+    primeiro = client.post("/api/create-ticket-complete", json=CHAMADO)
+    assert primeiro.status_code == 201
+    ticket_id = primeiro.get_json()["ticket_id"]
+    assert "possible_duplicate_of" not in primeiro.get_json()
+
+    criados = len(glpi_fake.glpi.tickets)
+    segundo = client.post("/api/create-ticket-complete", json=CHAMADO)
+    body = segundo.get_json()
+    if modo == "flag":
+        assert segundo.status_code == 201 and body["ticket_id"] != ticket_id
+        assert body["possible_duplicate_of"]["ticket_id"] == ticket_id
+    else:
+        assert segundo.status_code == 200 and body["duplicate"] and body["ticket_id"] == ticket_id
+        assert len(glpi_fake.glpi.tickets) == criados  # nada criado no GLPI
+
+    # allow_duplicate força a criação sem consultar o índice
+    forcado = client.post("/api/create-ticket-complete", json={**CHAMADO, "allow_duplicate": True})
+    assert forcado.status_code == 201 and "possible_duplicate_of" not in forcado.get_json()
+
+
+def test_modo_desligado_nao_indexa(glpi_fake, client, monkeypatch):
+    monkeypatch.setenv("DUPLICATE_MODE", "off")
+    client.post("/api/create-ticket-complete", json=CHAMADO)
+    segundo = client.post("/api/create-ticket-complete", json=CHAMADO)
+    assert segundo.status_code == 201 and "possible_duplicate_of" not in segundo.get_json()
+    assert duplicates.obter_indice() is None
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from flask import Flask, jsonify
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from app_core.utils.fair_queue import identificar_chamador, parse_pesos
+
+
+def _cliente(proxy_hops=0):
+    app = Flask(__name__)
+    if proxy_hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_hops)
+
+    @app.route("/quem")
+    def quem():
+        return jsonify(chamador=identificar_chamador())
+
+    return app.test_client()
+
+
+def _chamador(client, headers=None, remote="203.0.113.5"):
+    return client.get("/quem", headers=headers or {}, environ_base={"REMOTE_ADDR": remote}).get_json()["chamador"]
+
+
+def test_api_key_por_hash():
+    chamador = _chamador(_cliente(), {"X-API-Key": "segredo"})
+    assert chamador.startswith("key:") and "segredo" not in chamador
+
+
+def test_headers_do_cliente_nao_mudam_a_identidade():
+    client = _cliente()
+    headers = {"X-Forwarded-For": "1.2.3.4", "X-Bot-Id": "copilot"}
+    assert _chamador(client, headers) == "ip:203.0.113.5"
+
+
+def test_proxy_confiavel_usa_o_salto_informado_e_nao_o_mais_a_esquerda():
+    client = _cliente(proxy_hops=1)
+    # O cliente forja "1.2.3.4"; o proxy confiável acrescenta o IP real à direita
+    assert _chamador(client, {"X-Forwarded-For": "1.2.3.4, 198.51.100.7"}, remote="10.0.0.1") == "ip:198.51.100.7"
+
+
+def test_parse_pesos():
+    assert parse_pesos(["key:3f2a9c1b7d4e=4", "ip:10.0.0.7=0.5"]) == {"key:3f2a9c1b7d4e": 4.0, "ip:10.0.0.7": 0.5}
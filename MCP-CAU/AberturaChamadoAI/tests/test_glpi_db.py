@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import threading
+
+import pytest
+
+from app_core.services import glpi, glpi_db
+from app_core.services.glpi_db import SqlUserBackend, criar_backend_sql
+from scripts.fake_glpi_server import generate_users
+from scripts.glpi_sqlite_standin import build
+
+USUARIOS = generate_users(20, 42)
+
+
+@pytest.fixture
+def banco(tmp_path):
+    return build(str(tmp_path / "glpi.db"), 20, 42)
+
+
+@pytest.fixture
+def backend(banco):
+    backend = criar_backend_sql(f"sqlite:///{banco}", pool_size=2)
+    yield backend
+    backend.close()
+
+
+def test_busca_por_email_e_login(backend):
+    alvo = USUARIOS[5]
+    por_email = backend.buscar(email=alvo["email"].upper())
+    assert por_email["found"]
+    assert por_email["user"]["id"] == alvo["id"]
+    assert por_email["user"]["login"] == alvo["name"]
+    assert por_email["raw"] is None
+    assert por_email["search"] == {"backend": "sqlite", "searchtype": "equals", "rows_read": 1}
+
+    por_login = backend.buscar(login=alvo["name"])
+    assert por_login["found"] and por_login["user"]["email"] == alvo["email"]
+    assert not backend.buscar(email="ninguem@example.gov.br")["found"]
+
+
+def test_usuario_excluido_nao_encontrado(banco, backend):
+    alvo = USUARIOS[3]
+    conn = sqlite3.connect(str(banco))
+    conn.execute("UPDATE glpi_users SET is_deleted = 1 WHERE id = ?", (alvo["id"],))
+    conn.commit()
+    conn.close()
+    assert not backend.buscar(email=alvo["email"])["found"]
+    assert not backend.buscar(login=alvo["name"])["found"]
+    assert not backend.buscar_por_emails([alvo["email"]])
+
+
+def test_busca_em_lote_por_blocos(backend):
+    emails = [u["email"] for u in USUARIOS[1:6]] + ["ninguem@example.gov.br"]
+    consultas = []
+    query = backend._query
+    backend._query = lambda sql, params: consultas.append(len(params)) or query(sql, params)
+    encontrados = backend.buscar_por_emails(emails, chunk_size=2)
+    assert consultas == [2, 2, 2]
+    assert sorted(encontrados) == sorted(emails[:5])
+    assert encontrados[emails[0]].id == USUARIOS[1]["id"]
+
+
+def test_conexoes_reaproveitadas_entre_threads(backend):
+    alvo = USUARIOS[1]["email"]
+    threads = [threading.Thread(target=backend.buscar, kwargs={"email": alvo}) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert 1 <= backend.opened <= backend.pool_size
+    backend.buscar(email=alvo)
+    assert backend.opened <= backend.pool_size
+
+
+def test_pool_esgotado_e_conexao_quebrada():
+    abertas = []
+
+    def connect():
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        abertas.append(conn)
+        return conn
+
+    backend = SqlUserBackend(connect, pool_size=1, wait_timeout=0.05)
+    conn = backend._emprestar()
+    with pytest.raises(RuntimeError):
+        backend._emprestar()
+    backend._devolver(conn)
+    # Erro na consulta: a conexão é descartada e a próxima consulta abre outra
+    with pytest.raises(sqlite3.OperationalError):
+        backend.buscar(email="x@example.gov.br")
+    assert backend._query("SELECT 1", []) == [(1,)]
+    assert backend.opened == 2
+    backend.close()
+
+
+def test_falha_no_banco_cai_para_o_rest(monkeypatch, tmp_path):
+    monkeypatch.setenv("USER_LOOKUP_BACKEND", "sql")
+    monkeypatch.setenv("USER_DB_URL", f"sqlite:///{tmp_path / 'inexistente.db'}")
+    monkeypatch.setattr(glpi, "com_sessao_servico", lambda acao: {"found": True, "via": "rest"})
+    try:
+        assert glpi.buscar_usuario(email="a@example.gov.br") == {"found": True, "via": "rest"}
+    finally:
+        glpi_db.fechar_backend_sql()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app_core.services import glpi_http
+from app_core.services.glpi_http import (
+    PRIORIDADE_BACKGROUND, PRIORIDADE_INTERATIVA, GlpiSobrecarregado, PriorityGate,
+)
+
+
+def test_gate_espera_limitada():
+    gate = PriorityGate(1, max_wait=0.1)
+    gate.acquire(PRIORIDADE_INTERATIVA)
+    inicio = time.monotonic()
+    with pytest.raises(GlpiSobrecarregado):
+        gate.acquire(PRIORIDADE_INTERATIVA)
+    assert 0.1 <= time.monotonic() - inicio < 1.0
+    status = gate.status()
+    assert status["by_priority"]["interativa"]["timeouts"] == 1
+    assert status["by_priority"]["interativa"]["queued"] == 0
+    gate.release()
+    assert gate.in_use == 0
+
+
+def test_gate_vaga_repassada_por_prioridade():
+    gate = PriorityGate(1, aging_per_s=0.0, max_wait=2.0)
+    gate.acquire(PRIORIDADE_INTERATIVA)
+    ordem = []
+
+    def esperar(prioridade):
+        gate.acquire(prioridade)
+        ordem.append(prioridade)
+        gate.release()
+
+    threads = [threading.Thread(target=esperar, args=(p,)) for p in (PRIORIDADE_BACKGROUND, PRIORIDADE_INTERATIVA)]
+    for t in threads:
+        t.start()
+        time.sleep(0.05)
+    gate.release()
+    for t in threads:
+        t.join()
+    assert ordem == [PRIORIDADE_INTERATIVA, PRIORIDADE_BACKGROUND]
+    assert gate.in_use == 0
+
+
+def test_gate_padrao_desligado(monkeypatch):
+    monkeypatch.delenv("GLPI_OUTBOUND_CONCURRENCY", raising=False)
+    monkeypatch.setenv("GLPI_URL", "http://glpi.teste/apirest.php")
+    glpi_http.fechar_pool()
+    try:
+        assert glpi_http.obter_pool().gate is None
+    finally:
+        glpi_http.fechar_pool()
+
+
+def test_obter_pool_nao_rele_configuracao_a_cada_chamada(monkeypatch):
+    monkeypatch.setenv("GLPI_URL", "http://glpi.teste/apirest.php")
+    glpi_http.fechar_pool()
+    leituras = []
+    original = glpi_http.load_settings
+    monkeypatch.setattr(glpi_http, "load_settings", lambda: leituras.append(1) or original())
+    try:
+        pool = glpi_http.obter_pool()
+        assert all(glpi_http.obter_pool() is pool for _ in range(100))
+        assert len(leituras) == 1
+    finally:
+        glpi_http.fechar_pool()
+
+
+def test_rota_responde_503_com_fila_cheia(client, monkeypatch):
+    def sobrecarregado(*args, **kwargs):
+        raise GlpiSobrecarregado("Sem vaga para chamar o GLPI em 5.0s (10 chamadas em andamento)")
+
+    monkeypatch.setattr("app_core.routes.tickets.buscar_usuario_por_email_cacheado", sobrecarregado)
+    resp = client.get("/api/glpi-user-by-email?email=joao@example.com")
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"]
+    assert resp.get_json()["codigo"] == "overloaded"
+    resp = client.get("/api/v2/glpi-user-by-email?email=joao@example.com")
+    assert resp.status_code == 503
+    assert resp.get_json()["error"]["code"] == "overloaded"
+
+
+class _RaizHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.portas.append(self.client_address[1])
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_conectar_abre_conexao_reaproveitada_por_no():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RaizHandler)
+    server.portas = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with socket.socket() as livre:
+        livre.bind(("127.0.0.1", 0))
+        porta_fechada = livre.getsockname()[1]
+    ativo = f"http://127.0.0.1:{server.server_address[1]}"
+    fora = f"http://127.0.0.1:{porta_fechada}"
+    pool = glpi_http.GlpiNodePool([(ativo, "primary"), (fora, "read")], eject_after=1)
+    try:
+        result = pool.conectar(timeout=2.0)
+        assert result[ativo]["ok"] and result[ativo]["status"] == 200
+        assert not result[fora]["ok"] and result[fora]["error"]
+        # A chamada real usa a conexão aberta no warm-up, e o nó inacessível já saiu do balanceamento
+        pool.request("GET", "/getFullSession", "write", timeout=2.0)
+        assert len(server.portas) == 2 and server.portas[0] == server.portas[1]
+        assert pool.nodes[1].snapshot()["ejected"]
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_troca_de_configuracao_fecha_pool_antigo_apos_chamadas_em_andamento(monkeypatch):
+    monkeypatch.setenv("GLPI_URL", "http://glpi.teste/apirest.php")
+    monkeypatch.setenv("GLPI_NODE_EJECT_AFTER", "3")
+    glpi_http.fechar_pool()
+    try:
+        antigo = glpi_http.obter_pool()
+        fechados, liberar, iniciada = [], threading.Event(), threading.Event()
+        monkeypatch.setattr(antigo, "close", lambda: fechados.append(antigo))
+        monkeypatch.setattr(antigo, "_request",
+                            lambda *a, **k: (iniciada.set(), liberar.wait(5)) and "resposta")
+        resultado = []
+        chamada = threading.Thread(target=lambda: resultado.append(antigo.request("GET", "/search/User")))
+        chamada.start()
+        assert iniciada.wait(5)
+
+        # Mudança só no critério de ejeção também recria o pool
+        monkeypatch.setenv("GLPI_NODE_EJECT_AFTER", "5")
+        monkeypatch.setattr(glpi_http, "_pool_checked_at", 0.0)
+        novo = glpi_http.obter_pool()
+        assert novo is not antigo and novo.eject_after == 5
+        assert fechados == []
+
+        liberar.set()
+        chamada.join(5)
+        assert resultado == ["resposta"] and fechados == [antigo]
+    finally:
+        glpi_http.fechar_pool()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import pytest
+import requests
+
+from app_core.services import glpi, glpi_schema
+
+OPTIONS = {
+    "common": "Características",
+    "1": {"table": "glpi_users", "field": "name"},
+    "2": {"table": "glpi_users", "field": "id"},
+    "5": {"table": "glpi_useremails", "field": "email"},
+    "9": {"table": "glpi_users", "field": "firstname"},
+    "34": {"table": "glpi_users", "field": "realname"},
+}
+
+
+def _http_error(status):
+    resp = requests.Response()
+    resp.status_code = status
+    return requests.HTTPError(f"{status} erro", response=resp)
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo(monkeypatch):
+    monkeypatch.setenv("GLPI_URL", "http://glpi.teste/apirest.php")
+    glpi_schema.limpar_cache_projetores()
+    yield
+    glpi_schema.limpar_cache_projetores()
+
+
+def _falhar_com(monkeypatch, erro):
+    chamadas = []
+
+    def listar(itemtype, headers, timeout=10):
+        chamadas.append(headers)
+        raise erro
+
+    monkeypatch.setattr(glpi_schema, "listar_search_options", listar)
+    return chamadas
+
+
+def test_sessao_recusada_nao_cacheia_padrao(monkeypatch):
+    chamadas = _falhar_com(monkeypatch, _http_error(401))
+    with pytest.raises(requests.HTTPError):
+        glpi_schema.obter_projetor("User", {})
+    with pytest.raises(requests.HTTPError):
+        glpi_schema.obter_projetor("User", {})
+    assert len(chamadas) == 2
+
+
+@pytest.mark.parametrize("erro", [_http_error(404), _http_error(400), RuntimeError("formato inesperado")])
+def test_nao_suportado_cacheia_padrao(monkeypatch, erro):
+    chamadas = _falhar_com(monkeypatch, erro)
+    assert glpi_schema.obter_projetor("User", {}).source == "default"
+    assert glpi_schema.obter_projetor("User", {}).source == "default"
+    assert len(chamadas) == 1
+
+
+@pytest.mark.parametrize("erro", [_http_error(503), requests.ConnectionError("timeout")])
+def test_falha_transitoria_usa_padrao_sem_cache(monkeypatch, erro):
+    chamadas = _falhar_com(monkeypatch, erro)
+    assert glpi_schema.obter_projetor("User", {}).source == "default"
+    assert glpi_schema.obter_projetor("User", {}).source == "default"
+    assert len(chamadas) == 2
+
+
+def test_sessao_recusada_renovada_por_com_sessao_servico(monkeypatch):
+    monkeypatch.setenv("GLPI_SESSION_TTL", "60")
+    glpi._service_sessions.clear()
+    sessoes = iter(["expirada", "nova"])
+    monkeypatch.setattr(glpi, "autenticar_glpi", lambda timeout=10: {"Session-Token": next(sessoes)})
+
+    def listar(itemtype, headers, timeout=10):
+        if headers["Session-Token"] == "expirada":
+            raise _http_error(401)
+        return OPTIONS
+
+    monkeypatch.setattr(glpi_schema, "listar_search_options", listar)
+    projetor = glpi.com_sessao_servico(lambda h: glpi_schema.obter_projetor("User", h))
+    assert projetor.source == "listSearchOptions"
+    assert glpi_schema.obter_projetor("User", {}) is projetor
+    glpi._service_sessions.clear()
+
+
+def test_usuario_name_historico_e_display_name():
+    projetor = glpi_schema.compilar_projetor("User", OPTIONS)
+    usuario = projetor.project({"2": "7", "1": "joao.silva", "5": "joao@example.com", "9": "João", "34": "Silva"})
+    assert usuario.name == "joao.silva"
+    assert usuario.display_name == "João Silva"
+    assert usuario.to_dict()["name"] == "joao.silva"
+    assert usuario.to_dict()["display_name"] == "João Silva"
+    sem_nome = glpi_schema.UsuarioGLPI(id=8, login="maria", email=None)
+    assert sem_nome.name == sem_nome.display_name == "maria"
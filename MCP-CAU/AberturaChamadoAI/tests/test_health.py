@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from app_core.services.health_probe import GlpiHealthProber
+
+
+def _prober_com(client, **snapshot):
+    """Troca o prober da app por um com o último resultado informado (sem thread nem GLPI)."""
+    prober = GlpiHealthProber(interval=30.0, enabled=True)
+    prober._snapshot = {"glpi_configured": True, "glpi_connection": "ok", "checked_at": "2026-01-01T00:00:00+00:00",
+                        "latency_ms": 12.0, "glpi_error": None, **snapshot}
+    prober._checked_monotonic = time.monotonic()
+    client.application.extensions["glpi_health_prober"] = prober
+    return prober
+
+
+def test_live_nao_depende_do_glpi(client):
+    _prober_com(client, glpi_connection="error", glpi_error="timeout")
+    assert client.get("/api/health/live").get_json() == {"status": "ok"}
+
+
+def test_pronto_com_glpi_ok(client):
+    _prober_com(client)
+    resp = client.get("/api/health/ready")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["ready"] and body["glpi_connection"] == "ok" and not body["stale"] and not body["draining"]
+    assert "startup" in body
+    assert client.get("/api/health").get_json()["status"] == "ok"
+
+
+def test_nao_pronto_com_glpi_fora(client):
+    _prober_com(client, glpi_connection="error", glpi_error="HTTP 502")
+    resp = client.get("/api/health/ready")
+    assert resp.status_code == 503
+    assert resp.get_json()["ready"] is False and resp.get_json()["glpi_error"] == "HTTP 502"
+    # /api/health continua 200, com aviso
+    health = client.get("/api/health").get_json()
+    assert health["status"] == "warning" and health["glpi_error"] == "HTTP 502"
+
+
+def test_resultado_obsoleto_nao_esta_pronto(client):
+    prober = _prober_com(client)
+    prober._checked_monotonic = time.monotonic() - 4 * prober.interval
+    body = client.get("/api/health/ready").get_json()
+    assert body["stale"] and not body["ready"]
+
+
+def test_drenando_tira_de_rotacao(client):
+    prober = _prober_com(client)
+    prober.draining = True
+    resp = client.get("/api/health/ready")
+    assert resp.status_code == 503 and resp.get_json()["draining"] is True
+    assert client.get("/api/health/live").status_code == 200
+
+
+def test_probe_real_contra_glpi_falso(glpi_fake, client, monkeypatch):
+    prober = GlpiHealthProber(enabled=True, timeout=5)
+    client.application.extensions["glpi_health_prober"] = prober
+    assert client.get("/api/health/ready").status_code == 503  # ainda sem verificação
+    abertas = glpi_fake.stats()["open_sessions"]
+    result = prober.probe_once()
+    assert result["glpi_connection"] == "ok" and result["latency_ms"] is not None
+    assert client.get("/api/health/ready").status_code == 200
+    assert glpi_fake.stats()["open_sessions"] == abertas  # initSession seguido de killSession
+
+    monkeypatch.setenv("GLPI_USER_TOKEN", "token-errado")
+    assert prober.probe_once()["glpi_connection"] == "error"
+    assert client.get("/api/health/ready").status_code == 503
+
+
+@pytest.fixture
+def sem_glpi(monkeypatch):
+    for nome in ("GLPI_URL", "GLPI_NODES", "GLPI_APP_TOKEN", "GLPI_USER_TOKEN"):
+        monkeypatch.setenv(nome, "")
+
+
+def test_sem_configuracao_prober_desligado(sem_glpi, client):
+    resp = client.get("/api/health/ready")
+    assert resp.status_code == 503 and resp.get_json()["glpi_configured"] is False
+    assert client.get("/api/health").get_json()["status"] == "error"
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from scripts.fake_glpi_server import generate_users
+
+USUARIO = generate_users(50, 42)[3]
+
+
+def test_usuario_encontrado_com_etag_e_304(glpi_fake, client):
+    url = f"/api/glpi-user-by-email?email={USUARIO['email']}"
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert resp.headers["Cache-Control"] == "private, max-age=300"
+    etag = resp.headers["ETag"]
+
+    revalidada = client.get(url, headers={"If-None-Match": etag})
+    assert revalidada.status_code == 304 and revalidada.data == b""
+    assert revalidada.headers["ETag"] == etag
+
+    # Outro contrato, outro corpo: o ETag antigo não vale
+    compacta = client.get(url + "&compact=1", headers={"If-None-Match": etag})
+    assert compacta.status_code == 200 and compacta.headers["ETag"] != etag
+
+
+def test_nao_encontrado_sempre_revalida(glpi_fake, client):
+    resp = client.get("/api/glpi-user-by-email?email=ninguem@example.gov.br")
+    assert resp.status_code == 200 and not resp.get_json()["resultado"]["found"]
+    assert resp.headers["Cache-Control"] == "private, no-cache"
+    assert "ETag" in resp.headers
+
+
+def test_erro_sem_etag(client):
+    resp = client.get("/api/glpi-user-by-email", headers={"If-None-Match": '"qualquer"'})
+    assert resp.status_code == 400
+    assert "ETag" not in resp.headers and "Cache-Control" not in resp.headers
+
+
+def test_rotas_estaticas_memoizadas(client):
+    resp = client.get("/")
+    assert resp.status_code == 200
+    assert resp.headers["Cache-Control"] == "public, max-age=300"
+    etag = resp.headers["ETag"]
+    assert client.get("/").data == resp.data
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/", headers={"If-None-Match": '"outro"'}).status_code == 200
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from app_core.services.kb import IndiceKB
+
+
+def _escrever(path, texto):
+    path.write_text(texto, encoding="utf-8")
+    # mtime distinto mesmo em sistemas de arquivos com resolução grossa
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def kb_dir(tmp_path, monkeypatch):
+    _escrever(tmp_path / "vpn.md", "# VPN\n\n## Erro de autenticação\n\nSenha expirada na VPN: redefina a senha "
+                                   "no portal.\nA VPN exige senha atualizada.\n\n## Instalação\n\nBaixe o cliente.\n")
+    _escrever(tmp_path / "impressora.md", "# Impressora\n\n## Papel atolado\n\nAbra a tampa e retire o papel.\n")
+    monkeypatch.setenv("KB_DOCS_DIR", str(tmp_path))
+    monkeypatch.setenv("KB_REFRESH_INTERVAL", "0")
+    return tmp_path
+
+
+def test_bm25_ranqueia_secao_mais_relevante(kb_dir):
+    indice = IndiceKB(kb_dir, refresh_interval=0)
+    assert indice.sincronizar() == {"files": 2, "sections": 3, "changed": 2, "ms": indice.last_sync_ms}
+    results = indice.buscar("senha da vpn expirada")
+    assert results[0]["section"] == "Erro de autenticação"
+    assert results[0]["title"] == "VPN"
+    assert results[0]["snippet"].startswith("Senha expirada")
+    assert results[0]["score"] > results[-1]["score"]
+    # Sem acento/maiúsculas e stopwords ignoradas
+    assert indice.buscar("AUTENTICAÇÃO")[0]["section"] == "Erro de autenticação"
+    assert indice.buscar("de para com") == []
+    assert indice.buscar("papel", limit=1)[0]["path"] == "impressora.md"
+
+
+def test_reindexa_somente_arquivos_alterados(kb_dir):
+    indice = IndiceKB(kb_dir, refresh_interval=0)
+    indice.sincronizar()
+    secao_vpn = indice._arquivos["vpn.md"][2][0]
+    assert indice.sincronizar()["changed"] == 0 and indice.builds == 1
+
+    _escrever(kb_dir / "impressora.md", "# Impressora\n\n## Toner\n\nTroque o cartucho de toner.\n")
+    _escrever(kb_dir / "email.md", "# E-mail\n\n## Caixa cheia\n\nArquive mensagens antigas.\n")
+    sync = indice.sincronizar()
+    assert sync["changed"] == 2 and sync["files"] == 3 and indice.builds == 2
+    assert indice._arquivos["vpn.md"][2][0] is secao_vpn
+    assert indice.buscar("papel atolado") == []
+    assert indice.buscar("toner")[0]["section"] == "Toner"
+
+    (kb_dir / "email.md").unlink()
+    assert indice.sincronizar()["changed"] == 1
+    assert indice.buscar("caixa cheia") == []
+
+
+def test_thread_de_refresh_publica_novo_snapshot(kb_dir):
+    indice = IndiceKB(kb_dir, refresh_interval=0.05)
+    indice.sincronizar()
+    indice.start()
+    try:
+        _escrever(kb_dir / "toner.md", "# Toner\n\nTroque o cartucho de toner.\n")
+        for _ in range(100):
+            if indice.buscar("toner"):
+                break
+            indice._stop.wait(0.02)
+        assert indice.buscar("toner")[0]["path"] == "toner.md"
+    finally:
+        indice.stop()
+
+
+def test_kb_search_rota(kb_dir, client):
+    resp = client.get("/api/kb/search?q=vpn%20senha&limit=1")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["success"] and body["total"] == 1
+    assert body["results"][0]["path"] == "vpn.md"
+
+    compacto = client.get("/api/v2/kb/search?q=toner").get_json()
+    assert compacto["success"] and compacto["data"]["total"] == 0
+
+
+@pytest.mark.parametrize("query, mensagem", [("", "'q'"), ("?q=%20", "'q'"), ("?q=vpn&limit=x", "'limit'")])
+def test_kb_search_validacao(kb_dir, client, query, mensagem):
+    resp = client.get(f"/api/kb/search{query}")
+    assert resp.status_code == 400
+    assert mensagem in resp.get_json()["error"]
+
+
+@pytest.fixture
+def kb_desativada(monkeypatch):
+    monkeypatch.setenv("KB_DOCS_DIR", "")
+
+
+def test_kb_search_desativada(kb_desativada, client):
+    resp = client.get("/api/kb/search?q=vpn")
+    assert resp.status_code == 503
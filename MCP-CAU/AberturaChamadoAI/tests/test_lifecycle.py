@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from flask import Flask
+
+from app_core.services.health_probe import GlpiHealthProber
+from app_core.utils.lifecycle import RequestTracker, encerrar_app
+
+
+def _app():
+    app = Flask(__name__)
+    prober = GlpiHealthProber(enabled=False)
+    app.extensions["glpi_health_prober"] = prober
+    RequestTracker().install(app)
+    liberar = threading.Event()
+
+    @app.route("/lenta")
+    def lenta():
+        liberar.wait(5)
+        return "ok"
+
+    return app, prober, liberar
+
+
+def _requisicao_em_andamento(app):
+    requisicao = threading.Thread(target=lambda: app.test_client().get("/lenta"))
+    requisicao.start()
+    tracker = app.extensions["request_tracker"]
+    while tracker.in_flight == 0:
+        time.sleep(0.01)
+    return requisicao, tracker
+
+
+def test_encerramento_pronto_false_graca_e_drenagem_em_ordem():
+    app, prober, liberar = _app()
+    requisicao, tracker = _requisicao_em_andamento(app)
+    eventos = []
+    inicio = time.monotonic()
+
+    def parar_servidor():
+        eventos.append((prober.draining, time.monotonic() - inicio, tracker.in_flight))
+        liberar.set()
+
+    report = encerrar_app(app, 5.0, parar_servidor=parar_servidor, grace_period=0.2)
+    requisicao.join()
+
+    (draining, decorrido, em_andamento), = eventos
+    assert draining is True
+    assert decorrido >= 0.2
+    assert em_andamento == 1
+    assert report["drained"] is True
+    assert report["in_flight_at_start"] == 1
+    assert report["completed_during_drain"] == 1
+    assert report["grace_ms"] >= 200
+
+
+def test_encerramento_prazo_esgotado():
+    app, _, liberar = _app()
+    requisicao, _ = _requisicao_em_andamento(app)
+    report = encerrar_app(app, 0.1)
+    liberar.set()
+    requisicao.join()
+    assert report["drained"] is False
+    assert report["dropped"] == 1
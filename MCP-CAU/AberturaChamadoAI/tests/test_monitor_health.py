@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def monitor_health(monkeypatch, tmp_path):
+    # O módulo abre health_monitor.log no diretório atual ao ser importado
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("scripts.monitor_health")
+
+
+@pytest.mark.parametrize("url,local", [
+    ("http://localhost:5000", True),
+    ("http://api.localhost:5000", True),
+    ("http://127.0.0.1:5000", True),
+    ("http://127.1.2.3", True),
+    ("http://[::1]:5000", True),
+    ("http://LOCALHOST", True),
+    ("http://host-a:5000", False),
+    ("https://abcd.ngrok-free.app", False),
+    ("http://10.0.0.5:5000", False),
+    ("http://localhost.evil.com", False),
+])
+def test_host_local(monitor_health, url, local):
+    assert monitor_health.host_local(url) is local
+
+
+def test_so_gerencia_instancias_locais(monitor_health):
+    args = monitor_health.parse_args(["--instance", "http://localhost:5001", "--instance", "http://host-b:5000"])
+    local, remoto = monitor_health.criar_monitores(args)
+    assert local.start_cmd[-2:] == ["--port", "5001"]
+    assert remoto.start_cmd is None
+
+    args = monitor_health.parse_args(["--instance", "http://host-b:5000", "--manage-remote"])
+    assert monitor_health.criar_monitores(args)[0].start_cmd is not None
+    args = monitor_health.parse_args(["--no-manage"])
+    assert monitor_health.criar_monitores(args)[0].start_cmd is None
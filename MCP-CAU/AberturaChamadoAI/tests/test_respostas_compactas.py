@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import json
+
+from scripts.fake_glpi_server import generate_users
+
+USUARIO = generate_users(50, 42)[7]
+
+
+def test_contrato_legado(glpi_fake, client):
+    resp = client.get(f"/api/glpi-user-by-email?email={USUARIO['email']}")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["sucesso"] and body["success"] and body["query_email"] == USUARIO["email"]
+    resultado = body["resultado"]
+    assert resultado["found"] and resultado["user_id"] == USUARIO["id"] and resultado["login"] == USUARIO["name"]
+    assert resultado["raw"]["totalcount"] == 1 and resultado["search"]["searchtype"] == "equals"
+
+
+def test_v2_envelope_compacto_sem_raw(glpi_fake, client):
+    resp = client.get(f"/api/v2/glpi-user-by-email?email={USUARIO['email']}")
+    assert resp.status_code == 200
+    # JSON sem indentação nem espaços
+    assert b"\n" not in resp.data and b'": ' not in resp.data
+    body = json.loads(resp.data)
+    assert body["success"] and "sucesso" not in body
+    assert body["data"]["user_id"] == USUARIO["id"] and body["data"]["query_email"] == USUARIO["email"]
+    assert "raw" not in body["data"] and "search" not in body["data"]
+
+
+def test_modo_compacto_por_parametro_ou_header(glpi_fake, client):
+    por_parametro = client.get(f"/api/glpi-user-by-email?email={USUARIO['email']}&compact=1").get_json()
+    por_header = client.get(f"/api/glpi-user-by-email?email={USUARIO['email']}",
+                            headers={"X-Response-Mode": "compact"}).get_json()
+    assert por_parametro["data"] == por_header["data"]
+    assert por_parametro["data"]["user_id"] == USUARIO["id"]
+
+
+def test_projecao_de_campos(glpi_fake, client):
+    body = client.get(f"/api/v2/glpi-user-by-email?email={USUARIO['email']}&fields=user_id,login,inexistente").get_json()
+    assert body["data"] == {"user_id": USUARIO["id"], "login": USUARIO["name"]}
+
+    com_raw = client.get(f"/api/v2/glpi-user-by-email?email={USUARIO['email']}&raw=1").get_json()
+    assert com_raw["data"]["raw"]["totalcount"] == 1
+
+
+def test_erro_no_contrato_compacto(glpi_fake, client):
+    resp = client.get("/api/v2/glpi-user-by-email?email=sem-arroba")
+    assert resp.status_code == 400
+    assert resp.get_json() == {"success": False,
+                               "error": {"code": "bad_request", "message": "Parâmetro 'email' é obrigatório"}}
+    legado = client.get("/api/glpi-user-by-email")
+    assert legado.status_code == 400 and legado.get_json()["erro"] == "Parâmetro 'email' é obrigatório"
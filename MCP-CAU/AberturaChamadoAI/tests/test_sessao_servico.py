@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from app_core.services import glpi
+from app_core.services.glpi import SessaoExpiradaGLPI
+
+
+@pytest.fixture
+def sessoes(monkeypatch):
+    """initSession/killSession falsos: cada sessão aberta recebe um token sequencial."""
+    monkeypatch.setenv("GLPI_URL", "http://glpi.teste/apirest.php")
+    monkeypatch.setenv("GLPI_SESSION_TTL", "600")
+    abertas, encerradas = [], []
+
+    def autenticar():
+        abertas.append(f"s{len(abertas) + 1}")
+        return {"Session-Token": abertas[-1]}
+
+    monkeypatch.setattr(glpi, "autenticar_glpi", autenticar)
+    monkeypatch.setattr(glpi, "encerrar_sessao_glpi",
+                        lambda headers, timeout=10: encerradas.append(headers["Session-Token"]) or True)
+    glpi._service_sessions.clear()
+    yield abertas, encerradas
+    glpi._service_sessions.clear()
+
+
+def test_sessao_compartilhada_entre_operacoes(sessoes):
+    abertas, encerradas = sessoes
+    tokens = [glpi.com_sessao_servico(lambda h: h["Session-Token"]) for _ in range(3)]
+    assert tokens == ["s1", "s1", "s1"]
+    assert abertas == ["s1"] and encerradas == []
+
+
+def test_401_renova_sessao_e_repete_uma_vez(sessoes):
+    abertas, _ = sessoes
+    vistos = []
+
+    def operacao(headers):
+        vistos.append(headers["Session-Token"])
+        if headers["Session-Token"] == "s1":
+            raise SessaoExpiradaGLPI("401")
+        return "ok"
+
+    assert glpi.com_sessao_servico(operacao) == "ok"
+    assert vistos == ["s1", "s2"]
+    assert glpi.sessao_servico()["Session-Token"] == "s2"
+
+    def sempre_recusada(headers):
+        raise SessaoExpiradaGLPI("401")
+
+    with pytest.raises(SessaoExpiradaGLPI):
+        glpi.com_sessao_servico(sempre_recusada)
+    assert abertas == ["s1", "s2", "s3"]
+
+
+def test_outros_erros_nao_renovam_sessao(sessoes):
+    abertas, _ = sessoes
+    with pytest.raises(ValueError):
+        glpi.com_sessao_servico(lambda h: (_ for _ in ()).throw(ValueError("falha")))
+    assert abertas == ["s1"]
+
+
+def test_ttl_zero_abre_e_encerra_por_operacao(sessoes, monkeypatch):
+    abertas, encerradas = sessoes
+    monkeypatch.setenv("GLPI_SESSION_TTL", "0")
+    glpi.com_sessao_servico(lambda h: None)
+    glpi.com_sessao_servico(lambda h: None)
+    assert abertas == ["s1", "s2"] and encerradas == ["s1", "s2"]
+
+
+def test_sessao_expirada_encerrada_fora_da_requisicao(sessoes, monkeypatch):
+    abertas, _ = sessoes
+    liberar = threading.Event()
+    encerradas = []
+
+    def encerrar_lento(headers, timeout=10):
+        liberar.wait(5)
+        encerradas.append(headers["Session-Token"])
+        return True
+
+    monkeypatch.setattr(glpi, "encerrar_sessao_glpi", encerrar_lento)
+    monkeypatch.setenv("GLPI_SESSION_TTL", "0.05")
+    assert glpi.sessao_servico()["Session-Token"] == "s1"
+    time.sleep(0.1)
+    inicio = time.monotonic()
+    assert glpi.sessao_servico()["Session-Token"] == "s2"
+    assert time.monotonic() - inicio < 1.0 and encerradas == []
+    liberar.set()
+    for _ in range(50):
+        if encerradas:
+            break
+        time.sleep(0.02)
+    assert encerradas == ["s1"]
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from app_core.services.glpi_schema import UsuarioGLPI
+from app_core.services.user_directory import DiretorioUsuarios
+
+USUARIOS = [
+    UsuarioGLPI(id=1, login="joao.silva", email="joao.silva@example.gov.br", firstname="João", realname="Silva"),
+    UsuarioGLPI(id=2, login="maria.souza", email="maria.souza@example.gov.br", firstname="Maria", realname="Souza"),
+    UsuarioGLPI(id=3, login="mariana.lima", email="mariana.lima@example.gov.br", firstname="Mariana", realname="Lima"),
+    UsuarioGLPI(id=4, login="jose.silveira", email="jose@example.gov.br", firstname="José", realname="Silveira"),
+    UsuarioGLPI(id=5, login=None, email=None, firstname="Sem", realname="Chave"),
+]
+
+
+@pytest.fixture
+def diretorio():
+    diretorio = DiretorioUsuarios(enabled=False)
+    assert diretorio.carregar(USUARIOS) == 4  # sem login nem e-mail: fora do diretório
+    return diretorio
+
+
+def test_exato_e_prefixo(diretorio):
+    exato = diretorio.sugerir("maria.souza")
+    assert exato[0]["id"] == 2 and exato[0]["match"] == "exact" and exato[0]["score"] == 1.0
+    prefixo = diretorio.sugerir("mari")
+    assert [s["id"] for s in prefixo] == [2, 3]  # chave mais curta primeiro
+    assert all(s["match"] == "prefix" for s in prefixo)
+    assert prefixo[0]["display_name"] == "Maria Souza"
+
+
+def test_termos_sem_acento_em_qualquer_ordem(diretorio):
+    sugestoes = diretorio.sugerir("silva joao")
+    assert sugestoes[0]["id"] == 1 and sugestoes[0]["match"] == "terms"
+    # Domínio do e-mail não conta como termo
+    assert diretorio.sugerir("example", limit=5) == []
+
+
+def test_erro_de_digitacao_corrigido_por_trigramas(diretorio):
+    sugestoes = diretorio.sugerir("maria souaz")
+    assert sugestoes[0]["id"] == 2 and sugestoes[0]["match"] == "fuzzy"
+    assert sugestoes[0]["score"] < 1.0
+    assert diretorio.sugerir("silvira")[0]["id"] == 4
+
+
+def test_vazio_antes_da_carga():
+    assert DiretorioUsuarios(enabled=False).sugerir("maria") == []
+
+
+def test_rota_de_sugestoes(client, diretorio):
+    app_diretorio = client.application.extensions["user_directory"]
+    resp = client.get("/api/users/suggest?q=maria")
+    assert resp.status_code == 503 and "USER_SUGGEST_ENABLED" in resp.get_json()["erro"]
+
+    app_diretorio.enabled = True
+    nao_pronto = client.get("/api/v2/users/suggest?q=maria")
+    assert nao_pronto.status_code == 503 and nao_pronto.get_json()["error"]["code"] == "suggest_not_ready"
+
+    app_diretorio.carregar(USUARIOS)
+    body = client.get("/api/users/suggest?q=mari&limit=1").get_json()
+    assert body["success"] and body["total"] == 1 and body["suggestions"][0]["login"] == "maria.souza"
+    compacto = client.get("/api/v2/users/suggest?q=silveira").get_json()
+    assert compacto["data"]["suggestions"][0]["id"] == 4
+
+    assert client.get("/api/users/suggest?q=m").status_code == 400
+    assert client.get("/api/users/suggest?q=maria&limit=x").status_code == 400
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from app_core.utils.validators import listar_violacoes, validar_chamado
+
+
+DESCRICAO = "A impressora do segundo andar não imprime desde ontem à tarde e mostra papel atolado"
+VALIDO = {
+    "description": DESCRICAO,
+    "title": "Impressora parada",
+    "category": "HARDWARE_IMPRESSORA",
+    "impact": "MEDIO",
+    "location": "Sala 201",
+    "contact_phone": "51999999999",
+}
+
+
+def _args(**override):
+    dados = {**VALIDO, **override}
+    return [dados[c] for c in ("description", "title", "category", "impact", "location", "contact_phone")]
+
+
+def test_validar_chamado_valido():
+    assert validar_chamado(*_args()) is None
+
+
+def test_validar_chamado_primeira_violacao_na_ordem_historica():
+    assert validar_chamado(*_args(description=None))["error"].startswith("Campo 'description")
+    assert validar_chamado(*_args(description="curta", location=None, contact_phone=None,
+                                  category=None))["error"] == "Descrição muito curta"
+    assert validar_chamado(*_args(contact_phone="123"))["error"] == "Telefone inválido"
+    assert validar_chamado(*_args(location="ab"))["error"] == "Localização inválida"
+
+
+def test_validar_chamado_aceita_numeros_como_texto():
+    assert validar_chamado(*_args(contact_phone=51999999999)) is None
+    violacao = validar_chamado(*_args(description=12345, location=None, contact_phone=None, category=None))
+    assert violacao["error"] == "Descrição muito curta"
+
+
+def test_validar_chamado_tipo_invalido():
+    violacao = validar_chamado(*_args(location=["Sala 201"]))
+    assert violacao["details"] == {"field": "location", "received_type": "list"}
+    assert validar_chamado(*_args(contact_phone=True))["details"]["received_type"] == "bool"
+    assert validar_chamado(*_args(description={"texto": "x"}))["details"]["field"] == "description"
+
+
+def test_listar_violacoes_todas_e_por_campo():
+    assert listar_violacoes(VALIDO) == []
+    violacoes = listar_violacoes({"description": "curta", "contact_phone": "1"})
+    assert [(v["field"], v["code"]) for v in violacoes] == [
+        ("description", "too_short"), ("contact_phone", "invalid"), ("title", "required"),
+        ("category", "required"), ("impact", "required"), ("location", "invalid"),
+    ]
+    assert [v["field"] for v in listar_violacoes({"contact_phone": "1"}, ["contact_phone"])] == ["contact_phone"]
+
+
+def test_listar_violacoes_tipos_nao_texto():
+    violacoes = listar_violacoes({**VALIDO, "contact_phone": 51999999999, "location": {"sala": 1}})
+    assert [(v["field"], v["code"]) for v in violacoes] == [("location", "invalid_type")]
+
+
+def test_rota_validate_ticket_com_valores_nao_texto(client):
+    resp = client.post("/api/validate-ticket", json={"descricao": 12345, "telefone": 51999999999,
+                                                     "localizacao": ["x"]})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["valid"] is False
+    codigos = {v["field"]: v["code"] for v in body["violations"]}
+    assert codigos["description"] == "too_short"
+    assert codigos["location"] == "invalid_type"
+    assert "contact_phone" not in codigos
+
+
+def test_rota_validate_ticket_campo_unico_compacto(client):
+    resp = client.post("/api/v2/validate-ticket", json={"field": "telefone", "telefone": True})
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert body["data"]["violations"][0]["code"] == "invalid_type"
+    assert "erro" not in body["data"]["violations"][0]